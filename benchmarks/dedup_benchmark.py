@@ -0,0 +1,161 @@
+"""
+Measures NearDuplicateIndex build time, per-alert check latency and detection quality on a
+synthetic corpus.
+
+The corpus mixes distinct alerts with near-duplicates of earlier ones, as published by
+another source: a different title prefix, punctuation and a few words added or dropped.
+Ground truth is known for every alert, so precision and recall of the canonical IDs are
+reported next to the timings. A pairwise Jaccard scan over a sample of alerts is timed for
+comparison.
+
+Usage:
+    python benchmarks/dedup_benchmark.py --alerts 100000 --duplicate-rate 0.15
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.processor.dedup_index import NearDuplicateIndex, shingles
+
+DRUGS = [
+    "valproate", "isotretinoin", "fluoroquinolone", "montelukast", "topiramate", "finasteride",
+    "metformin", "levothyroxine", "methotrexate", "warfarin", "apixaban", "semaglutide",
+    "pregabalin", "gabapentin", "codeine", "tramadol", "modafinil", "hydroxychloroquine",
+    "carbimazole", "clozapine", "lamotrigine", "mycophenolate", "denosumab", "tofacitinib",
+]
+RISKS = [
+    "risk of serious harm in pregnancy", "neuropsychiatric reactions", "tendon damage and aortic aneurysm",
+    "reports of dosing errors", "increased risk of fractures", "hypoglycaemia in older patients",
+    "interaction with common antibiotics", "risk of dependence and withdrawal", "supply disruption",
+    "new contraindications", "serious skin reactions", "cardiovascular events in high-risk patients",
+]
+ACTIONS = [
+    "review patients at their next appointment", "do not start treatment without specialist advice",
+    "report suspected adverse reactions via the Yellow Card scheme", "counsel patients on warning signs",
+    "check renal function before prescribing", "consider alternative treatments where appropriate",
+    "ensure a pregnancy prevention programme is in place", "reduce the dose in patients over 65",
+]
+PREFIXES = ["", "MHRA: ", "Drug Safety Update: ", "Alert - ", "Class 2 Medicines Recall: "]
+SOURCES = ["MHRA Drug Alerts", "GOV.UK Drug Safety Update", "NICE Safety Notices", "NHS England Patient Safety"]
+VOCABULARY_SIZE = 5000
+
+
+def _make_vocabulary(rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(VOCABULARY_SIZE)]
+
+
+def _make_alert(rng: random.Random, vocabulary: list, alert_id: str) -> dict:
+    drugs = rng.sample(DRUGS, 2)
+    risk, action = rng.choice(RISKS), rng.choice(ACTIONS)
+    body = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(30, 60)))
+    return {
+        "alert_id": alert_id,
+        "title": f"{drugs[0].capitalize()} and {drugs[1]}: {risk}",
+        "summary": f"{body}. Healthcare professionals should {action}.",
+        "source_name": rng.choice(SOURCES),
+    }
+
+
+def _near_duplicate(rng: random.Random, original: dict, alert_id: str, taken_sources: set) -> dict:
+    words = original["summary"].split()
+    if rng.random() < 0.5:
+        del words[rng.randrange(len(words))]
+    else:
+        words.insert(rng.randrange(len(words)), rng.choice(["also", "now", "urgently", "please"]))
+    return {
+        "alert_id": alert_id,
+        "title": rng.choice(PREFIXES) + original["title"].replace(":", " -").replace("(", "[").replace(")", "]"),
+        "summary": " ".join(words),
+        # The index only matches alerts of different sources, so a duplicate comes from a source
+        # that has not published the alert yet.
+        "source_name": rng.choice([source for source in SOURCES if source not in taken_sources]),
+    }
+
+
+def make_corpus(count: int, duplicate_rate: float, seed: int = 42):
+    """Returns (alerts DataFrame, list of the true canonical ID of each alert)."""
+    rng = random.Random(seed)
+    vocabulary = _make_vocabulary(rng)
+    alerts, truth = [], []
+    cluster_sources = {}  # canonical ID -> sources that published the alert
+    for i in range(count):
+        alert_id = f"SYN-{i:07d}"
+        original_index = rng.randrange(len(alerts)) if alerts and rng.random() < duplicate_rate else None
+        taken_sources = cluster_sources.get(truth[original_index], set()) if original_index is not None else set()
+        if original_index is not None and len(taken_sources) < len(SOURCES):
+            alerts.append(_near_duplicate(rng, alerts[original_index], alert_id, taken_sources))
+            truth.append(truth[original_index])
+            taken_sources.add(alerts[-1]["source_name"])
+        else:
+            alerts.append(_make_alert(rng, vocabulary, alert_id))
+            truth.append(alert_id)
+            cluster_sources[alert_id] = {alerts[-1]["source_name"]}
+    return pd.DataFrame(alerts), truth
+
+
+def measure_index(alerts_df: pd.DataFrame, truth: list, threshold: float) -> dict:
+    index = NearDuplicateIndex(threshold=threshold)
+    latencies = np.empty(len(alerts_df))
+    assigned = []
+    start = time.perf_counter()
+    for i, (alert_id, title, summary, source_name) in enumerate(
+            zip(alerts_df["alert_id"], alerts_df["title"], alerts_df["summary"], alerts_df["source_name"])):
+        t0 = time.perf_counter()
+        assigned.append(index.add(alert_id, title, summary, source_name=source_name))
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+
+    true_duplicates = {i for i, (alert_id, canonical) in enumerate(zip(alerts_df["alert_id"], truth)) if alert_id != canonical}
+    flagged = {i for i, (alert_id, canonical) in enumerate(zip(alerts_df["alert_id"], assigned)) if alert_id != canonical}
+    correct = sum(1 for i in flagged & true_duplicates if assigned[i] == truth[i])
+    return {
+        "alerts": len(alerts_df),
+        "threshold": threshold,
+        "seconds": round(elapsed, 3),
+        "alerts_per_sec": round(len(alerts_df) / elapsed, 1),
+        "latency_ms_mean": round(latencies.mean() * 1000, 3),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "latency_ms_p99": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "true_duplicates": len(true_duplicates),
+        "flagged_duplicates": len(flagged),
+        "precision": round(correct / len(flagged), 4) if flagged else None,
+        "recall": round(correct / len(true_duplicates), 4) if true_duplicates else None,
+    }
+
+
+def measure_pairwise(alerts_df: pd.DataFrame, samples: int, threshold: float) -> dict:
+    """Times exact pairwise Jaccard of `samples` alerts against the whole corpus."""
+    shingle_sets = [shingles(f"{t} {s}") for t, s in zip(alerts_df["title"], alerts_df["summary"])]
+    queries = shingle_sets[-samples:]
+    start = time.perf_counter()
+    for query in queries:
+        for other in shingle_sets:
+            if len(query & other) / len(query | other) >= threshold:
+                pass
+    elapsed = time.perf_counter() - start
+    return {"pairwise_samples": samples, "pairwise_ms_per_alert": round(elapsed / samples * 1000, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alerts", type=int, default=100000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.15)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--pairwise-samples", type=int, default=20, help="Alerts timed with a pairwise scan (0 to skip).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    alerts_df, truth = make_corpus(args.alerts, args.duplicate_rate, args.seed)
+    result = measure_index(alerts_df, truth, args.threshold)
+    if args.pairwise_samples:
+        result.update(measure_pairwise(alerts_df, args.pairwise_samples, args.threshold))
+    print(json.dumps(result))
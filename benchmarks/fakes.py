@@ -0,0 +1,283 @@
+"""
+In-memory stand-ins for the Firecrawl and Supabase clients, so the scraper and DBManager can
+be benchmarked without network access or API quotas.
+
+FakeFirecrawlApp serves the synthetic pages of benchmarks/synthetic.py. FakeSupabaseClient
+implements the subset of the postgrest query builder that DBManager uses (filters, or_,
+order, limit, range, upsert and insert) over Python lists, including the triggers that
+maintain alert_action_summary and the updated_at versions.
+"""
+import re
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+import synthetic
+from src.database.storage import SURGERIES, SYNC_TABLE_KEYS
+
+VERSIONED_TABLES = set(SYNC_TABLE_KEYS)
+
+
+class FakeFirecrawlApp:
+    """Answers scrape() with synthetic list pages (URLs with ?page=N or the list URL) and alert pages."""
+
+    def __init__(self, total_alerts: int, list_url: str, seed: int = 0):
+        self.total_alerts = total_alerts
+        self.list_url = list_url.rstrip("/")
+        self.seed = seed
+        self.requests = 0
+
+    def scrape(self, url, **options):
+        self.requests += 1
+        path, _, query = url.partition("?")
+        page_match = re.search(r"(?:^|&)page=(\d+)", query)
+        if path.rstrip("/") == self.list_url:
+            return synthetic.list_page(int(page_match.group(1)) if page_match else 1, self.total_alerts, self.list_url)
+        slug_match = re.search(r"synthetic-alert-(\d+)$", path)
+        if not slug_match:
+            raise ValueError(f"Unknown URL {url}")
+        return synthetic.alert_page(int(slug_match.group(1)), self.list_url, self.seed)
+
+    def crawl(self, url, **options):
+        return SimpleNamespace(status="completed", data=[self.scrape(url)])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def _split_top_level(text: str) -> list:
+    """Splits a PostgREST logic filter on the commas that are outside parentheses and quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\":
+            current += text[i:i + 2]
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            i += 1
+            continue
+        current += char
+        i += 1
+    parts.append(current)
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _compare(op: str, value, operand) -> bool:
+    if op == "is":
+        return value is None if operand == "null" else value == operand
+    if value is None:
+        return False
+    if isinstance(value, int) and isinstance(operand, str):
+        operand = int(operand)  # filter strings are typed by the column in Postgres
+    if op == "eq":
+        return value == operand
+    if op == "neq":
+        return value != operand
+    if op == "lt":
+        return value < operand
+    if op == "lte":
+        return value <= operand
+    if op == "gt":
+        return value > operand
+    if op == "gte":
+        return value >= operand
+    if op == "in":
+        return value in operand
+    raise ValueError(f"Unsupported operator {op}")
+
+
+def _logic_predicate(expression: str):
+    """Compiles a PostgREST or=(...) expression such as `a.lt.1,and(a.eq.1,b.lt."x")` to a predicate."""
+    terms = []
+    for term in _split_top_level(expression):
+        if term.startswith(("and(", "or(")):
+            combine = all if term.startswith("and(") else any
+            inner = [_logic_predicate(part) for part in _split_top_level(term[term.index("(") + 1:-1])]
+            terms.append(lambda row, inner=inner, combine=combine: combine(p(row) for p in inner))
+        else:
+            column, op, operand = term.split(".", 2)
+            operand = _unquote(operand)
+            terms.append(lambda row, column=column, op=op, operand=operand: _compare(op, row.get(column), operand))
+    return lambda row: any(term(row) for term in terms)
+
+
+class FakeQuery:
+    def __init__(self, client, table: str):
+        self.client = client
+        self.table_name = table
+        self._columns = None
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._range = None
+        self._write = None
+
+    # Reads
+
+    def select(self, columns: str = "*"):
+        self._columns = None if columns == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def _filter(self, column, op, operand):
+        self._filters.append(lambda row: _compare(op, row.get(column), operand))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", set(values))
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def or_(self, expression: str):
+        self._filters.append(_logic_predicate(expression))
+        return self
+
+    def order(self, column, desc: bool = False, nullsfirst: bool = None):
+        self._orders.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int):
+        self._range = (start, end)
+        return self
+
+    # Writes
+
+    def upsert(self, rows, on_conflict: str = None, ignore_duplicates: bool = False):
+        self._write = ("upsert", rows if isinstance(rows, list) else [rows], on_conflict, ignore_duplicates)
+        return self
+
+    def insert(self, rows):
+        self._write = ("insert", rows if isinstance(rows, list) else [rows], None, False)
+        return self
+
+    def execute(self) -> FakeResponse:
+        if self._write:
+            return FakeResponse(self.client._write(self.table_name, *self._write))
+        rows = [row for row in self.client.tables.get(self.table_name, []) if all(f(row) for f in self._filters)]
+        for column, desc, nullsfirst in reversed(self._orders):
+            nulls = [row for row in rows if row.get(column) is None]
+            values = sorted((row for row in rows if row.get(column) is not None), key=lambda row: row[column], reverse=desc)
+            rows = nulls + values if nullsfirst else values + nulls
+        if self._range:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns:
+            rows = [{column: row.get(column) for column in self._columns} for row in rows]
+        else:
+            rows = [dict(row) for row in rows]
+        return FakeResponse(rows)
+
+
+class FakeSupabaseClient:
+    """In-memory tables behind the supabase-py `client.table(...)` interface."""
+
+    PRIMARY_KEYS = {"alerts": "alert_id", "pharmacist_actions": "action_id", "alert_action_summary": "alert_id",
+                    "alert_blobs": "content_hash"}
+
+    def __init__(self):
+        self.tables = {name: [] for name in self.PRIMARY_KEYS}
+        self._positions = {name: {} for name in self.PRIMARY_KEYS}
+        self.requests = 0
+
+    def table(self, name: str) -> FakeQuery:
+        self.requests += 1
+        if name == "alert_sources":
+            # What the alert_sources view does in Postgres.
+            sources = {row.get("source_name") for row in self.tables["alerts"]} - {None, ""}
+            self.tables[name] = [{"source_name": source} for source in sources]
+        return FakeQuery(self, name)
+
+    def _write(self, table: str, mode: str, rows: list, on_conflict: str = None, ignore_duplicates: bool = False) -> list:
+        rows = [dict(row) for row in rows]
+        # What the set_updated_at trigger does in Postgres.
+        updated_at = datetime.now(timezone.utc).isoformat() if table in VERSIONED_TABLES else None
+        key = self.PRIMARY_KEYS.get(table)
+        positions = self._positions.setdefault(table, {})
+        stored = self.tables.setdefault(table, [])
+        # Upserts on another unique column (e.g. pharmacist_actions.submission_id) look rows up by that column.
+        conflict_positions = positions
+        if on_conflict and on_conflict != key:
+            conflict_positions = {row.get(on_conflict): i for i, row in enumerate(stored) if row.get(on_conflict) is not None}
+        written = []
+        for row in rows:
+            conflict_value = row.get(on_conflict or key)
+            position = conflict_positions.get(conflict_value) if conflict_value is not None else None
+            if position is not None:
+                if mode == "insert":
+                    raise ValueError(f"duplicate key value violates unique constraint on {table}.{key}")
+                if ignore_duplicates:
+                    continue
+                changed = any(stored[position].get(column) != value for column, value in row.items())
+                stored[position].update(row)
+                if updated_at and changed:
+                    stored[position]["updated_at"] = updated_at
+                row = dict(stored[position])
+            else:
+                if table == "pharmacist_actions":
+                    row.setdefault("action_id", len(stored) + 1)
+                    row.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+                    self._update_action_summary(row)
+                if updated_at:
+                    row["updated_at"] = updated_at
+                positions[row.get(key)] = len(stored)
+                if conflict_positions is not positions:
+                    conflict_positions[conflict_value] = len(stored)
+                stored.append(row)
+            written.append(row)
+        return written
+
+    def _update_action_summary(self, action: dict):
+        """What the alert_action_summary trigger does in Postgres."""
+        positions = self._positions["alert_action_summary"]
+        summaries = self.tables["alert_action_summary"]
+        position = positions.get(action["alert_id"])
+        if position is None:
+            positions[action["alert_id"]] = len(summaries)
+            summaries.append({"alert_id": action["alert_id"], "action_count": 0, "last_action_at": None,
+                              **{surgery: 0 for surgery in SURGERIES}})
+            position = positions[action["alert_id"]]
+        summary = summaries[position]
+        summary["action_count"] += 1
+        summary["last_action_at"] = max(summary["last_action_at"] or "", action["timestamp"])
+        for surgery in SURGERIES:
+            summary[surgery] += action.get(surgery) or 0
@@ -0,0 +1,218 @@
+"""
+Benchmark suite for the ingest path and the dashboard's data loading.
+
+Runs each benchmark at every requested corpus size on deterministic synthetic data (see
+synthetic.py), with in-memory fakes for the Firecrawl and Supabase clients (see fakes.py)
+and an in-memory SQLite database. Results are written as JSON so two commits can be
+compared:
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --output before.json
+    (change something)
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --output after.json --compare before.json
+
+--compare prints the slowdown of every benchmark against the baseline and exits with status 1
+if any is slower than --threshold. Sizes up to 1M work, but need several GB of memory.
+Timings through the fake Supabase client include the fake's own in-memory query work.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+import synthetic
+from fakes import FakeFirecrawlApp, FakeSupabaseClient
+from src.database.codec import encode_alert_frame, decode_alert_frame
+from src.database.db_manager import DBManager
+from src.database.sqlite_manager import SQLiteDBManager
+from src.database.storage import action_status, ALERT_SUMMARY_COLUMNS, DEFAULT_PAGE_SIZE
+from src.processor.data_normalizer import normalize_alert_data, process_alerts_to_dataframe
+from src.pipeline.ingest import parse_pages
+from src.scraper.firecrawl_scraper import FirecrawlScraper
+from src.scraper.sources import GOV_UK_DRUG_SAFETY_UPDATE, make_alert_id
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, max_size: int = None, per_row: bool = True):
+    """
+    Registers a benchmark. The decorated function gets (size, seed), does its untimed setup
+    and returns the callable to time. per_row=False marks benchmarks whose work does not
+    grow with the corpus (e.g. loading one page), which get no rows_per_sec figure.
+    """
+    def register(func):
+        BENCHMARKS[name] = (func, max_size, per_row)
+        return func
+    return register
+
+
+def _stored_rows(size: int, seed: int) -> pd.DataFrame:
+    return process_alerts_to_dataframe(synthetic.raw_alerts(size, seed))
+
+
+def _loaded_backend(backend: str, size: int, seed: int):
+    """A backend holding `size` alerts, with pharmacist actions for about half of them."""
+    with contextlib.redirect_stdout(sys.stderr):
+        db_manager = DBManager(client=FakeSupabaseClient()) if backend == "supabase" else SQLiteDBManager(":memory:")
+    alerts_df = _stored_rows(size, seed)
+    db_manager.insert_alerts(alerts_df)
+    for action in synthetic.pharmacist_actions(alerts_df['alert_id'].tolist(), per_alert=0.5, seed=seed):
+        db_manager.insert_pharmacist_action(action)
+    return db_manager
+
+
+@benchmark("normalize_alert_data")
+def bench_normalize_alert_data(size, seed):
+    raw_alerts = synthetic.raw_alerts(size, seed)
+    return lambda: [normalize_alert_data(alert) for alert in raw_alerts]
+
+
+@benchmark("process_alerts_to_dataframe")
+def bench_process_alerts_to_dataframe(size, seed):
+    raw_alerts = synthetic.raw_alerts(size, seed)
+    return lambda: process_alerts_to_dataframe(raw_alerts)
+
+
+@benchmark("codec.encode_alert_frame")
+def bench_encode(size, seed):
+    alerts_df = _stored_rows(size, seed)
+    return lambda: encode_alert_frame(alerts_df)
+
+
+@benchmark("codec.decode_alert_frame")
+def bench_decode(size, seed):
+    stored_df = pd.DataFrame(encode_alert_frame(_stored_rows(size, seed)))
+    return lambda: decode_alert_frame(stored_df.copy())
+
+
+@benchmark("supabase.insert_alerts")
+def bench_supabase_insert(size, seed):
+    alerts_df = _stored_rows(size, seed)
+    return lambda: DBManager(client=FakeSupabaseClient()).insert_alerts(alerts_df)
+
+
+@benchmark("sqlite.insert_alerts")
+def bench_sqlite_insert(size, seed):
+    alerts_df = _stored_rows(size, seed)
+
+    def run():
+        with contextlib.redirect_stdout(sys.stderr):
+            db_manager = SQLiteDBManager(":memory:")
+        db_manager.insert_alerts(alerts_df)
+    return run
+
+
+def _view_alerts_page_loader(db_manager):
+    """What view_alerts_page loads: the first page, its action status and the selected alert's detail."""
+    def load():
+        alerts_df, _ = db_manager.query_alerts(columns=ALERT_SUMMARY_COLUMNS, page_size=DEFAULT_PAGE_SIZE, hide_duplicates=True)
+        action_status(db_manager.get_action_summaries(alerts_df['alert_id'].tolist()), alerts_df['alert_id'])
+        db_manager.get_alert_with_actions(alerts_df['alert_id'].iloc[0])
+    return load
+
+
+def _enter_actions_page_loader(db_manager):
+    """What enter_actions_page loads: the first page of alert titles and the selected alert."""
+    def load():
+        alerts_df, _ = db_manager.query_alerts(columns=['alert_id', 'title'], page_size=DEFAULT_PAGE_SIZE, hide_duplicates=True)
+        db_manager.get_alert(alerts_df['alert_id'].iloc[0], columns=['alert_id', 'title', 'summary'])
+    return load
+
+
+for _backend in ("supabase", "sqlite"):
+    benchmark(f"{_backend}.view_alerts_page", per_row=False)(
+        lambda size, seed, backend=_backend: _view_alerts_page_loader(_loaded_backend(backend, size, seed)))
+    benchmark(f"{_backend}.enter_actions_page", per_row=False)(
+        lambda size, seed, backend=_backend: _enter_actions_page_loader(_loaded_backend(backend, size, seed)))
+
+
+@benchmark("scrape_and_parse", max_size=100_000)
+def bench_scrape_and_parse(size, seed):
+    source = GOV_UK_DRUG_SAFETY_UPDATE
+    app = FakeFirecrawlApp(size, source["base_url"], seed)
+    scraper = FirecrawlScraper(app=app, requests_per_minute=1e9)
+    urls = [f"{source['base_url']}/{synthetic.alert_slug(i)}" for i in range(size)]
+
+    def run():
+        pages = ((make_alert_id(source, url), url, page) for url, page in scraper.scrape_many(urls, max_workers=4))
+        return sum(1 for _ in parse_pages(pages, source))
+    return run
+
+
+def timed(func, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(names: list, sizes: list, repeat: int, seed: int) -> dict:
+    results = []
+    for name in names:
+        setup, max_size, per_row = BENCHMARKS[name]
+        for size in sizes:
+            if max_size and size > max_size:
+                continue
+            with contextlib.redirect_stdout(sys.stderr):
+                timings = timed(setup(size, seed), repeat)
+            best = min(timings)
+            result = {"benchmark": name, "size": size, "repeat": repeat, "min_seconds": round(best, 6),
+                      "mean_seconds": round(sum(timings) / len(timings), 6)}
+            if per_row:
+                result["rows_per_sec"] = round(size / best, 1)
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "pandas": pd.__version__,
+            "seed": seed, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Prints current/baseline time ratios; returns True if no benchmark is slower than the threshold."""
+    baseline_times = {(r["benchmark"], r["size"]): r["min_seconds"] for r in baseline["results"]}
+    ok = True
+    for result in report["results"]:
+        before = baseline_times.get((result["benchmark"], result["size"]))
+        if not before:
+            continue
+        ratio = result["min_seconds"] / before
+        slower = ratio > threshold
+        ok = ok and not slower
+        print(f"{'REGRESSION' if slower else 'ok':>10}  {result['benchmark']:<32} {result['size']:>8}  "
+              f"{before:.4f}s -> {result['min_seconds']:.4f}s  ({ratio:.2f}x)")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--benchmarks", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout).")
+    parser.add_argument("--compare", help="A previous JSON report to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression.")
+    args = parser.parse_args()
+
+    report = run(args.benchmarks, args.sizes, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            if not compare(report, json.load(f), args.threshold):
+                sys.exit(1)
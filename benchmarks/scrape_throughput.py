@@ -0,0 +1,93 @@
+"""
+Measures FirecrawlScraper.scrape_many throughput (pages/sec) against a local stub server.
+
+The stub stands in for the Firecrawl endpoint: it answers every POST with a small JSON
+page after a fixed latency, and can be told to return a 429 for a fraction of requests
+to exercise the retry path.
+
+Usage:
+    python benchmarks/scrape_throughput.py --pages 100 --latency 0.05 --concurrency 1 2 4 8 16
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.scraper.firecrawl_scraper import FirecrawlScraper
+
+
+def make_stub_handler(latency, error_rate):
+    class FirecrawlStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            if random.random() < error_rate:
+                self._send(429, {"success": False, "error": "Rate limit exceeded"})
+                return
+            url = body.get("url", "")
+            self._send(200, {
+                "success": True,
+                "data": {
+                    "markdown": f"# Stub page for {url}",
+                    "metadata": {"sourceURL": url, "statusCode": 200, "title": f"Stub {url}"},
+                },
+            })
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FirecrawlStubHandler
+
+
+def start_stub_server(latency=0.05, error_rate=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(latency, error_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def measure(api_url, pages, concurrency, requests_per_minute):
+    scraper = FirecrawlScraper(api_key="fc-stub", api_url=api_url, requests_per_minute=requests_per_minute, backoff_base=0.01)
+    urls = [f"https://example.com/alerts/{i}" for i in range(pages)]
+    start = time.perf_counter()
+    ok = sum(1 for _, page in scraper.scrape_many(urls, max_workers=concurrency) if page is not None)
+    elapsed = time.perf_counter() - start
+    # Only pages that were actually scraped count: failures return immediately and would inflate the rate.
+    return {"concurrency": concurrency, "pages": pages, "ok": ok, "seconds": round(elapsed, 3), "pages_per_sec": round(ok / elapsed, 2)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated Firecrawl latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--requests-per-minute", type=float, default=60000, help="Token bucket quota used by the scraper.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, api_url = start_stub_server(args.latency, args.error_rate)
+    failed = False
+    try:
+        for level in args.concurrency:
+            result = measure(api_url, args.pages, level, args.requests_per_minute)
+            print(json.dumps(result))
+            failed = failed or result["ok"] == 0
+    finally:
+        server.shutdown()
+    if failed:
+        print("No page was scraped successfully; the throughput figures are not meaningful.", file=sys.stderr)
+        sys.exit(1)
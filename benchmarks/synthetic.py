@@ -0,0 +1,110 @@
+"""
+Deterministic synthetic data for the benchmarks: Firecrawl pages of alerts, raw alerts as
+returned by the source parsers, and pharmacist actions.
+
+Everything is derived from a seed and an index, so the same call always returns the same
+data and a single item can be generated without generating the ones before it.
+"""
+import random
+from datetime import date, timedelta
+
+from src.database.storage import SURGERIES
+
+SOURCE_NAMES = ["GOV.UK Drug Safety Update", "MHRA Drug Alerts", "NICE Safety Notices", "NHS England Patient Safety"]
+SEVERITIES = ["High", "Medium", "Low"]
+DRUGS = [
+    "Sodium valproate", "Isotretinoin", "Montelukast", "Topiramate", "Finasteride", "Metformin",
+    "Levothyroxine", "Methotrexate", "Warfarin", "Apixaban", "Semaglutide", "Pregabalin",
+    "Gabapentin", "Codeine", "Tramadol", "Modafinil", "Hydroxychloroquine", "Carbimazole",
+    "Clozapine", "Lamotrigine", "Mycophenolate mofetil", "Denosumab", "Tofacitinib", "Ciprofloxacin",
+]
+RISKS = [
+    "risk of serious harm in pregnancy", "neuropsychiatric reactions", "tendon damage",
+    "dosing errors", "increased risk of fractures", "hypoglycaemia", "serious skin reactions",
+    "risk of dependence", "supply disruption", "new contraindications", "cardiovascular events",
+]
+ADVICE = [
+    "Review patients at their next routine appointment.",
+    "Do not start treatment without specialist advice.",
+    "Report suspected adverse reactions via the Yellow Card scheme.",
+    "Counsel patients on the warning signs.",
+    "Check renal function before prescribing.",
+    "Consider alternative treatments where appropriate.",
+    "Ensure a pregnancy prevention programme is in place.",
+]
+FIRST_DATE = date(2015, 1, 1)
+LIST_PAGE_SIZE = 20
+
+
+def _rng(seed: int, index: int) -> random.Random:
+    return random.Random(seed * 1_000_003 + index)
+
+
+def alert_slug(index: int) -> str:
+    return f"synthetic-alert-{index:07d}"
+
+
+def raw_alert(index: int, seed: int = 0) -> dict:
+    """One raw alert dict, shaped like the output of the source parsers."""
+    rng = _rng(seed, index)
+    drugs = rng.sample(DRUGS, rng.randint(1, 3))
+    risk = rng.choice(RISKS)
+    published = FIRST_DATE + timedelta(days=rng.randint(0, 3650))
+    source_name = SOURCE_NAMES[index % len(SOURCE_NAMES)]
+    return {
+        "alert_id": f"SYN-{index:07d}",
+        "title": f"{drugs[0]}: {risk}",
+        "date_published": published.isoformat() if rng.random() > 0.02 else None,
+        "severity": rng.choice(SEVERITIES),
+        "summary": f"{', '.join(drugs)} {'is' if len(drugs) == 1 else 'are'} associated with {risk}. "
+                   + " ".join(rng.sample(ADVICE, 2)),
+        "affected_products": drugs,
+        "recommendations": rng.sample(ADVICE, rng.randint(1, 4)),
+        "source_url": f"https://example.org/{source_name.lower().replace(' ', '-')}/{alert_slug(index)}",
+        "source_name": source_name,
+        "content": "\n".join(rng.sample(ADVICE, 3)) * rng.randint(1, 5),
+    }
+
+
+def raw_alerts(count: int, seed: int = 0) -> list:
+    return [raw_alert(i, seed) for i in range(count)]
+
+
+def alert_page(index: int, base_url: str, seed: int = 0) -> dict:
+    """A Firecrawl scrape result for one alert page of a source at base_url."""
+    alert = raw_alert(index, seed)
+    published = date.fromisoformat(alert["date_published"]) if alert["date_published"] else None
+    advice = "\n".join(f"- {item}" for item in alert["recommendations"])
+    markdown = (
+        f"# {alert['title']}\n\n"
+        + (f"Published: {published.day} {published.strftime('%B %Y')}\n\n" if published else "")
+        + f"{alert['summary']}\n\n## Advice for healthcare professionals\n\n{advice}\n\n"
+        + f"## Background\n\n{alert['content']}\n"
+    )
+    url = f"{base_url}/{alert_slug(index)}"
+    return {
+        "markdown": markdown,
+        "metadata": {"title": alert["title"], "description": alert["summary"], "sourceURL": url, "statusCode": 200},
+    }
+
+
+def list_page(page: int, total: int, base_url: str) -> dict:
+    """A Firecrawl scrape result for page `page` (1-based) of an alert list, newest alert first."""
+    newest = total - 1 - (page - 1) * LIST_PAGE_SIZE
+    indexes = range(newest, max(newest - LIST_PAGE_SIZE, -1), -1)
+    links = "\n".join(f"- [Alert {i}]({base_url}/{alert_slug(i)})" for i in indexes)
+    return {"markdown": f"# Alerts\n\n{links}\n", "metadata": {"sourceURL": f"{base_url}?page={page}", "statusCode": 200}}
+
+
+def pharmacist_actions(alert_ids: list, per_alert: float = 0.5, seed: int = 0) -> list:
+    """Pharmacist actions for a share of the given alerts (about `per_alert` actions per alert)."""
+    rng = random.Random(seed)
+    actions = []
+    for alert_id in alert_ids:
+        for _ in range(int(per_alert) + (rng.random() < per_alert % 1)):
+            actions.append({
+                "alert_id": alert_id,
+                "action_taken": rng.choice(ADVICE),
+                **{surgery: rng.randint(0, 30) for surgery in SURGERIES},
+            })
+    return actions
@@ -1,7 +1,19 @@
+import argparse
+import signal
 import subprocess
 import sys
 import os
 
+# Modules each entry point imports before it does any work. The cli path must stay cheap:
+# pandas, numpy, supabase and firecrawl are only loaded once a job actually uses them.
+ENTRY_POINT_MODULES = {
+    "cli": ["src.pipeline.scheduler", "src.pipeline.ingest", "src.database.storage", "src.database.sqlite_manager",
+            "src.database.db_manager", "src.scraper.firecrawl_scraper", "src.processor.dedup_index"],
+    "app": ["src.streamlit_app.app"],
+}
+# Cold-start import budget of the cli path, checked by `python main.py imports --check`.
+DEFAULT_IMPORT_BUDGET_MS = 200
+
 def run_streamlit_app():
     """Runs the Streamlit application."""
     app_path = os.path.join(os.path.dirname(__file__), "src", "streamlit_app", "app.py")
@@ -20,6 +32,129 @@ def run_streamlit_app():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def build_scheduler(args):
+    """The ingest scheduler for the selected sources (default: all registered sources)."""
+    from src.pipeline.scheduler import IngestScheduler, build_ingest_job
+    from src.scraper.sources import MEDICAL_ALERT_SOURCES, get_source
+
+    try:
+        sources = [get_source(name) for name in args.source] if args.source else MEDICAL_ALERT_SOURCES
+        run_job = build_ingest_job(parser_workers=args.parser_workers, max_workers=args.scrape_workers)
+    except (KeyError, ValueError) as e:
+        # Unknown source name, or missing Supabase/Firecrawl credentials.
+        print(f"Error: {e}")
+        sys.exit(1)
+    return IngestScheduler(run_job, sources, max_concurrent_jobs=args.max_jobs)
+
+def run_ingest_once(args):
+    """Ingests every selected source once and exits; exit status 1 if any run failed."""
+    records = build_scheduler(args).run_once()
+    if any(record["status"] != "ok" for record in records):
+        sys.exit(1)
+
+def run_worker(args):
+    """Runs the ingest scheduler until interrupted (Ctrl+C or SIGTERM)."""
+    scheduler = build_scheduler(args)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    print("Ingest worker started. Press Ctrl+C to stop.")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("Stopping ingest worker after the running jobs finish...")
+        scheduler.stop()
+
+def run_export(args):
+    """Exports the alerts and pharmacist actions written since the last export to partitioned Parquet/Arrow files."""
+    try:
+        from src.database.export import export_tables
+    except ImportError as e:
+        print(f"Error: the export needs pyarrow ({e}). Install it with: pip install pyarrow")
+        sys.exit(1)
+    from src.database.storage import create_db_manager
+
+    try:
+        db_manager = create_db_manager()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    stats = export_tables(db_manager, export_dir=args.export_dir, export_format=args.format, full=args.full)
+    for table, table_stats in stats.items():
+        print(f"{table}: {table_stats['rows']} changed rows exported, {table_stats['partitions']} partition(s) rewritten.")
+
+def import_time_report(modules: list, top: int = 10) -> tuple[float, list]:
+    """
+    Imports the modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: Total import time in ms (interpreter start-up imports included), and the `top`
+               packages that took longest as (package, ms) pairs, submodules counted in their package.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    by_package = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # Our own modules are listed one by one (src.database.storage), others by top-level package.
+        package = name if name.startswith("src.") else name.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+    slowest = sorted(by_package.items(), key=lambda item: -item[1])
+    return sum(by_package.values()), slowest[:top]
+
+def run_import_report(args):
+    """Prints the import-time breakdown of each entry point; with --check, exits 1 if the cli path is over budget."""
+    over_budget = False
+    for entry_point, modules in ENTRY_POINT_MODULES.items():
+        try:
+            total_ms, slowest = import_time_report(modules, top=args.top)
+        except RuntimeError as e:
+            print(f"{entry_point}: import failed: {e}")
+            over_budget = True
+            continue
+        budget = f" (budget {args.budget_ms:.0f} ms)" if entry_point == "cli" else ""
+        print(f"{entry_point}: {total_ms:.1f} ms{budget}")
+        for name, ms in slowest:
+            print(f"  {ms:8.1f} ms  {name}")
+        over_budget = over_budget or (entry_point == "cli" and total_ms > args.budget_ms)
+    if args.check and over_budget:
+        print("Import time of the cli path is over budget.")
+        sys.exit(1)
+
 if __name__ == "__main__":
-    print("Starting AlertRx application...")
-    run_streamlit_app()
+    parser = argparse.ArgumentParser(description="AlertRx: run the dashboard, a one-off ingest or the ingest worker.")
+    parser.add_argument("mode", nargs="?", choices=["app", "ingest", "worker", "export", "imports"], default="app",
+                        help="app (default): the Streamlit dashboard; ingest: ingest every source once; "
+                             "worker: ingest each source on its schedule until stopped; "
+                             "export: update the Parquet/Arrow analytics export; "
+                             "imports: report the import time of each entry point.")
+    parser.add_argument("--source", action="append", help="Only ingest this source (by name); may be repeated.")
+    parser.add_argument("--max-jobs", type=int, default=2, help="Sources ingested at the same time.")
+    parser.add_argument("--scrape-workers", type=int, default=4, help="Concurrent Firecrawl requests per source.")
+    parser.add_argument("--parser-workers", type=int, default=0,
+                        help="Parse pages in this many worker processes (0 parses in-process).")
+    parser.add_argument("--export-dir", help="export: output directory (default: ALERTRX_EXPORT_DIR or data/export).")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet",
+                        help="export: Parquet (compressed) or Arrow IPC (uncompressed, memory-mapped without decoding).")
+    parser.add_argument("--full", action="store_true", help="export: discard the existing export and export everything.")
+    parser.add_argument("--top", type=int, default=10, help="imports: number of slowest imports listed.")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("ALERTRX_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)),
+                        help="imports: cold-start import budget of the cli path.")
+    parser.add_argument("--check", action="store_true", help="imports: exit with status 1 if over budget.")
+    args = parser.parse_args()
+
+    if args.mode == "ingest":
+        run_ingest_once(args)
+    elif args.mode == "worker":
+        run_worker(args)
+    elif args.mode == "export":
+        run_export(args)
+    elif args.mode == "imports":
+        run_import_report(args)
+    else:
+        print("Starting AlertRx application...")
+        run_streamlit_app()
@@ -0,0 +1,206 @@
+"""
+Durable local outbox for pharmacist action submissions.
+
+The dashboard does not write actions to the database while the pharmacist waits. submit()
+appends the action to a small SQLite queue next to the app data (ALERTRX_ACTION_OUTBOX_PATH,
+default data/action_outbox.db) and returns as soon as it is on disk. A background thread
+sends queued actions to the storage backend in batches with insert_pharmacist_actions and
+deletes them once the backend has accepted them.
+
+Every action gets a 'submission_id' idempotency key when it is queued. If a batch reaches
+the database but the response is lost, the retry skips the actions already stored instead
+of recording them twice. A failed batch is split to find the actions the backend rejects,
+so one bad action cannot hold back the rest of the queue, and failed actions are retried
+with exponential backoff. Nothing is dropped: an action stays queued (and is reported by
+stats()) until it is written.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_OUTBOX_PATH = os.path.join("data", "action_outbox.db")
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 300.0
+
+OUTBOX_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS action_outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id TEXT NOT NULL UNIQUE,
+    alert_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_action_outbox_next_attempt ON action_outbox (next_attempt_at, seq);
+"""
+
+
+class ActionOutbox:
+    """
+    Queue of pharmacist actions waiting to be written to `db_manager`.
+
+    Args:
+        db_manager: The storage backend (or CachedDBManager) the actions are written to.
+        path (str): SQLite file of the queue; ":memory:" keeps it in memory (not durable).
+        batch_size (int): Maximum number of actions per insert_pharmacist_actions call.
+        flush_interval (float): Seconds between checks for due actions when the queue is idle.
+        max_backoff (float): Upper bound, in seconds, of the delay before retrying a failed action.
+    """
+
+    def __init__(self, db_manager, path: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS, max_backoff: float = DEFAULT_MAX_BACKOFF_SECONDS):
+        self.db_manager = db_manager
+        self.path = path or os.getenv("ALERTRX_ACTION_OUTBOX_PATH", DEFAULT_OUTBOX_PATH)
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Every submit is fsynced: an action acknowledged to the pharmacist survives a crash.
+        self.conn.execute("PRAGMA synchronous=FULL")
+        with self.conn:
+            self.conn.executescript(OUTBOX_SCHEMA_SQL)
+
+    def submit(self, action_data: dict) -> str:
+        """
+        Queues an action and returns its submission_id. The timestamp defaults to the time of
+        submission (UTC), not the time the action reaches the database.
+        """
+        action = dict(action_data)
+        action.setdefault("submission_id", uuid.uuid4().hex)
+        action.setdefault("timestamp", datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+        with self._lock, self.conn:
+            # Re-submitting the same submission_id (e.g. a retried request) queues it only once.
+            self.conn.execute(
+                "INSERT OR IGNORE INTO action_outbox (submission_id, alert_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                (action["submission_id"], action["alert_id"], json.dumps(action, default=str), time.time()),
+            )
+        self._wake.set()
+        return action["submission_id"]
+
+    def pending(self, alert_id: str = None) -> list:
+        """Returns the queued actions (of one alert, or all), oldest first."""
+        sql = "SELECT payload FROM action_outbox"
+        params = ()
+        if alert_id is not None:
+            sql += " WHERE alert_id = ?"
+            params = (alert_id,)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY seq", params).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def stats(self) -> dict:
+        """Queue length, how many queued actions have failed at least once, the oldest one's age and the last error."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS pending, SUM(attempts > 0) AS failing, MIN(created_at) AS oldest FROM action_outbox"
+            ).fetchone()
+            last_error = self.conn.execute(
+                "SELECT last_error FROM action_outbox WHERE last_error IS NOT NULL ORDER BY seq LIMIT 1"
+            ).fetchone()
+        return {
+            "pending": row["pending"],
+            "failing": row["failing"] or 0,
+            "oldest_seconds": round(time.time() - row["oldest"], 1) if row["oldest"] else 0.0,
+            "last_error": last_error["last_error"] if last_error else None,
+        }
+
+    def _backoff(self, attempts: int) -> float:
+        # Exponential backoff with jitter, so several app processes do not retry in lockstep.
+        return min(self.max_backoff, 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+    def _mark_failed(self, rows: list):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE action_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                [(now + self._backoff(row["attempts"] + 1), "The database did not accept the action.", row["seq"])
+                 for row in rows],
+            )
+
+    def _send(self, rows: list) -> int:
+        """
+        Writes rows to the backend and removes them from the queue. If the batch fails, both
+        halves are retried on their own, recursively, which narrows the failure down to the
+        actions the backend rejects: only those back off, however many there are and wherever
+        they are in the batch. While the backend is down every action fails and backs off, at
+        the cost of about two requests per queued action. Returns the number written.
+        """
+        result = self.db_manager.insert_pharmacist_actions([json.loads(row["payload"]) for row in rows])
+        if result is not None:
+            seqs = [row["seq"] for row in rows]
+            with self._lock, self.conn:
+                self.conn.execute(f"DELETE FROM action_outbox WHERE seq IN ({', '.join('?' for _ in seqs)})", seqs)
+            return len(rows)
+        if len(rows) == 1:
+            self._mark_failed(rows)
+            return 0
+        half = len(rows) // 2
+        return self._send(rows[:half]) + self._send(rows[half:])
+
+    def flush_once(self) -> int:
+        """
+        Sends one batch of due actions to the backend. Returns the number of actions written
+        (0 if nothing was due or the backend failed; failed actions are scheduled for a retry).
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT seq, payload, attempts FROM action_outbox WHERE next_attempt_at <= ? ORDER BY seq LIMIT ?",
+                    (time.time(), self.batch_size),
+                ).fetchall()
+            if not rows:
+                return 0
+            return self._send(rows)
+
+    def flush(self) -> int:
+        """Sends every due action, batch by batch, until the queue is empty or a batch fails."""
+        written = 0
+        while True:
+            count = self.flush_once()
+            if not count:
+                return written
+            written += count
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()  # before flushing, so a submit made during the flush is not missed
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing the action outbox: {e}")
+            self._wake.wait(self.flush_interval)
+
+    def start(self):
+        """Starts the background flusher thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="action-outbox-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True):
+        """Stops the flusher thread, by default after a last attempt to send what is queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
@@ -0,0 +1,67 @@
+"""
+Content-addressed storage of the raw Firecrawl payloads of alerts.
+
+The raw payload is only needed for debugging, but it is by far the largest value of an alert
+row. The backends therefore keep it out of the 'alerts' table: each payload is stored once,
+compressed, in the 'alert_blobs' table under the SHA-256 of its JSON text, and the alert row
+only keeps that hash in 'raw_data_hash'. Alerts with identical payloads (a page re-scraped
+without changes, the same bulletin listed twice) share one blob. The payload is loaded with
+get_raw_data() when someone opens it in the dashboard.
+
+Existing 'raw_data' values are moved out by `python -m src.database.migrations raw-data-blobs`.
+"""
+import zlib
+import hashlib
+
+from src.database.codec import dumps, loads
+
+BLOB_ENCODING = "zlib+json"
+COMPRESSION_LEVEL = 6
+
+# raw_data values that hold no payload and get no blob.
+_EMPTY_PAYLOADS = (None, "", "{}", "null")
+
+
+def content_hash(text: str) -> str:
+    """Hex SHA-256 of a payload's JSON text, the key of its blob."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_payload(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_payload(data: bytes, encoding: str = BLOB_ENCODING) -> dict:
+    """Decodes a stored blob back into the payload dict."""
+    if encoding != BLOB_ENCODING:
+        raise ValueError(f"Unknown blob encoding '{encoding}'.")
+    return loads(zlib.decompress(data))
+
+
+def split_raw_data(rows: list) -> dict:
+    """
+    Moves the raw_data of encoded alert rows into blobs, in place: each row gets the
+    'raw_data_hash' of its payload and a NULL 'raw_data'. Rows without a 'raw_data' key are
+    left alone.
+
+    Returns:
+        dict: The blob rows to store ('content_hash', 'encoding', 'size' of the uncompressed
+              JSON in bytes, and the compressed 'data'), keyed by hash; one per distinct payload.
+    """
+    blobs = {}
+    for row in rows:
+        if 'raw_data' not in row:
+            continue
+        text = row['raw_data']
+        if not isinstance(text, str) and text is not None:
+            text = dumps(text)  # JSONB mode sends the dict itself
+        row['raw_data'] = None
+        if text in _EMPTY_PAYLOADS:
+            row['raw_data_hash'] = None
+            continue
+        key = content_hash(text)
+        row['raw_data_hash'] = key
+        if key not in blobs:
+            blobs[key] = {"content_hash": key, "encoding": BLOB_ENCODING,
+                          "size": len(text.encode("utf-8")), "data": compress_payload(text)}
+    return blobs
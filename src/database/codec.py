@@ -0,0 +1,195 @@
+"""
+Encoding of alert rows between pandas/Python values and what is stored in the database.
+
+List and dict columns are stored as JSON. Decoding works on whole columns: the JSON strings
+of a column are joined into one JSON array and parsed in a single call, so loading a table
+does not run a Python function per cell. Rows written by the old `str()` encoding are still
+readable (they fall back to `ast.literal_eval`) until `src.database.migrations` rewrites them.
+
+If `orjson` is installed it is used for both directions; otherwise the standard library `json`.
+"""
+from __future__ import annotations
+
+import os
+import ast
+import json
+
+from src.lazy_imports import lazy_import
+from src.observability.metrics import instrument
+
+pd = lazy_import("pandas")
+
+try:
+    import orjson
+except ImportError:  # optional faster backend
+    orjson = None
+
+ALERT_LIST_COLUMNS = ('affected_products', 'recommendations')
+ALERT_DICT_COLUMNS = ('raw_data',)
+ALERT_JSON_COLUMNS = ALERT_LIST_COLUMNS + ALERT_DICT_COLUMNS
+
+# Set ALERTRX_JSONB_COLUMNS=1 when the alert JSON columns are JSONB rather than TEXT: values are
+# then sent as native lists/dicts instead of JSON strings.
+JSONB_COLUMNS = os.getenv("ALERTRX_JSONB_COLUMNS", "").lower() in ("1", "true", "yes")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(value) -> str:
+        """Serializes a value to a JSON string."""
+        return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(text):
+        """Parses a JSON string."""
+        return orjson.loads(text)
+
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    def dumps(value) -> str:
+        """Serializes a value to a JSON string."""
+        return json.dumps(value, default=str, separators=(",", ":"))
+
+    def loads(text):
+        """Parses a JSON string."""
+        return json.loads(text)
+
+    JSONDecodeError = json.JSONDecodeError
+
+
+def default_for_column(column: str):
+    return {} if column in ALERT_DICT_COLUMNS else []
+
+
+def is_json(text) -> bool:
+    """True if a stored value is already valid JSON (i.e. not a legacy str() repr)."""
+    if not isinstance(text, str):
+        return True
+    try:
+        loads(text)
+        return True
+    except (JSONDecodeError, ValueError):
+        return False
+
+
+def decode_value(value, default=None):
+    """Decodes one stored JSON value, accepting legacy str() reprs and already-decoded JSONB values."""
+    if not isinstance(value, str):
+        return default if value is None else value
+    if not value:
+        return default
+    try:
+        return loads(value)
+    except (JSONDecodeError, ValueError):
+        pass
+    try:
+        return ast.literal_eval(value)  # legacy str() encoding; never eval()
+    except (ValueError, SyntaxError):
+        return default
+
+
+def encode_value(value):
+    """Encodes a list/dict for storage in a JSON column."""
+    return value if JSONB_COLUMNS else dumps(value)
+
+
+def is_missing(value) -> bool:
+    """True for None, NaN, NaT and pd.NA (never for a list or dict)."""
+    return value is None or (pd.api.types.is_scalar(value) and pd.isna(value))
+
+
+def encode_column_value(column: str, value):
+    """Encodes one value of a JSON column; a missing value is stored as the column's empty default."""
+    return encode_value(default_for_column(column) if is_missing(value) else value)
+
+
+def encode_date(value):
+    """Formats one date as an ISO string, keeping its timezone and microseconds; None if missing or invalid."""
+    if is_missing(value):
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(timestamp) else timestamp.isoformat()
+
+
+def decode_json_column(series: pd.Series, default=None) -> pd.Series:
+    """
+    Decodes a whole column of stored JSON values in one batched parse.
+    Falls back to per-value decoding only if the column contains legacy or malformed values.
+    """
+    values = series.tolist()
+    if not values:
+        return series
+    if all(isinstance(v, str) and v for v in values):
+        try:
+            decoded = loads("[" + ",".join(values) + "]")
+            if len(decoded) == len(values):
+                return pd.Series(decoded, index=series.index, name=series.name, dtype=object)
+        except (JSONDecodeError, ValueError):
+            pass
+    decoded = [decode_value(v) for v in values]
+    if default is not None:
+        # A fresh empty container per row, so rows never share a mutable default.
+        decoded = [type(default)() if v is None else v for v in decoded]
+    return pd.Series(decoded, index=series.index, name=series.name, dtype=object)
+
+
+def decode_dates(series: pd.Series) -> pd.Series:
+    """
+    Parses a column of ISO date strings in one vectorized pass. Strings with and without
+    microseconds or a UTC offset may be mixed; dates with an offset come back as naive UTC.
+    """
+    return pd.to_datetime(series, errors='coerce', format='ISO8601', utc=True).dt.tz_localize(None)
+
+
+def encode_dates(series: pd.Series) -> pd.Series:
+    """Formats a date column as ISO strings (see encode_date), with None for missing dates."""
+    return pd.Series([encode_date(value) for value in series.tolist()], index=series.index, name=series.name,
+                     dtype=object)
+
+
+def encode_alert_record(alert_data: dict) -> dict:
+    """Converts lists, dicts and datetimes in a normalized alert into storable values; NaN becomes None."""
+    data_to_insert = {key: None if is_missing(value) else value for key, value in alert_data.items()}
+    for col in ALERT_JSON_COLUMNS:
+        data_to_insert[col] = encode_column_value(col, data_to_insert.get(col))
+    data_to_insert['date_published'] = encode_date(data_to_insert.get('date_published'))
+    return data_to_insert
+
+
+@instrument("codec.encode_alert_frame")
+def encode_alert_frame(df: pd.DataFrame) -> list:
+    """
+    Column-wise equivalent of encode_alert_record for a DataFrame; returns the upsert payload
+    rows. Both use the same value encoders, so a row is stored identically either way.
+    """
+    encoded = df.astype(object)
+    encoded = encoded.where(encoded.notna(), None)
+    for col in ALERT_JSON_COLUMNS:
+        if col in encoded.columns:
+            encoded[col] = [encode_column_value(col, v) for v in encoded[col].tolist()]
+    if 'date_published' in encoded.columns:
+        encoded['date_published'] = encode_dates(encoded['date_published'])
+    return encoded.to_dict('records')
+
+
+def decode_alert_record(alert_data: dict) -> dict:
+    """Converts a stored alert row back to Python types."""
+    if alert_data.get('date_published'):
+        alert_data['date_published'] = decode_dates(pd.Series([alert_data['date_published']])).iloc[0]
+    for col in ALERT_JSON_COLUMNS:
+        if alert_data.get(col):
+            alert_data[col] = decode_value(alert_data[col], default_for_column(col))
+    return alert_data
+
+
+@instrument("codec.decode_alert_frame")
+def decode_alert_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the columns of a stored alerts table back to Python types, one batched pass per column."""
+    if 'date_published' in df.columns:
+        df['date_published'] = decode_dates(df['date_published'])
+    for col in ALERT_JSON_COLUMNS:
+        if col in df.columns:
+            df[col] = decode_json_column(df[col], default_for_column(col))
+    return df
@@ -1,14 +1,50 @@
+from __future__ import annotations
+
 import os
-from supabase import create_client, Client
-import pandas as pd
+import base64
+from typing import TYPE_CHECKING
 from datetime import datetime
 
-class DBManager:
-    def __init__(self):
+from src.lazy_imports import lazy_import
+from src.database.codec import encode_alert_record, decode_alert_record, decode_alert_frame, decode_value
+from src.database.blob_store import split_raw_data, decompress_payload
+from src.database.storage import (StorageBackend, ALERT_DETAIL_COLUMNS, ACTION_SUMMARY_COLUMNS, DEFAULT_PAGE_SIZE,
+                                  DEFAULT_SYNC_PAGE_SIZE, SYNC_TABLE_KEYS, SURGERIES, id_batches)
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+pd = lazy_import("pandas")
+
+def _quote_filter_value(value) -> str:
+    """Quotes a value for use inside a PostgREST or=(...) filter."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _keyset_filter(cursor: dict) -> str:
+    """
+    PostgREST filter selecting rows after `cursor` in (date_published DESC NULLS LAST, alert_id DESC) order.
+    """
+    alert_id = _quote_filter_value(cursor['alert_id'])
+    if cursor.get('date_published') is None:
+        return f"and(date_published.is.null,alert_id.lt.{alert_id})"
+    published = _quote_filter_value(cursor['date_published'])
+    return (f"date_published.lt.{published},"
+            f"and(date_published.eq.{published},alert_id.lt.{alert_id}),"
+            f"date_published.is.null")
+
+class DBManager(StorageBackend):
+    """Supabase storage backend."""
+
+    def __init__(self, client: Client = None):
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_KEY")
+        if client is not None:
+            # A ready-made client, e.g. the in-memory fake used by the benchmarks.
+            self.client = client
+            return
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL and Key must be set as environment variables (SUPABASE_URL, SUPABASE_KEY).")
+        from supabase import create_client  # imported here: the client library is slow to import
         self.client: Client = create_client(self.supabase_url, self.supabase_key)
         print("Supabase client initialized.")
 
@@ -28,11 +64,23 @@ class DBManager:
         print("     - date_published (TEXT) -- ISO format string")
         print("     - severity (TEXT)")
         print("     - summary (TEXT)")
-        print("     - affected_products (TEXT) -- JSON string of a list")
-        print("     - recommendations (TEXT) -- JSON string of a list")
+        print("     - affected_products (TEXT or JSONB) -- JSON list")
+        print("     - recommendations (TEXT or JSONB) -- JSON list")
         print("     - source_url (TEXT)")
         print("     - source_name (TEXT)")
-        print("     - raw_data (TEXT) -- JSON string of a dict")
+        print("     - raw_data (TEXT or JSONB) -- legacy inline payload, NULL once moved to 'alert_blobs'")
+        print("     - canonical_alert_id (TEXT) -- alert this one near-duplicates, NULL if none")
+        print("     - raw_data_hash (TEXT) -- key of the raw Firecrawl payload in 'alert_blobs'")
+        print("     - updated_at (TIMESTAMPTZ, NOT NULL, DEFAULT NOW()) -- set by a trigger on every write, see 4.")
+        print("   If you use JSONB for the JSON columns, set ALERTRX_JSONB_COLUMNS=1.")
+        print("   Tables written by older versions (Python repr strings) can be converted with:")
+        print("     python -m src.database.migrations json-encoding")
+        print("   Tables created before near-duplicate detection need the extra column:")
+        print("     ALTER TABLE alerts ADD COLUMN canonical_alert_id TEXT;")
+        print("   Tables created before the blob store need the extra column (and the 'alert_blobs' table below);")
+        print("   their inline raw_data is then moved out with:")
+        print("     ALTER TABLE alerts ADD COLUMN raw_data_hash TEXT;")
+        print("     python -m src.database.migrations raw-data-blobs")
         print("   Example SQL (run in Supabase SQL Editor):")
         print("""
         CREATE TABLE alerts (
@@ -45,25 +93,45 @@ class DBManager:
             recommendations TEXT,
             source_url TEXT,
             source_name TEXT,
-            raw_data TEXT
+            raw_data TEXT,
+            canonical_alert_id TEXT,
+            raw_data_hash TEXT,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """)
+
+        print("\n1b. Table: 'alert_blobs' (raw payloads, zlib-compressed, base64 text, keyed by SHA-256)")
+        print("   Example SQL (run in Supabase SQL Editor):")
+        print("""
+        CREATE TABLE alert_blobs (
+            content_hash TEXT PRIMARY KEY,
+            encoding TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data TEXT NOT NULL
         );
         """)
 
+        print("\n1c. View: 'alert_sources' (distinct source names, for the dashboard's source filter)")
+        print("   Example SQL (run in Supabase SQL Editor):")
+        print("""
+        CREATE INDEX IF NOT EXISTS idx_alerts_source_name ON alerts (source_name);
+        CREATE OR REPLACE VIEW alert_sources AS
+            SELECT DISTINCT source_name FROM alerts WHERE source_name IS NOT NULL AND source_name <> '';
+        """)
+
         print("\n2. Table: 'pharmacist_actions'")
-        surgeries = [
-            "Scarsdale-Medical-Centre", "Earls-Court-Surgery", "Stanhope-Mews-Surgery",
-            "The-Chelsea-Practice", "Health-Partners-at-Violet-Melchett",
-            "Emperors-Gate-Health-Centre", "Knightsbridge-Medical-Centre",
-            "Earls-Court-Medical-Centre", "The-Abingdon-Medical-Practice",
-            "The-Good-Practice", "Royal-Hospital-Chelsea", "Kensington-Park-Medical-Centre"
-        ]
+        surgeries = SURGERIES
         surgery_columns_sql = ",\n".join([f'     - "{s}" INTEGER DEFAULT 0' for s in surgeries])
         print("   Columns:")
         print("     - action_id (SERIAL, PRIMARY KEY)")
         print("     - alert_id (TEXT, NOT NULL)")
         print("     - action_taken (TEXT)")
         print("     - timestamp (TIMESTAMPTZ, DEFAULT NOW())")
+        print("     - submission_id (TEXT, UNIQUE) -- idempotency key set by the dashboard's action outbox")
+        print("     - updated_at (TIMESTAMPTZ, NOT NULL, DEFAULT NOW()) -- set by a trigger on every write, see 4.")
         print(surgery_columns_sql)
+        print("   Tables created before the action outbox need the extra column:")
+        print("     ALTER TABLE pharmacist_actions ADD COLUMN submission_id TEXT UNIQUE;")
         print("   Example SQL (run in Supabase SQL Editor):")
         print(f"""
         CREATE TABLE pharmacist_actions (
@@ -71,20 +139,80 @@ class DBManager:
             alert_id TEXT NOT NULL REFERENCES alerts(alert_id),
             action_taken TEXT,
             timestamp TIMESTAMPTZ DEFAULT NOW(),
+            submission_id TEXT UNIQUE,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
             {", ".join([f'"{s}" INTEGER DEFAULT 0' for s in surgeries])}
         );
         """)
+
+        print("\n3. Table: 'alert_action_summary' (per-alert action totals, kept up to date by a trigger)")
+        print("   Example SQL (run in Supabase SQL Editor; the final INSERT back-fills existing actions):")
+        quoted = ", ".join(f'"{s}"' for s in surgeries)
+        print(f"""
+        CREATE TABLE alert_action_summary (
+            alert_id TEXT PRIMARY KEY REFERENCES alerts(alert_id),
+            action_count INTEGER NOT NULL DEFAULT 0,
+            last_action_at TIMESTAMPTZ,
+            {", ".join([f'"{s}" INTEGER DEFAULT 0' for s in surgeries])}
+        );
+
+        CREATE OR REPLACE FUNCTION update_alert_action_summary() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO alert_action_summary (alert_id, action_count, last_action_at, {quoted})
+            VALUES (NEW.alert_id, 1, NEW.timestamp, {", ".join(f'COALESCE(NEW."{s}", 0)' for s in surgeries)})
+            ON CONFLICT (alert_id) DO UPDATE SET
+                action_count = alert_action_summary.action_count + 1,
+                last_action_at = GREATEST(alert_action_summary.last_action_at, EXCLUDED.last_action_at),
+                {", ".join(f'"{s}" = alert_action_summary."{s}" + EXCLUDED."{s}"' for s in surgeries)};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER pharmacist_actions_summary AFTER INSERT ON pharmacist_actions
+            FOR EACH ROW EXECUTE FUNCTION update_alert_action_summary();
+
+        INSERT INTO alert_action_summary (alert_id, action_count, last_action_at, {quoted})
+        SELECT alert_id, COUNT(*), MAX(timestamp), {", ".join(f'SUM(COALESCE("{s}", 0))' for s in surgeries)}
+        FROM pharmacist_actions GROUP BY alert_id
+        ON CONFLICT (alert_id) DO NOTHING;
+        """)
+
+        print("\n4. Delta sync: 'updated_at' versioning of 'alerts' and 'pharmacist_actions'")
+        print("   The trigger stamps every write that changes a row, so clients can fetch only what changed")
+        print("   since their last sync (get_changes). Tables created without the column need the ALTERs.")
+        print("   Example SQL (run in Supabase SQL Editor):")
+        print("""
+        ALTER TABLE alerts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+        ALTER TABLE pharmacist_actions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            -- Re-upserting an unchanged row keeps its version, so it is not synced again.
+            IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+            NEW.updated_at = clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER alerts_updated_at BEFORE INSERT OR UPDATE ON alerts
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+        CREATE TRIGGER pharmacist_actions_updated_at BEFORE INSERT OR UPDATE ON pharmacist_actions
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+        CREATE INDEX IF NOT EXISTS idx_alerts_updated_at ON alerts (updated_at, alert_id);
+        CREATE INDEX IF NOT EXISTS idx_pharmacist_actions_updated_at ON pharmacist_actions (updated_at, action_id);
+        """)
         print("\n--- End of Guide ---")
 
     def insert_alert(self, alert_data: dict):
         """Inserts a single normalized alert into the 'alerts' table in Supabase."""
         try:
             # Convert lists and datetime objects to JSON strings/ISO format for storage
-            data_to_insert = alert_data.copy()
-            data_to_insert['affected_products'] = str(data_to_insert.get('affected_products', []))
-            data_to_insert['recommendations'] = str(data_to_insert.get('recommendations', []))
-            data_to_insert['raw_data'] = str(data_to_insert.get('raw_data', {}))
-            data_to_insert['date_published'] = data_to_insert['date_published'].isoformat() if pd.notna(data_to_insert['date_published']) else None
+            data_to_insert = encode_alert_record(alert_data)
+            # The raw payload goes to 'alert_blobs' first, so the alert never references a missing blob
+            self._upsert_blobs(split_raw_data([data_to_insert]))
 
             # Supabase upsert (insert or update if alert_id exists)
             response = self.client.table('alerts').upsert(data_to_insert, on_conflict='alert_id').execute()
@@ -94,8 +222,27 @@ class DBManager:
             print(f"Error inserting alert '{alert_data.get('title')}': {e}")
             return None
 
+    def _upsert_blobs(self, blobs: dict):
+        """Stores blobs (compressed bytes sent as base64 text); payloads already stored are skipped."""
+        if not blobs:
+            return
+        rows = [{**blob, 'data': base64.b64encode(blob['data']).decode('ascii')} for blob in blobs.values()]
+        self.client.table('alert_blobs').upsert(rows, on_conflict='content_hash', ignore_duplicates=True).execute()
+
+    def _upsert_alert_chunk(self, index: int, rows: list) -> dict:
+        try:
+            self._upsert_blobs(split_raw_data(rows))
+            self.client.table('alerts').upsert(rows, on_conflict='alert_id').execute()
+            return {"chunk": index, "rows": len(rows), "ok": True, "error": None}
+        except Exception as e:
+            return {"chunk": index, "rows": len(rows), "ok": False, "error": str(e),
+                    "alert_ids": [row.get('alert_id') for row in rows]}
+
     def insert_pharmacist_action(self, action_data: dict):
-        """Inserts a pharmacist's action into the 'pharmacist_actions' table in Supabase."""
+        """
+        Inserts a pharmacist's action into the 'pharmacist_actions' table in Supabase.
+        The alert_action_summary row is updated by the table's trigger.
+        """
         try:
             # Prepare data for insertion
             data_to_insert = action_data.copy()
@@ -108,6 +255,19 @@ class DBManager:
             print(f"Error inserting pharmacist action for alert '{action_data.get('alert_id')}': {e}")
             return None
 
+    def insert_pharmacist_actions(self, actions: list) -> list:
+        """
+        Inserts many actions in one request. Actions whose submission_id is already stored are
+        ignored (ON CONFLICT DO NOTHING), so the trigger only counts each action once.
+        """
+        try:
+            response = self.client.table('pharmacist_actions').upsert(
+                actions, on_conflict='submission_id', ignore_duplicates=True).execute()
+            return response.data
+        except Exception as e:
+            print(f"Error inserting {len(actions)} pharmacist actions: {e}")
+            return None
+
     def get_all_alerts(self) -> pd.DataFrame:
         """Retrieves all alerts from the 'alerts' table in Supabase as a pandas DataFrame."""
         try:
@@ -118,21 +278,92 @@ class DBManager:
 
             df = pd.DataFrame(data)
 
-            # Convert relevant columns back from string to their original types
-            if 'date_published' in df.columns:
-                df['date_published'] = pd.to_datetime(df['date_published'], errors='coerce')
-            if 'affected_products' in df.columns:
-                df['affected_products'] = df['affected_products'].apply(eval) # eval to convert string back to list
-            if 'recommendations' in df.columns:
-                df['recommendations'] = df['recommendations'].apply(eval)
-            if 'raw_data' in df.columns:
-                df['raw_data'] = df['raw_data'].apply(eval) # eval to convert string back to dict
-
-            return df
+            # Convert relevant columns back from JSON to their original types (one batched parse per column)
+            return decode_alert_frame(df)
         except Exception as e:
-            print(f"Error retrieving all alerts: {e}")
+            self._read_failed("Error retrieving all alerts", e)
             return pd.DataFrame()
 
+    def query_alerts(self, columns: list = None, severity=None, source_name=None, date_from=None, date_to=None,
+                     after: dict = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     hide_duplicates: bool = False) -> tuple[pd.DataFrame, dict]:
+        """
+        Retrieves one page of alerts, newest first, with filtering done by Supabase.
+
+        Args:
+            columns (list): Columns to fetch (default: all). alert_id and date_published are always included.
+            severity, source_name: A value or list of values to match.
+            date_from, date_to: Inclusive bounds on date_published (a date as date_to covers that whole day).
+            after (dict): The cursor returned with the previous page; None for the first page.
+            page_size (int): Maximum number of alerts to return.
+            hide_duplicates (bool): Leave out near-duplicates (alerts with a canonical_alert_id).
+
+        Returns:
+            tuple[pd.DataFrame, dict]: The page of alerts and the cursor for the next page (None on the last page).
+        """
+        try:
+            if columns:
+                columns = list(dict.fromkeys(['alert_id', 'date_published', *columns]))
+            query = self.client.table('alerts').select(','.join(columns) if columns else '*')
+            for column, value in (('severity', severity), ('source_name', source_name)):
+                if isinstance(value, (list, tuple, set)):
+                    if value:
+                        query = query.in_(column, list(value))
+                elif value:
+                    query = query.eq(column, value)
+            if date_from is not None:
+                query = query.gte('date_published', pd.Timestamp(date_from).isoformat())
+            if date_to is not None:
+                end = pd.Timestamp(date_to)
+                if end == end.normalize():
+                    query = query.lt('date_published', (end + pd.Timedelta(days=1)).isoformat())
+                else:
+                    query = query.lte('date_published', end.isoformat())
+            if hide_duplicates:
+                query = query.is_('canonical_alert_id', 'null')
+            if after:
+                query = query.or_(_keyset_filter(after))
+            # Fetch one extra row to know whether there is a next page.
+            response = (query.order('date_published', desc=True, nullsfirst=False)
+                             .order('alert_id', desc=True)
+                             .limit(page_size + 1)
+                             .execute())
+            rows = response.data or []
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                last = rows[-1]
+                next_cursor = {'date_published': last.get('date_published'), 'alert_id': last['alert_id']}
+            if not rows:
+                return pd.DataFrame(columns=columns or []), None
+            return decode_alert_frame(pd.DataFrame(rows)), next_cursor
+        except Exception as e:
+            self._read_failed("Error querying alerts", e)
+            return pd.DataFrame(), None
+
+    def get_alert_sources(self) -> list:
+        """Returns the distinct source names present in the 'alerts' table, from the 'alert_sources' view."""
+        try:
+            try:
+                response = self.client.table('alert_sources').select('source_name').order('source_name').execute()
+            except Exception as e:
+                # Projects created before the view: scan the column instead (see create_tables_guide, 1c).
+                print(f"Error reading the 'alert_sources' view, scanning alerts.source_name instead: {e}")
+                response = self.client.table('alerts').select('source_name').execute()
+            return sorted({row['source_name'] for row in response.data or [] if row.get('source_name')})
+        except Exception as e:
+            self._read_failed("Error retrieving alert sources", e)
+            return []
+
+    def get_alert(self, alert_id: str, columns: list = None) -> dict:
+        """Retrieves a single alert (all columns unless `columns` is given) as a dict, or {} if not found."""
+        try:
+            response = self.client.table('alerts').select(','.join(columns) if columns else '*').eq('alert_id', alert_id).limit(1).execute()
+            return decode_alert_record(response.data[0]) if response.data else {}
+        except Exception as e:
+            self._read_failed(f"Error retrieving alert '{alert_id}'", e)
+            return {}
+
     def get_alert_with_actions(self, alert_id: str) -> tuple[dict, pd.DataFrame]:
         """
         Retrieves a specific alert and all associated pharmacist actions from Supabase.
@@ -140,19 +371,14 @@ class DBManager:
         """
         try:
             # Get alert data
-            alert_response = self.client.table('alerts').select('*').eq('alert_id', alert_id).limit(1).execute()
+            # The raw payload is left out; it is loaded with get_raw_data when it is opened
+            alert_response = (self.client.table('alerts').select(','.join(ALERT_DETAIL_COLUMNS))
+                              .eq('alert_id', alert_id).limit(1).execute())
             alert_data = alert_response.data[0] if alert_response.data else {}
 
             if alert_data:
-                # Convert back from string to original types
-                if 'date_published' in alert_data and alert_data['date_published']:
-                    alert_data['date_published'] = pd.to_datetime(alert_data['date_published'])
-                if 'affected_products' in alert_data and alert_data['affected_products']:
-                    alert_data['affected_products'] = eval(alert_data['affected_products'])
-                if 'recommendations' in alert_data and alert_data['recommendations']:
-                    alert_data['recommendations'] = eval(alert_data['recommendations'])
-                if 'raw_data' in alert_data and alert_data['raw_data']:
-                    alert_data['raw_data'] = eval(alert_data['raw_data'])
+                # Convert back from JSON to original types
+                alert_data = decode_alert_record(alert_data)
 
             # Get actions data
             actions_response = self.client.table('pharmacist_actions').select('*').eq('alert_id', alert_id).execute()
@@ -164,9 +390,89 @@ class DBManager:
 
             return alert_data, actions_df
         except Exception as e:
-            print(f"Error retrieving alert '{alert_id}' with actions: {e}")
+            self._read_failed(f"Error retrieving alert '{alert_id}' with actions", e)
             return {}, pd.DataFrame()
 
+    def get_raw_data(self, alert_id: str) -> dict:
+        """Loads an alert's raw payload from 'alert_blobs' (or the legacy raw_data column)."""
+        try:
+            response = self.client.table('alerts').select('raw_data,raw_data_hash').eq('alert_id', alert_id).limit(1).execute()
+            if not response.data:
+                return {}
+            alert = response.data[0]
+            if alert.get('raw_data_hash'):
+                blob_response = (self.client.table('alert_blobs').select('encoding,data')
+                                 .eq('content_hash', alert['raw_data_hash']).limit(1).execute())
+                if blob_response.data:
+                    blob = blob_response.data[0]
+                    return decompress_payload(base64.b64decode(blob['data']), blob['encoding'])
+            return decode_value(alert.get('raw_data'), {})
+        except Exception as e:
+            self._read_failed(f"Error retrieving the raw data of alert '{alert_id}'", e)
+            return {}
+
+    def get_changes(self, table: str, since=None, after: dict = None, columns: list = None,
+                    page_size: int = DEFAULT_SYNC_PAGE_SIZE) -> tuple[pd.DataFrame, dict]:
+        """Retrieves the rows of `table` written since a watermark, one keyset page at a time (see StorageBackend)."""
+        try:
+            key = SYNC_TABLE_KEYS[table]
+            if columns:
+                columns = list(dict.fromkeys([key, 'updated_at', *columns]))
+            query = self.client.table(table).select(','.join(columns) if columns else '*')
+            if since is not None:
+                query = query.gte('updated_at', pd.Timestamp(since).isoformat())
+            if after:
+                updated_at = _quote_filter_value(after['updated_at'])
+                query = query.or_(f"updated_at.gt.{updated_at},"
+                                  f"and(updated_at.eq.{updated_at},{key}.gt.{_quote_filter_value(after[key])})")
+            response = query.order('updated_at').order(key).limit(page_size + 1).execute()
+            return self._changes_page(table, response.data or [], page_size)
+        except Exception as e:
+            self._read_failed(f"Error retrieving changes to '{table}'", e)
+            return pd.DataFrame(), None
+
+    def get_latest_update(self, table: str):
+        """Retrieves the newest updated_at of `table` with a single one-row request."""
+        try:
+            response = self.client.table(table).select('updated_at').order('updated_at', desc=True).limit(1).execute()
+            rows = response.data or []
+            return pd.to_datetime(rows[0]['updated_at'], utc=True, format='ISO8601') if rows else None
+        except Exception as e:
+            self._read_failed(f"Error retrieving the latest update to '{table}'", e)
+            return None
+
+    def get_actions_for_alerts(self, alert_ids: list) -> pd.DataFrame:
+        """Retrieves the pharmacist actions of many alerts with one request per MAX_IDS_PER_QUERY IDs."""
+        try:
+            rows = []
+            for batch in id_batches(alert_ids):
+                response = (self.client.table('pharmacist_actions').select('*').in_('alert_id', batch)
+                            .order('alert_id').order('action_id').execute())
+                rows.extend(response.data or [])
+            actions_df = pd.DataFrame(rows)
+            if 'timestamp' in actions_df.columns:
+                actions_df['timestamp'] = pd.to_datetime(actions_df['timestamp'])
+            return actions_df
+        except Exception as e:
+            self._read_failed(f"Error retrieving actions for {len(alert_ids)} alerts", e)
+            return pd.DataFrame()
+
+    def get_action_summaries(self, alert_ids: list = None) -> pd.DataFrame:
+        """Retrieves rows of the trigger-maintained 'alert_action_summary' table."""
+        try:
+            if alert_ids is None:
+                rows = self.client.table('alert_action_summary').select('*').execute().data or []
+            else:
+                rows = []
+                for batch in id_batches(alert_ids):
+                    rows.extend(self.client.table('alert_action_summary').select('*').in_('alert_id', batch).execute().data or [])
+            summaries = pd.DataFrame(rows, columns=ACTION_SUMMARY_COLUMNS)
+            summaries['last_action_at'] = pd.to_datetime(summaries['last_action_at'])
+            return summaries
+        except Exception as e:
+            self._read_failed("Error retrieving action summaries", e)
+            return pd.DataFrame(columns=ACTION_SUMMARY_COLUMNS)
+
 if __name__ == "__main__":
     # Example usage (requires SUPABASE_URL and SUPABASE_KEY environment variables)
     # For local testing, you might need to mock Supabase client or set up a test project.
@@ -197,6 +503,10 @@ if __name__ == "__main__":
         # Uncomment to insert:
         # db_manager.insert_alert(sample_alert)
 
+        # Example: Bulk upsert (accepts the DataFrame from process_alerts_to_dataframe)
+        # report = db_manager.insert_alerts([sample_alert], chunk_size=500, max_workers=4)
+        # print([chunk for chunk in report if not chunk['ok']])
+
         # Example: Insert a sample pharmacist action
         sample_action = {
             "alert_id": "TEST-SUPABASE-001",
@@ -0,0 +1,273 @@
+"""
+Columnar export of the alerts and pharmacist actions for offline analytics and audits.
+
+`python main.py export` writes both tables under ALERTRX_EXPORT_DIR (default data/export),
+partitioned by month and source, one file per partition:
+
+    data/export/alerts/month=2024-05/source=MHRA/part-0.parquet
+    data/export/pharmacist_actions/month=2024-05/source=MHRA/part-0.parquet
+
+Alerts are partitioned by the month they were published. Actions are partitioned by the month
+they were recorded, under their alert's source, and carry a 'source_name' column. Actions
+exported before their alert (under source=unknown) move to its source once it is exported,
+and move again if the alert's source changes.
+
+Exports are incremental. Each run asks the backend only for the rows written since the
+previous export (get_changes, with the watermark kept in _export_state.json) and rewrites only
+the partitions those rows belong to, or belonged to before. Files are replaced atomically, so
+readers never see a half-written partition.
+
+The default Parquet files are compact and readable by any analytics tool. With
+--format arrow, partitions are uncompressed Arrow IPC files instead. load_export() then
+memory-maps them without copying or decoding, so loading is close to instant.
+load_export() returns DataFrames shaped like the ones DBManager returns. Raw payloads are not
+exported; they stay in the blob store.
+"""
+from __future__ import annotations
+
+import os
+import json
+import shutil
+from datetime import timedelta
+from urllib.parse import quote, unquote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.lazy_imports import lazy_import
+from src.database.storage import ALERT_DETAIL_COLUMNS, SURGERIES, SYNC_TABLE_KEYS
+from src.database.codec import ALERT_LIST_COLUMNS
+from src.database.sync import SYNC_OVERLAP_SECONDS
+
+pd = lazy_import("pandas")
+
+DEFAULT_EXPORT_DIR = os.path.join("data", "export")
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+STATE_FILE = "_export_state.json"
+# Partition value of rows without a date or source.
+UNKNOWN_PARTITION = "unknown"
+
+_STRING = pa.string()
+_UTC = pa.timestamp("ns", tz="UTC")
+EXPORT_SCHEMAS = {
+    'alerts': pa.schema(
+        [(col, pa.list_(_STRING) if col in ALERT_LIST_COLUMNS else _STRING) for col in ALERT_DETAIL_COLUMNS]
+        + [('updated_at', _UTC)]
+    ).set(ALERT_DETAIL_COLUMNS.index('date_published'), pa.field('date_published', pa.timestamp("ns"))),
+    'pharmacist_actions': pa.schema(
+        [('action_id', pa.int64()), ('alert_id', _STRING), ('source_name', _STRING), ('action_taken', _STRING),
+         ('timestamp', _UTC), ('submission_id', _STRING)]
+        + [(surgery, pa.int64()) for surgery in SURGERIES]
+        + [('updated_at', _UTC)]
+    ),
+}
+# Column whose month partitions each table.
+_MONTH_COLUMNS = {'alerts': 'date_published', 'pharmacist_actions': 'timestamp'}
+
+
+def _export_dir(export_dir: str = None) -> str:
+    return export_dir or os.getenv("ALERTRX_EXPORT_DIR", DEFAULT_EXPORT_DIR)
+
+
+def _partition_files(table_dir: str, months=None, sources=None) -> list:
+    """Paths of the partition files of a table, optionally only of some months and sources."""
+    paths = []
+    if not os.path.isdir(table_dir):
+        return paths
+    for month_dir in sorted(os.listdir(table_dir)):
+        if not month_dir.startswith("month=") or (months and month_dir[len("month="):] not in months):
+            continue
+        for source_dir in sorted(os.listdir(os.path.join(table_dir, month_dir))):
+            if not source_dir.startswith("source=") or (sources and unquote(source_dir[len("source="):]) not in sources):
+                continue
+            partition_dir = os.path.join(table_dir, month_dir, source_dir)
+            paths.extend(os.path.join(partition_dir, name) for name in sorted(os.listdir(partition_dir))
+                         if name.endswith(tuple(EXPORT_FORMATS.values())))
+    return paths
+
+
+def _read_file(path: str, columns: list = None) -> pa.Table:
+    """Reads one partition file, memory-mapped."""
+    if path.endswith(EXPORT_FORMATS["arrow"]):
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()  # zero-copy view of the mapped file
+        return table.select(columns) if columns else table
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def _write_file(table: pa.Table, path: str):
+    """Writes a partition file next to its final path, then moves it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if path.endswith(EXPORT_FORMATS["arrow"]):
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def _partition_paths(df: pd.DataFrame, table: str, table_dir: str, extension: str) -> pd.Series:
+    """The partition file each row belongs in."""
+    months = df[_MONTH_COLUMNS[table]].dt.strftime("%Y-%m").fillna(UNKNOWN_PARTITION)
+    sources = df['source_name'].fillna("").replace("", UNKNOWN_PARTITION).map(lambda name: quote(str(name), safe=""))
+    return table_dir + os.sep + "month=" + months + os.sep + "source=" + sources + os.sep + "part-0" + extension
+
+
+def _to_arrow(df: pd.DataFrame, table: str) -> pa.Table:
+    schema = EXPORT_SCHEMAS[table]
+    df = df.reindex(columns=schema.names)
+    if table == 'pharmacist_actions':
+        df[SURGERIES] = df[SURGERIES].fillna(0).astype("int64")
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _exported_rows(table_dir: str, extension: str, column: str, values: list) -> pa.Table:
+    """Exported rows whose `column` is in `values`; only files holding some are read in full."""
+    values = pa.array(values, type=_STRING)
+    parts = []
+    for path in _partition_files(table_dir):
+        if not path.endswith(extension):
+            continue
+        mask = pc.is_in(_read_file(path, [column]).column(column), value_set=values)
+        if pc.any(mask).as_py():
+            parts.append(_read_file(path).filter(mask))
+    return pa.concat_tables(parts) if parts else None
+
+
+def _export_changes(table: str, changes: pd.DataFrame, table_dir: str, extension: str) -> tuple:
+    """
+    Merges changed rows into their partitions. Returns the number of rows that were new, newer
+    than their exported version or moved to another partition, and the number of partition
+    files rewritten.
+    """
+    key = SYNC_TABLE_KEYS[table]
+    changes = changes.drop_duplicates(subset=key, keep='last')
+    # Where each row is exported now, and which version; reads only these two columns.
+    paths = [path for path in _partition_files(table_dir) if path.endswith(extension)]
+    exported = [_read_file(path, [key, 'updated_at']) for path in paths]
+    locations, versions = {}, {}
+    if exported:
+        exported_keys = pa.concat_tables(exported).combine_chunks()
+        row_paths = [path for path, part in zip(paths, exported) for _ in range(part.num_rows)]
+        locations = dict(zip(exported_keys.column(key).to_pylist(), row_paths))
+        versions = dict(zip(exported_keys.column(key).to_pylist(), exported_keys.column('updated_at').to_pandas()))
+    # Rows fetched again because of the watermark overlap are already exported, where they belong.
+    targets = _partition_paths(changes, table, table_dir, extension)
+    pending = [versions.get(row_key) != updated_at or locations.get(row_key) != target
+               for row_key, updated_at, target in zip(changes[key], changes['updated_at'], targets)]
+    changes, targets = changes[pending], targets[pending]
+    if changes.empty:
+        return 0, 0
+    changed_keys = set(changes[key])
+    # Partitions that hold an older version of a changed row too, which may have moved partition.
+    affected = set(targets) | {locations[row_key] for row_key in changed_keys if row_key in locations}
+    for path in sorted(affected):
+        incoming = _to_arrow(changes[(targets == path).to_numpy()], table)
+        if os.path.exists(path):
+            existing = _read_file(path)
+            kept = existing.filter(pc.invert(pc.is_in(existing.column(key), pa.array(list(changed_keys)))))
+            incoming = pa.concat_tables([kept, incoming])
+        if incoming.num_rows:
+            _write_file(incoming.sort_by(key), path)
+        elif os.path.exists(path):
+            os.remove(path)
+    return len(changes), len(affected)
+
+
+def _read_state(export_dir: str) -> dict:
+    try:
+        with open(os.path.join(export_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_tables(db_manager, export_dir: str = None, export_format: str = "parquet", full: bool = False) -> dict:
+    """
+    Exports the alerts and pharmacist actions written since the last export.
+
+    Args:
+        db_manager: The storage backend to export from.
+        export_dir (str): Root directory of the export (default: ALERTRX_EXPORT_DIR or data/export).
+        export_format (str): "parquet" or "arrow"; changing it starts a new full export.
+        full (bool): Discard the existing export and export every row again.
+
+    Returns:
+        dict: Per table, the number of new or changed 'rows' exported and of 'partitions' rewritten.
+    """
+    export_dir = _export_dir(export_dir)
+    extension = EXPORT_FORMATS[export_format]
+    state = _read_state(export_dir)
+    if full or state.get("format") != export_format:
+        for table in SYNC_TABLE_KEYS:
+            shutil.rmtree(os.path.join(export_dir, table), ignore_errors=True)
+        state = {}
+    watermarks = state.get("watermarks", {})
+    stats = {}
+    changed_alert_ids = []
+    # Alerts first: the actions take their source from the exported alerts.
+    for table in SYNC_TABLE_KEYS:
+        table_dir = os.path.join(export_dir, table)
+        since = None
+        if watermarks.get(table):
+            since = pd.Timestamp(watermarks[table]) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        columns = ALERT_DETAIL_COLUMNS if table == 'alerts' else None
+        pages = list(db_manager.iter_changes(table, since=since, columns=columns))
+        changes = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+        if table == 'alerts' and not changes.empty:
+            changed_alert_ids = changes['alert_id'].tolist()
+        if table == 'pharmacist_actions':
+            # Exported actions of the changed alerts, which may have to move to the alert's (new) source.
+            exported = _exported_rows(table_dir, extension, 'alert_id', changed_alert_ids) if changed_alert_ids else None
+            if exported is not None:
+                changes = pd.concat([exported.drop_columns(['source_name']).to_pandas(), changes], ignore_index=True)
+            if not changes.empty:
+                sources = load_export('alerts', export_dir, columns=['alert_id', 'source_name'])
+                changes = changes.drop(columns='source_name', errors='ignore').merge(sources, on='alert_id', how='left')
+        if changes.empty:
+            stats[table] = {"rows": 0, "partitions": 0}
+            continue
+        rows, partitions = _export_changes(table, changes, table_dir, extension)
+        stats[table] = {"rows": rows, "partitions": partitions}
+        if pages:
+            watermarks[table] = max(page['updated_at'].max() for page in pages).isoformat()
+    os.makedirs(export_dir, exist_ok=True)
+    with open(os.path.join(export_dir, STATE_FILE), "w") as f:
+        json.dump({"format": export_format, "watermarks": watermarks}, f, indent=2)
+    return stats
+
+
+def load_export_table(table: str = 'alerts', export_dir: str = None, months: list = None, sources: list = None,
+                      columns: list = None) -> pa.Table:
+    """
+    Reads an exported table as one Arrow table, memory-mapping its partition files.
+
+    Args:
+        table (str): 'alerts' or 'pharmacist_actions'.
+        export_dir (str): Root directory of the export (default: ALERTRX_EXPORT_DIR or data/export).
+        months (list): Only these months ("2024-05"; "unknown" for rows without a date).
+        sources (list): Only these source names.
+        columns (list): Only these columns.
+    """
+    schema = EXPORT_SCHEMAS[table]
+    tables = [_read_file(path, columns) for path in _partition_files(os.path.join(_export_dir(export_dir), table),
+                                                                        months, sources)]
+    if not tables:
+        return (schema if not columns else pa.schema([schema.field(col) for col in columns])).empty_table()
+    return pa.concat_tables(tables)
+
+
+def load_export(table: str = 'alerts', export_dir: str = None, months: list = None, sources: list = None,
+                columns: list = None) -> pd.DataFrame:
+    """
+    Reads an exported table as a DataFrame shaped like DBManager's (list columns as lists,
+    date_published as naive datetimes). Arguments as for load_export_table.
+    """
+    arrow_table = load_export_table(table, export_dir, months, sources, columns)
+    list_columns = [col for col in ALERT_LIST_COLUMNS if table == 'alerts' and col in arrow_table.column_names]
+    df = arrow_table.drop_columns(list_columns).to_pandas()
+    for col in list_columns:
+        # Converted from Arrow directly: to_pandas would give numpy arrays rather than lists.
+        df[col] = [value if value is not None else [] for value in arrow_table.column(col).to_pylist()]
+    return df[arrow_table.column_names]
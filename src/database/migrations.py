@@ -0,0 +1,109 @@
+"""
+One-off data migrations for the alert tables.
+
+Usage:
+    python -m src.database.migrations json-encoding [--dry-run]    # rewrite legacy str() encoded alert rows as JSON (Supabase)
+    python -m src.database.migrations raw-data-blobs [--dry-run]   # move inline raw_data into the blob store (configured backend)
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.database.codec import ALERT_JSON_COLUMNS, is_json, decode_value, default_for_column, dumps
+from src.database.blob_store import content_hash
+
+MIGRATION_PAGE_SIZE = 500
+
+
+def _iter_alert_pages(db_manager, page_size: int = MIGRATION_PAGE_SIZE):
+    """Yields pages of raw alert rows ordered by alert_id, without decoding them."""
+    start = 0
+    while True:
+        response = db_manager.client.table('alerts').select('*').order('alert_id').range(start, start + page_size - 1).execute()
+        rows = response.data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+
+def migrate_json_encoding(db_manager, page_size: int = MIGRATION_PAGE_SIZE, dry_run: bool = False) -> dict:
+    """
+    Rewrites alert rows whose JSON columns still hold Python str() reprs as proper JSON.
+    Rows that are already JSON are left untouched, so the migration can be re-run safely.
+
+    Returns:
+        dict: Counts of rows 'scanned' and 'migrated', and the chunk reports of any 'failed' upserts.
+    """
+    stats = {"scanned": 0, "migrated": 0, "failed": []}
+    for rows in _iter_alert_pages(db_manager, page_size):
+        stats["scanned"] += len(rows)
+        legacy_rows = []
+        for row in rows:
+            if all(is_json(row.get(col)) for col in ALERT_JSON_COLUMNS):
+                continue
+            # Decoded only: insert_alerts encodes the rows itself.
+            for col in ALERT_JSON_COLUMNS:
+                row[col] = decode_value(row.get(col), default_for_column(col))
+            legacy_rows.append(row)
+        if legacy_rows and not dry_run:
+            report = db_manager.insert_alerts(legacy_rows, chunk_size=page_size)
+            stats["failed"].extend(chunk for chunk in report if not chunk["ok"])
+        stats["migrated"] += len(legacy_rows)
+    return stats
+
+
+def migrate_raw_data_to_blobs(db_manager, page_size: int = MIGRATION_PAGE_SIZE, dry_run: bool = False) -> dict:
+    """
+    Moves the raw_data still stored inline in alert rows into the blob store (see
+    src.database.blob_store), leaving only its raw_data_hash in the row. Works on either
+    backend; rows that already reference a blob are skipped, so it can be re-run safely.
+
+    Returns:
+        dict: Counts of rows 'scanned' and 'migrated', the number of distinct payloads ('blobs')
+              and the chunk reports of any 'failed' upserts.
+    """
+    stats = {"scanned": 0, "migrated": 0, "blobs": 0, "failed": []}
+    hashes = set()
+    for alerts_df in db_manager.iter_alerts(page_size=page_size):
+        stats["scanned"] += len(alerts_df)
+        inline = alerts_df['raw_data'].map(bool)
+        if 'raw_data_hash' in alerts_df.columns:
+            inline &= alerts_df['raw_data_hash'].isna()
+        legacy_df = alerts_df[inline]
+        if legacy_df.empty:
+            continue
+        hashes.update(content_hash(dumps(payload)) for payload in legacy_df['raw_data'])
+        # Dates are read back as naive UTC: restore the offset so they are stored as insert_alerts stores them.
+        legacy_df = legacy_df.assign(date_published=legacy_df['date_published'].dt.tz_localize('UTC'))
+        # Rewriting the rows through insert_alerts stores each payload once and clears raw_data.
+        if not dry_run:
+            report = db_manager.insert_alerts(legacy_df, chunk_size=page_size)
+            stats["failed"].extend(chunk for chunk in report if not chunk["ok"])
+        stats["migrated"] += len(legacy_df)
+    stats["blobs"] = len(hashes)
+    return stats
+
+
+if __name__ == "__main__":
+    from src.database.db_manager import DBManager
+    from src.database.storage import create_db_manager
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ("json-encoding", "raw-data-blobs"):
+        print(__doc__)
+        sys.exit(1)
+    dry_run = "--dry-run" in sys.argv
+    if sys.argv[1] == "raw-data-blobs":
+        result = migrate_raw_data_to_blobs(create_db_manager(), dry_run=dry_run)
+        print(f"Scanned {result['scanned']} alerts, {'would move' if dry_run else 'moved'} the raw data of "
+              f"{result['migrated']} into {result['blobs']} blobs.")
+        for chunk in result["failed"]:
+            print(f"Chunk {chunk['chunk']} failed: {chunk['error']}")
+        sys.exit(1 if result["failed"] else 0)
+    result = migrate_json_encoding(DBManager(), dry_run=dry_run)
+    print(f"Scanned {result['scanned']} alerts, {'would migrate' if dry_run else 'migrated'} {result['migrated']}.")
+    for chunk in result["failed"]:
+        print(f"Chunk {chunk['chunk']} failed: {chunk['error']}")
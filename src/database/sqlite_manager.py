@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+
+from src.lazy_imports import lazy_import
+from src.database.codec import encode_alert_record, decode_alert_record, decode_alert_frame, decode_value
+from src.database.blob_store import split_raw_data, decompress_payload
+from src.database.storage import (StorageBackend, ALERT_COLUMNS, ALERT_DETAIL_COLUMNS, ACTION_SUMMARY_COLUMNS,
+                                  DEFAULT_PAGE_SIZE, DEFAULT_SYNC_PAGE_SIZE, SYNC_TABLE_KEYS, SURGERIES, id_batches)
+
+pd = lazy_import("pandas")
+
+DEFAULT_SQLITE_PATH = os.path.join("data", "alerts.db")
+
+_SURGERY_COLUMNS_SQL = ",\n".join(f'    "{s}" INTEGER DEFAULT 0' for s in SURGERIES)
+# Current UTC time as an ISO string with milliseconds; these sort in time order as text.
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    date_published TEXT,
+    severity TEXT,
+    summary TEXT,
+    affected_products TEXT,
+    recommendations TEXT,
+    source_url TEXT,
+    source_name TEXT,
+    raw_data TEXT,
+    canonical_alert_id TEXT,
+    raw_data_hash TEXT,
+    updated_at TEXT DEFAULT ({_NOW_SQL})
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_date_published ON alerts (date_published DESC, alert_id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_source_name ON alerts (source_name);
+CREATE TABLE IF NOT EXISTS alert_blobs (
+    content_hash TEXT PRIMARY KEY,
+    encoding TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pharmacist_actions (
+    action_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_id TEXT NOT NULL REFERENCES alerts(alert_id),
+    action_taken TEXT,
+    timestamp TEXT DEFAULT ({_NOW_SQL}),
+    submission_id TEXT,
+    updated_at TEXT DEFAULT ({_NOW_SQL}),
+{_SURGERY_COLUMNS_SQL}
+);
+CREATE INDEX IF NOT EXISTS idx_pharmacist_actions_alert_id ON pharmacist_actions (alert_id);
+CREATE TABLE IF NOT EXISTS alert_action_summary (
+    alert_id TEXT PRIMARY KEY REFERENCES alerts(alert_id),
+    action_count INTEGER NOT NULL DEFAULT 0,
+    last_action_at TEXT,
+{_SURGERY_COLUMNS_SQL}
+);
+"""
+
+# Rows written without a raw payload send no raw_data_hash: they keep the blob already stored.
+# canonical_alert_id is taken as sent, so an alert whose text diverged stops being a duplicate.
+_KEPT_IF_NULL_COLUMNS = ('raw_data_hash',)
+_UPDATED_ALERT_VALUES = {
+    col: f"COALESCE(excluded.{col}, alerts.{col})" if col in _KEPT_IF_NULL_COLUMNS else f"excluded.{col}"
+    for col in ALERT_COLUMNS if col != 'alert_id'
+}
+_UPSERT_ALERT_SQL = (
+    f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}, updated_at) "
+    f"VALUES ({', '.join('?' for _ in ALERT_COLUMNS)}, {_NOW_SQL}) "
+    f"ON CONFLICT(alert_id) DO UPDATE SET "
+    + ", ".join(f"{col} = {value}" for col, value in _UPDATED_ALERT_VALUES.items())
+    + ", updated_at = excluded.updated_at"
+    # Re-scraping an unchanged alert writes nothing, so it does not show up as a change in delta sync.
+    + " WHERE " + " OR ".join(f"alerts.{col} IS NOT {value}" for col, value in _UPDATED_ALERT_VALUES.items())
+)
+# Blobs are immutable: a payload that is already stored is not written again.
+_INSERT_BLOB_SQL = "INSERT OR IGNORE INTO alert_blobs (content_hash, encoding, size, data) VALUES (?, ?, ?, ?)"
+
+_QUOTED_SURGERIES = ", ".join(f'"{s}"' for s in SURGERIES)
+# Adds one action to its alert's summary row.
+_UPDATE_ACTION_SUMMARY_SQL = (
+    f"INSERT INTO alert_action_summary (alert_id, action_count, last_action_at, {_QUOTED_SURGERIES}) "
+    f"VALUES (?, 1, ?, {', '.join('?' for _ in SURGERIES)}) "
+    f"ON CONFLICT(alert_id) DO UPDATE SET action_count = action_count + 1, "
+    f"last_action_at = MAX(COALESCE(last_action_at, ''), excluded.last_action_at), "
+    + ", ".join(f'"{s}" = "{s}" + excluded."{s}"' for s in SURGERIES)
+)
+# Recomputes every summary row from pharmacist_actions (for databases created before the summary table).
+_REBUILD_ACTION_SUMMARY_SQL = (
+    f"INSERT OR REPLACE INTO alert_action_summary (alert_id, action_count, last_action_at, {_QUOTED_SURGERIES}) "
+    f"SELECT alert_id, COUNT(*), MAX(timestamp), "
+    + ", ".join(f'SUM(COALESCE("{s}", 0))' for s in SURGERIES)
+    + " FROM pharmacist_actions GROUP BY alert_id"
+)
+
+# Columns added after the first release, created on existing databases when they are opened.
+# An added updated_at column starts with the time of the upgrade for every existing row.
+_ADDED_COLUMNS = {
+    'alerts': {'canonical_alert_id': 'TEXT', 'raw_data_hash': 'TEXT', 'updated_at': 'TEXT'},
+    'pharmacist_actions': {'submission_id': 'TEXT', 'updated_at': 'TEXT'},
+}
+# Created after the added columns, which they index.
+_ADDED_INDEXES_SQL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_pharmacist_actions_submission_id ON pharmacist_actions (submission_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alerts_updated_at ON alerts (updated_at, alert_id)",
+    "CREATE INDEX IF NOT EXISTS idx_pharmacist_actions_updated_at ON pharmacist_actions (updated_at, action_id)",
+)
+ACTION_COLUMNS = ['alert_id', 'action_taken', 'timestamp', 'submission_id'] + SURGERIES
+
+
+class SQLiteDBManager(StorageBackend):
+    """
+    Local SQLite storage backend, for edge deployments and as a fast, deterministic stand-in
+    for Supabase in benchmarks.
+
+    The database runs in WAL mode so dashboard reads are never blocked by ingestion writes.
+    Each thread gets its own connection; bulk upserts run one transaction per chunk.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or DEFAULT_SQLITE_PATH
+        if self.db_path != ":memory:" and os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA_SQL)
+            for table, added_columns in _ADDED_COLUMNS.items():
+                existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column, column_type in added_columns.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                        if column == 'updated_at':
+                            conn.execute(f"UPDATE {table} SET updated_at = {_NOW_SQL}")
+            for index_sql in _ADDED_INDEXES_SQL:
+                conn.execute(index_sql)
+            if conn.execute("SELECT 1 FROM alert_action_summary LIMIT 1").fetchone() is None:
+                conn.execute(_REBUILD_ACTION_SUMMARY_SQL)
+        print(f"SQLite database initialized at {self.db_path}.")
+
+    def _connection(self) -> sqlite3.Connection:
+        # An in-memory database exists per connection, so it has to be shared by all threads.
+        holder = self if self.db_path == ":memory:" else self._local
+        conn = getattr(holder, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            holder.conn = conn
+        return conn
+
+    def _query(self, sql: str, params=()) -> list:
+        return [dict(row) for row in self._connection().execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _select_list(columns: list = None, known=(*ALERT_COLUMNS, 'updated_at')) -> str:
+        if not columns:
+            return "*"
+        unknown = set(columns) - set(known)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        return ", ".join(f'"{col}"' for col in columns)
+
+    def create_tables_guide(self):
+        """The SQLite schema is created automatically; this prints it for reference."""
+        print(f"\n--- SQLite schema ({self.db_path}) ---")
+        print(SCHEMA_SQL)
+
+    def insert_alert(self, alert_data: dict):
+        """Inserts or updates a single normalized alert."""
+        try:
+            data_to_insert = encode_alert_record(alert_data)
+            blobs = split_raw_data([data_to_insert])
+            with self._write_lock, self._connection() as conn:
+                self._insert_blobs(conn, blobs)
+                conn.execute(_UPSERT_ALERT_SQL, [data_to_insert.get(col) for col in ALERT_COLUMNS])
+            return [data_to_insert]
+        except Exception as e:
+            print(f"Error inserting alert '{alert_data.get('title')}': {e}")
+            return None
+
+    @staticmethod
+    def _insert_blobs(conn, blobs: dict):
+        conn.executemany(_INSERT_BLOB_SQL, [(blob['content_hash'], blob['encoding'], blob['size'], blob['data'])
+                                            for blob in blobs.values()])
+
+    def _upsert_alert_chunk(self, index: int, rows: list) -> dict:
+        try:
+            blobs = split_raw_data(rows)
+            with self._write_lock, self._connection() as conn:  # one transaction per chunk, blobs included
+                self._insert_blobs(conn, blobs)
+                conn.executemany(_UPSERT_ALERT_SQL, [[row.get(col) for col in ALERT_COLUMNS] for row in rows])
+            return {"chunk": index, "rows": len(rows), "ok": True, "error": None}
+        except Exception as e:
+            return {"chunk": index, "rows": len(rows), "ok": False, "error": str(e),
+                    "alert_ids": [row.get('alert_id') for row in rows]}
+
+    @staticmethod
+    def _insert_action_rows(conn, actions: list) -> list:
+        """
+        Inserts actions (skipping submission_ids already stored) and adds each inserted row to
+        its alert's action summary, on the caller's transaction.
+        """
+        inserted = []
+        for action_data in actions:
+            columns = [col for col in ACTION_COLUMNS if col in action_data]
+            quoted = ", ".join(f'"{col}"' for col in columns)
+            placeholders = ", ".join("?" for _ in columns)
+            row = conn.execute(
+                f"INSERT INTO pharmacist_actions ({quoted}, updated_at) VALUES ({placeholders}, {_NOW_SQL}) "
+                f"ON CONFLICT(submission_id) DO NOTHING RETURNING *",
+                [action_data[col] for col in columns]
+            ).fetchone()
+            if row is None:
+                continue  # already recorded by an earlier attempt
+            action = dict(row)
+            conn.execute(_UPDATE_ACTION_SUMMARY_SQL,
+                         [action['alert_id'], action['timestamp'], *(action[s] or 0 for s in SURGERIES)])
+            inserted.append(action)
+        return inserted
+
+    def insert_pharmacist_action(self, action_data: dict):
+        """
+        Inserts a pharmacist's action (the timestamp defaults to now, UTC) and adds it to the
+        alert's action summary in the same transaction.
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                return self._insert_action_rows(conn, [action_data])
+        except Exception as e:
+            print(f"Error inserting pharmacist action for alert '{action_data.get('alert_id')}': {e}")
+            return None
+
+    def insert_pharmacist_actions(self, actions: list) -> list:
+        """Inserts many actions in one transaction; already stored submission_ids are skipped."""
+        try:
+            with self._write_lock, self._connection() as conn:
+                return self._insert_action_rows(conn, actions)
+        except Exception as e:
+            print(f"Error inserting {len(actions)} pharmacist actions: {e}")
+            return None
+
+    def get_all_alerts(self) -> pd.DataFrame:
+        """Retrieves all alerts as a pandas DataFrame."""
+        try:
+            rows = self._query("SELECT * FROM alerts")
+            if not rows:
+                return pd.DataFrame()
+            return decode_alert_frame(pd.DataFrame(rows))
+        except Exception as e:
+            self._read_failed("Error retrieving all alerts", e)
+            return pd.DataFrame()
+
+    def query_alerts(self, columns: list = None, severity=None, source_name=None, date_from=None, date_to=None,
+                     after: dict = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     hide_duplicates: bool = False) -> tuple[pd.DataFrame, dict]:
+        """Same contract as DBManager.query_alerts, served by the indexes on date_published and source_name."""
+        try:
+            if columns:
+                columns = list(dict.fromkeys(['alert_id', 'date_published', *columns]))
+            where, params = [], []
+            for column, value in (('severity', severity), ('source_name', source_name)):
+                if isinstance(value, (list, tuple, set)):
+                    if value:
+                        where.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                        params.extend(value)
+                elif value:
+                    where.append(f"{column} = ?")
+                    params.append(value)
+            if date_from is not None:
+                where.append("date_published >= ?")
+                params.append(pd.Timestamp(date_from).isoformat())
+            if date_to is not None:
+                end = pd.Timestamp(date_to)
+                if end == end.normalize():
+                    where.append("date_published < ?")
+                    params.append((end + pd.Timedelta(days=1)).isoformat())
+                else:
+                    where.append("date_published <= ?")
+                    params.append(end.isoformat())
+            if hide_duplicates:
+                where.append("canonical_alert_id IS NULL")
+            if after:
+                if after.get('date_published') is None:
+                    where.append("(date_published IS NULL AND alert_id < ?)")
+                    params.append(after['alert_id'])
+                else:
+                    where.append("(date_published < ? OR (date_published = ? AND alert_id < ?) OR date_published IS NULL)")
+                    params.extend([after['date_published'], after['date_published'], after['alert_id']])
+            sql = f"SELECT {self._select_list(columns)} FROM alerts"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY date_published DESC NULLS LAST, alert_id DESC LIMIT ?"
+            params.append(page_size + 1)
+
+            rows = self._query(sql, params)
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = {'date_published': rows[-1].get('date_published'), 'alert_id': rows[-1]['alert_id']}
+            if not rows:
+                return pd.DataFrame(columns=columns or []), None
+            return decode_alert_frame(pd.DataFrame(rows)), next_cursor
+        except Exception as e:
+            self._read_failed("Error querying alerts", e)
+            return pd.DataFrame(), None
+
+    def get_alert_sources(self) -> list:
+        try:
+            rows = self._query("SELECT DISTINCT source_name FROM alerts WHERE source_name IS NOT NULL AND source_name != '' ORDER BY source_name")
+            return [row['source_name'] for row in rows]
+        except Exception as e:
+            self._read_failed("Error retrieving alert sources", e)
+            return []
+
+    def get_alert(self, alert_id: str, columns: list = None) -> dict:
+        try:
+            rows = self._query(f"SELECT {self._select_list(columns)} FROM alerts WHERE alert_id = ? LIMIT 1", (alert_id,))
+            return decode_alert_record(rows[0]) if rows else {}
+        except Exception as e:
+            self._read_failed(f"Error retrieving alert '{alert_id}'", e)
+            return {}
+
+    def get_alert_with_actions(self, alert_id: str) -> tuple[dict, pd.DataFrame]:
+        """Retrieves an alert as a dict and its pharmacist actions as a DataFrame."""
+        try:
+            alert_data = self.get_alert(alert_id, columns=ALERT_DETAIL_COLUMNS)
+            actions = self._query("SELECT * FROM pharmacist_actions WHERE alert_id = ? ORDER BY action_id", (alert_id,))
+            actions_df = pd.DataFrame(actions) if actions else pd.DataFrame()
+            if 'timestamp' in actions_df.columns:
+                actions_df['timestamp'] = pd.to_datetime(actions_df['timestamp'])
+            return alert_data, actions_df
+        except Exception as e:
+            self._read_failed(f"Error retrieving alert '{alert_id}' with actions", e)
+            return {}, pd.DataFrame()
+
+    def get_raw_data(self, alert_id: str) -> dict:
+        """Loads an alert's raw payload from its blob (or the legacy raw_data column)."""
+        try:
+            rows = self._query(
+                "SELECT a.raw_data, b.encoding, b.data FROM alerts a "
+                "LEFT JOIN alert_blobs b ON b.content_hash = a.raw_data_hash WHERE a.alert_id = ?", (alert_id,))
+            if not rows:
+                return {}
+            if rows[0]['data'] is not None:
+                return decompress_payload(rows[0]['data'], rows[0]['encoding'])
+            return decode_value(rows[0]['raw_data'], {})
+        except Exception as e:
+            self._read_failed(f"Error retrieving the raw data of alert '{alert_id}'", e)
+            return {}
+
+    def get_changes(self, table: str, since=None, after: dict = None, columns: list = None,
+                    page_size: int = DEFAULT_SYNC_PAGE_SIZE) -> tuple[pd.DataFrame, dict]:
+        """Same contract as StorageBackend.get_changes, served by the (updated_at, key) indexes."""
+        try:
+            key = SYNC_TABLE_KEYS[table]
+            known = ALERT_COLUMNS if table == 'alerts' else ['action_id'] + ACTION_COLUMNS
+            if columns:
+                columns = list(dict.fromkeys([key, 'updated_at', *columns]))
+            where, params = [], []
+            if since is not None:
+                where.append("updated_at >= ?")
+                params.append(self._sync_timestamp(since))
+            if after:
+                where.append(f"(updated_at > ? OR (updated_at = ? AND {key} > ?))")
+                params.extend([after['updated_at'], after['updated_at'], after[key]])
+            sql = f"SELECT {self._select_list(columns, known + ['updated_at'])} FROM {table}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += f" ORDER BY updated_at, {key} LIMIT ?"
+            params.append(page_size + 1)
+            return self._changes_page(table, self._query(sql, params), page_size)
+        except Exception as e:
+            self._read_failed(f"Error retrieving changes to '{table}'", e)
+            return pd.DataFrame(), None
+
+    def get_latest_update(self, table: str):
+        """Same contract as StorageBackend.get_latest_update, served by the (updated_at, key) index."""
+        try:
+            if table not in SYNC_TABLE_KEYS:
+                raise ValueError(f"Unknown table: {table}")
+            latest = self._query(f"SELECT MAX(updated_at) AS latest FROM {table}")[0]['latest']
+            return pd.to_datetime(latest, utc=True, format='ISO8601') if latest else None
+        except Exception as e:
+            self._read_failed(f"Error retrieving the latest update to '{table}'", e)
+            return None
+
+    @staticmethod
+    def _sync_timestamp(since) -> str:
+        """A timestamp in the stored updated_at format (UTC, milliseconds), rounded down."""
+        since = pd.Timestamp(since)
+        since = since.tz_localize('UTC') if since.tzinfo is None else since.tz_convert('UTC')
+        return since.strftime('%Y-%m-%dT%H:%M:%S.') + f"{since.microsecond // 1000:03d}+00:00"
+
+    def get_actions_for_alerts(self, alert_ids: list) -> pd.DataFrame:
+        """Pharmacist actions of many alerts, ordered by alert and action."""
+        try:
+            rows = []
+            for batch in id_batches(alert_ids):
+                rows.extend(self._query(
+                    f"SELECT * FROM pharmacist_actions WHERE alert_id IN ({', '.join('?' for _ in batch)}) "
+                    f"ORDER BY alert_id, action_id", batch))
+            actions_df = pd.DataFrame(rows)
+            if 'timestamp' in actions_df.columns:
+                actions_df['timestamp'] = pd.to_datetime(actions_df['timestamp'])
+            return actions_df
+        except Exception as e:
+            self._read_failed(f"Error retrieving actions for {len(alert_ids)} alerts", e)
+            return pd.DataFrame()
+
+    def get_action_summaries(self, alert_ids: list = None) -> pd.DataFrame:
+        try:
+            if alert_ids is None:
+                rows = self._query("SELECT * FROM alert_action_summary")
+            else:
+                rows = []
+                for batch in id_batches(alert_ids):
+                    rows.extend(self._query(
+                        f"SELECT * FROM alert_action_summary WHERE alert_id IN ({', '.join('?' for _ in batch)})", batch))
+            summaries = pd.DataFrame(rows, columns=ACTION_SUMMARY_COLUMNS)
+            summaries['last_action_at'] = pd.to_datetime(summaries['last_action_at'])
+            return summaries
+        except Exception as e:
+            self._read_failed("Error retrieving action summaries", e)
+            return pd.DataFrame(columns=ACTION_SUMMARY_COLUMNS)
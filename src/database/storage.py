@@ -0,0 +1,307 @@
+"""
+Storage backend interface shared by the Supabase and local SQLite implementations.
+
+The backend is chosen by configuration: set ALERTRX_DB_BACKEND to "supabase" (default) or
+"sqlite" (with ALERTRX_SQLITE_PATH, default data/alerts.db) and call create_db_manager().
+"""
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lazy_imports import lazy_import
+from src.database.codec import encode_alert_record, encode_alert_frame, decode_alert_frame
+from src.observability.metrics import instrument, count_rows
+
+pd = lazy_import("pandas")
+
+# Default number of alerts sent per upsert request by insert_alerts.
+DEFAULT_CHUNK_SIZE = 500
+# Default number of alerts returned per page by query_alerts.
+DEFAULT_PAGE_SIZE = 50
+# Default number of rows returned per page by get_changes.
+DEFAULT_SYNC_PAGE_SIZE = 1000
+
+ALERT_COLUMNS = [
+    'alert_id', 'title', 'date_published', 'severity', 'summary',
+    'affected_products', 'recommendations', 'source_url', 'source_name', 'raw_data',
+    'canonical_alert_id', 'raw_data_hash'
+]
+# Columns of the alert detail view: everything but the legacy inline raw_data, which is loaded
+# separately (get_raw_data) when the raw payload is opened.
+ALERT_DETAIL_COLUMNS = [col for col in ALERT_COLUMNS if col != 'raw_data']
+# Tables that can be delta-synced with get_changes, and the key that orders rows written at the
+# same time. Both tables have an 'updated_at' column that the database sets on every write.
+SYNC_TABLE_KEYS = {'alerts': 'alert_id', 'pharmacist_actions': 'action_id'}
+# Maximum number of alert IDs sent in one IN (...) filter by the batch action reads.
+MAX_IDS_PER_QUERY = 200
+# Columns shown in the dashboard alert tables (alert_id is needed to open an alert).
+ALERT_SUMMARY_COLUMNS = ['alert_id', 'title', 'date_published', 'severity', 'source_name', 'source_url']
+
+SURGERIES = [
+    "Scarsdale-Medical-Centre", "Earls-Court-Surgery", "Stanhope-Mews-Surgery",
+    "The-Chelsea-Practice", "Health-Partners-at-Violet-Melchett",
+    "Emperors-Gate-Health-Centre", "Knightsbridge-Medical-Centre",
+    "Earls-Court-Medical-Centre", "The-Abingdon-Medical-Practice",
+    "The-Good-Practice", "Royal-Hospital-Chelsea", "Kensington-Park-Medical-Centre"
+]
+# Per-alert totals of pharmacist actions (patients per surgery summed over all actions),
+# maintained by the backends on every insert_pharmacist_action.
+ACTION_SUMMARY_COLUMNS = ['alert_id', 'action_count', 'last_action_at'] + SURGERIES
+
+
+# Per-thread count of failed reads, see StorageBackend._read_failed.
+_read_errors = threading.local()
+
+
+def read_error_count() -> int:
+    """Number of backend reads that failed in the calling thread so far."""
+    return getattr(_read_errors, "count", 0)
+
+
+def id_batches(alert_ids, size: int = MAX_IDS_PER_QUERY):
+    """Splits alert IDs (de-duplicated, order kept) into lists of at most `size` for IN (...) filters."""
+    alert_ids = list(dict.fromkeys(alert_ids))
+    return [alert_ids[i:i + size] for i in range(0, len(alert_ids), size)]
+
+
+def action_status(summaries: pd.DataFrame, alert_ids) -> pd.DataFrame:
+    """
+    Joins action summaries onto a list of alert IDs: one row per alert with 'status'
+    ("Complete" once any action is recorded, else "Outstanding"), 'action_count',
+    'patients' (total over all surgeries) and 'last_action_at'.
+    """
+    status = pd.DataFrame({'alert_id': list(alert_ids)})
+    if summaries.empty:
+        status['action_count'] = 0
+        status['patients'] = 0
+        status['last_action_at'] = pd.NaT
+    else:
+        summaries = summaries.assign(patients=summaries.reindex(columns=SURGERIES).fillna(0).sum(axis=1).astype(int))
+        status = status.merge(summaries[['alert_id', 'action_count', 'patients', 'last_action_at']], on='alert_id', how='left')
+        status[['action_count', 'patients']] = status[['action_count', 'patients']].fillna(0).astype(int)
+    status['status'] = status['action_count'].gt(0).map({True: "Complete", False: "Outstanding"})
+    return status
+
+
+# Backend methods timed as "db.<method>" spans, with the row count taken from their result.
+INSTRUMENTED_METHODS = {
+    'insert_alert': None,
+    '_upsert_alert_chunk': lambda report: report.get('rows', 0) if report.get('ok') else 0,
+    'insert_alerts': lambda reports: sum(report.get('rows', 0) for report in reports if report.get('ok')),
+    'insert_pharmacist_action': None,
+    'insert_pharmacist_actions': count_rows,
+    'get_all_alerts': count_rows,
+    'query_alerts': count_rows,
+    'get_alert_sources': count_rows,
+    'get_alert': count_rows,
+    'get_alert_with_actions': lambda result: count_rows(result[1]),
+    'get_actions_for_alerts': count_rows,
+    'get_action_summaries': count_rows,
+    'get_raw_data': None,
+    'get_changes': lambda result: count_rows(result[0]),
+    'get_latest_update': None,
+}
+
+
+class StorageBackend(ABC):
+    """
+    Operations the app, scraper pipeline and tools need from the alerts database.
+
+    Read methods return empty results and write methods return None on failure (after
+    printing the error), except insert_alerts which returns a per-chunk report. A failed
+    read also increments read_error_count(), so callers such as the dashboard cache can tell
+    an error from a genuinely empty result.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        # Wrap every backend's implementations (and the shared insert_alerts) in metric spans.
+        super().__init_subclass__(**kwargs)
+        for name, rows in INSTRUMENTED_METHODS.items():
+            owner = next((klass for klass in cls.__mro__ if name in klass.__dict__), None)
+            if owner is not cls and owner is not StorageBackend:
+                continue  # already wrapped in the parent backend
+            method = owner.__dict__[name]
+            if not getattr(method, '__isabstractmethod__', False):
+                setattr(cls, name, instrument(f"db.{name}", rows=rows, backend=cls.__name__)(method))
+
+    @staticmethod
+    def _read_failed(message: str, error: Exception):
+        """Reports a read that failed and is about to return an empty result."""
+        print(f"{message}: {error}")
+        _read_errors.count = read_error_count() + 1
+
+    @abstractmethod
+    def create_tables_guide(self):
+        """Prints (or applies) the schema for the 'alerts' and 'pharmacist_actions' tables."""
+
+    @abstractmethod
+    def insert_alert(self, alert_data: dict):
+        """Inserts or updates a single normalized alert (its raw_data is stored as a blob)."""
+
+    @abstractmethod
+    def _upsert_alert_chunk(self, index: int, rows: list) -> dict:
+        """
+        Upserts one chunk of encoded alert rows, with their raw_data moved into blobs
+        (blob_store.split_raw_data), and returns its report dict.
+        """
+
+    @abstractmethod
+    def insert_pharmacist_action(self, action_data: dict):
+        """Records a pharmacist's action for an alert."""
+
+    @abstractmethod
+    def insert_pharmacist_actions(self, actions: list) -> list:
+        """
+        Records many pharmacist actions in one request. Actions carry a 'submission_id'
+        idempotency key: an action whose key is already stored is skipped, so a batch can be
+        retried safely after a failure. Returns the rows actually inserted, or None on failure.
+        """
+
+    @abstractmethod
+    def get_all_alerts(self) -> pd.DataFrame:
+        """Returns every alert as a DataFrame."""
+
+    @abstractmethod
+    def query_alerts(self, columns: list = None, severity=None, source_name=None, date_from=None, date_to=None,
+                     after: dict = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     hide_duplicates: bool = False) -> tuple[pd.DataFrame, dict]:
+        """
+        Returns one filtered page of alerts (newest first) and the cursor for the next page.
+        With hide_duplicates, alerts that have a canonical_alert_id (near-duplicates) are left out.
+        """
+
+    @abstractmethod
+    def get_alert_sources(self) -> list:
+        """Returns the distinct source names of stored alerts."""
+
+    @abstractmethod
+    def get_alert(self, alert_id: str, columns: list = None) -> dict:
+        """Returns a single alert as a dict, or {} if not found."""
+
+    @abstractmethod
+    def get_alert_with_actions(self, alert_id: str) -> tuple[dict, pd.DataFrame]:
+        """Returns an alert and a DataFrame of its pharmacist actions."""
+
+    @abstractmethod
+    def get_raw_data(self, alert_id: str) -> dict:
+        """
+        Returns the raw Firecrawl payload of an alert, read from its blob (or from the legacy
+        inline raw_data of rows not migrated yet), or {} if it has none.
+        """
+
+    @abstractmethod
+    def get_actions_for_alerts(self, alert_ids: list) -> pd.DataFrame:
+        """Returns the pharmacist actions of many alerts, fetched in batches of MAX_IDS_PER_QUERY IDs."""
+
+    @abstractmethod
+    def get_action_summaries(self, alert_ids: list = None) -> pd.DataFrame:
+        """Returns the ACTION_SUMMARY_COLUMNS rows of the given alerts (default: all) that have actions."""
+
+    @abstractmethod
+    def get_changes(self, table: str, since=None, after: dict = None, columns: list = None,
+                    page_size: int = DEFAULT_SYNC_PAGE_SIZE) -> tuple[pd.DataFrame, dict]:
+        """
+        Returns one page of the rows of `table` ('alerts' or 'pharmacist_actions') whose
+        updated_at is at or after `since` (a timestamp; every row if None), oldest write first,
+        and the cursor for the next page (None after the last page). 'updated_at' is returned
+        as a UTC datetime column.
+        """
+
+    @abstractmethod
+    def get_latest_update(self, table: str):
+        """Returns the newest updated_at of `table` as a UTC timestamp, or None if it has no rows."""
+
+    def iter_changes(self, table: str, since=None, columns: list = None, page_size: int = DEFAULT_SYNC_PAGE_SIZE):
+        """Yields every page of get_changes, oldest write first."""
+        cursor = None
+        while True:
+            changes_df, cursor = self.get_changes(table, since=since, after=cursor, columns=columns, page_size=page_size)
+            if not changes_df.empty:
+                yield changes_df
+            if cursor is None:
+                return
+
+    @staticmethod
+    def _changes_page(table: str, rows: list, page_size: int) -> tuple[pd.DataFrame, dict]:
+        """Builds the get_changes result from up to page_size + 1 stored rows."""
+        key = SYNC_TABLE_KEYS[table]
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = {'updated_at': rows[-1]['updated_at'], key: rows[-1][key]}
+        if not rows:
+            return pd.DataFrame(), None
+        changes_df = pd.DataFrame(rows)
+        if table == 'alerts':
+            changes_df = decode_alert_frame(changes_df)
+        elif 'timestamp' in changes_df.columns:
+            changes_df['timestamp'] = pd.to_datetime(changes_df['timestamp'], format='ISO8601')
+        changes_df['updated_at'] = pd.to_datetime(changes_df['updated_at'], utc=True, format='ISO8601')
+        return changes_df, next_cursor
+
+    def iter_alerts(self, columns: list = None, page_size: int = 1000, **filters):
+        """Yields every alert matching the query_alerts filters as DataFrame pages, newest first."""
+        cursor = None
+        while True:
+            alerts_df, cursor = self.query_alerts(columns=columns, after=cursor, page_size=page_size, **filters)
+            if not alerts_df.empty:
+                yield alerts_df
+            if cursor is None:
+                return
+
+    def _iter_alert_chunks(self, alerts, chunk_size: int):
+        """Yields encoded upsert payloads of at most chunk_size alerts, de-duplicated on alert_id."""
+        if isinstance(alerts, pd.DataFrame):
+            # A single upsert may not touch the same alert_id twice; keep the latest version.
+            if 'alert_id' in alerts.columns:
+                alerts = alerts.drop_duplicates(subset='alert_id', keep='last')
+            for start in range(0, len(alerts), chunk_size):
+                yield encode_alert_frame(alerts.iloc[start:start + chunk_size])
+            return
+        iterator = iter(alerts)
+        while True:
+            batch = list(islice(iterator, chunk_size))
+            if not batch:
+                return
+            yield list({alert.get('alert_id'): encode_alert_record(alert) for alert in batch}.values())
+
+    def insert_alerts(self, alerts, chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = 1) -> list:
+        """
+        Upserts many normalized alerts in batches.
+
+        Args:
+            alerts: The DataFrame returned by process_alerts_to_dataframe, or an iterable of alert dicts.
+            chunk_size (int): Number of alerts sent per upsert request.
+            max_workers (int): Number of chunks sent in parallel; 1 sends them sequentially.
+
+        Returns:
+            list: One report dict per chunk with 'chunk', 'rows', 'ok' and 'error'
+                  (failed chunks also list their 'alert_ids' so they can be retried).
+        """
+        chunks = self._iter_alert_chunks(alerts, chunk_size)
+        if max_workers <= 1:
+            return [self._upsert_alert_chunk(i, rows) for i, rows in enumerate(chunks)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._upsert_alert_chunk, i, rows) for i, rows in enumerate(chunks)]
+            return [future.result() for future in futures]
+
+
+def create_db_manager(backend: str = None) -> StorageBackend:
+    """
+    Builds the configured storage backend.
+
+    Args:
+        backend (str): "supabase" or "sqlite"; defaults to the ALERTRX_DB_BACKEND environment variable.
+    """
+    backend = (backend or os.getenv("ALERTRX_DB_BACKEND", "supabase")).lower()
+    if backend == "supabase":
+        from src.database.db_manager import DBManager
+        return DBManager()
+    if backend == "sqlite":
+        from src.database.sqlite_manager import SQLiteDBManager
+        return SQLiteDBManager(os.getenv("ALERTRX_SQLITE_PATH"))
+    raise ValueError(f"Unknown storage backend '{backend}'. Use 'supabase' or 'sqlite'.")
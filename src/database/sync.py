@@ -0,0 +1,140 @@
+"""
+Long-lived in-process snapshot of the alerts, kept current by delta sync.
+
+Every write to 'alerts' and 'pharmacist_actions' stamps the row's 'updated_at'. A refresh
+asks the backend only for rows stamped since the newest one it has already seen
+(get_changes), merges the alerts into the snapshot DataFrame and reports the changed
+actions, so callers can drop what they cached about them. A refresh with nothing new costs
+one small indexed query per table, however many alerts are stored.
+
+Each request starts SYNC_OVERLAP_SECONDS before the watermark. A write that commits late,
+with an older stamp (a long transaction, another process), is still picked up; rows fetched
+again with the version already merged are dropped, so they are not reported as changes twice.
+Only the versions of rows inside the overlap window are remembered, as older rows cannot be
+fetched again.
+"""
+from __future__ import annotations
+
+import os
+import time
+import threading
+from datetime import timedelta
+
+from src.lazy_imports import lazy_import
+from src.database.storage import ALERT_DETAIL_COLUMNS, SYNC_TABLE_KEYS
+
+pd = lazy_import("pandas")
+
+SYNC_OVERLAP_SECONDS = 10.0
+# Refreshes closer together than this (e.g. many dashboard sessions polling) reuse the last one.
+DEFAULT_SYNC_INTERVAL_SECONDS = 15.0
+
+
+def merge_changes(current: pd.DataFrame, changes: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Returns `current` with the rows of `changes` added, replacing the rows with the same key."""
+    if changes.empty:
+        return current
+    changes = changes.drop_duplicates(subset=key, keep='last')
+    if current.empty:
+        return changes.reset_index(drop=True)
+    return pd.concat([current[~current[key].isin(changes[key])], changes], ignore_index=True)
+
+
+class AlertSnapshot:
+    """
+    Alerts (without their raw payload) of a storage backend, as a DataFrame that is updated
+    from deltas by refresh().
+
+    The DataFrame is replaced, never modified in place, on every refresh that finds changes,
+    so a frame read from the snapshot stays consistent while it is used. Safe to share between
+    Streamlit sessions.
+
+    Args:
+        db_manager: The storage backend to sync from.
+        alert_columns (list): Alert columns to keep (default: ALERT_DETAIL_COLUMNS).
+        min_refresh_seconds (float): Minimum time between two requests to the backend
+                                     (default: ALERTRX_SYNC_INTERVAL_SECONDS or 15).
+        overlap_seconds (float): How far before the watermark each request starts.
+    """
+
+    def __init__(self, db_manager, alert_columns: list = None, min_refresh_seconds: float = None,
+                 overlap_seconds: float = SYNC_OVERLAP_SECONDS):
+        self.db_manager = db_manager
+        self.alert_columns = alert_columns or ALERT_DETAIL_COLUMNS
+        if min_refresh_seconds is None:
+            min_refresh_seconds = float(os.getenv("ALERTRX_SYNC_INTERVAL_SECONDS", DEFAULT_SYNC_INTERVAL_SECONDS))
+        self.min_refresh_seconds = min_refresh_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.alerts = pd.DataFrame(columns=[*self.alert_columns, 'updated_at'])
+        self.watermarks = {}  # table -> newest updated_at merged so far
+        # table -> {key: updated_at merged}, for the rows inside the overlap window
+        self._versions = {table: {} for table in SYNC_TABLE_KEYS}
+        self.version = 0      # incremented by every refresh that changes the snapshot
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        Fetches the rows written since the last refresh and merges them in. Within
+        min_refresh_seconds of the previous refresh nothing is fetched, unless `force` is set.
+        The first refresh loads every alert but only the newest action's updated_at.
+
+        Returns:
+            dict: The rows fetched by this call, as DataFrames keyed by table name
+                  ('alerts', 'pharmacist_actions'); both are empty if nothing changed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            first_refresh = self._refreshed_at is None
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.min_refresh_seconds:
+                return {table: pd.DataFrame() for table in SYNC_TABLE_KEYS}
+            self._refreshed_at = now
+            changes = {}
+            for table, key in SYNC_TABLE_KEYS.items():
+                watermark = self.watermarks.get(table)
+                since = watermark - self.overlap if watermark is not None else None
+                if table == 'pharmacist_actions' and first_refresh:
+                    # Nothing is cached yet, so the actions written so far are of no interest:
+                    # start from the newest one rather than downloading the table.
+                    latest = self.db_manager.get_latest_update(table)
+                    if latest is not None:
+                        self.watermarks[table] = latest
+                        changes[table] = pd.DataFrame()
+                        continue
+                columns = self.alert_columns if table == 'alerts' else None
+                pages = list(self.db_manager.iter_changes(table, since=since, columns=columns))
+                if not pages:
+                    changes[table] = pd.DataFrame()
+                    continue
+                fetched = pd.concat(pages, ignore_index=True)
+                newest = fetched['updated_at'].max()
+                self.watermarks[table] = newest if watermark is None else max(watermark, newest)
+                versions = self._versions[table]
+                fetched = fetched[[versions.get(row_key) != updated_at
+                                   for row_key, updated_at in zip(fetched[key], fetched['updated_at'])]]
+                versions.update(zip(fetched[key], fetched['updated_at']))
+                # Rows stamped before the next request's start can't be fetched again.
+                cutoff = self.watermarks[table] - self.overlap
+                self._versions[table] = {row_key: updated_at for row_key, updated_at in versions.items()
+                                         if updated_at >= cutoff}
+                changes[table] = fetched.reset_index(drop=True)
+            if not changes['alerts'].empty:
+                alerts = merge_changes(self.alerts, changes['alerts'], 'alert_id')
+                if 'date_published' in alerts.columns:
+                    alerts = alerts.sort_values(['date_published', 'alert_id'], ascending=False,
+                                                na_position='last', ignore_index=True)
+                self.alerts = alerts
+            if any(not changes_df.empty for changes_df in changes.values()):
+                self.version += 1
+            return changes
+
+    def alerts_updated_since(self, since, severity=None) -> pd.DataFrame:
+        """Alerts of the snapshot written after `since` (a UTC timestamp), optionally of one severity, newest first."""
+        alerts = self.alerts
+        if alerts.empty:
+            return alerts
+        since = pd.Timestamp(since)
+        mask = alerts['updated_at'] > (since.tz_localize('UTC') if since.tzinfo is None else since)
+        if severity is not None:
+            mask &= alerts['severity'] == severity
+        return alerts[mask]
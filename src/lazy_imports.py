@@ -0,0 +1,37 @@
+"""
+Deferred imports of heavy third-party packages (pandas, numpy).
+
+    pd = lazy_import("pandas")
+
+returns a stand-in module that imports the real one on first attribute access, so importing a
+src module costs nothing until it actually touches pandas (the package is not even in
+sys.modules until then). Modules using this need `from __future__ import annotations`,
+otherwise annotations such as `-> pd.DataFrame` are evaluated at import time and load the
+package immediately.
+
+`python main.py imports` reports what each entry point imports and how long it takes.
+"""
+import sys
+import types
+import importlib
+import importlib.util
+
+
+class _LazyModule(types.ModuleType):
+    """Imports the module it stands for on first attribute access, then serves its attributes."""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the attributes directly and never come back here.
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str):
+    """Returns the module `name`, imported on first use (or the module itself if already imported)."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'")
+    return _LazyModule(name)
@@ -0,0 +1,255 @@
+"""
+Lightweight span-based instrumentation.
+
+A span times one operation (a Firecrawl request, a parse, a normalizer batch, a database
+call, a page render) and records its latency in a histogram, together with the rows and
+bytes it handled and whether it raised. Series are keyed by span name and labels, kept in
+process memory, and exported as Prometheus text or JSON lines.
+
+Instrumentation is off unless ALERTRX_METRICS=1 (or enable() is called). While off, span()
+returns a shared no-op object and instrumented functions call straight through, so the
+cost is one flag check per call. Set ALERTRX_METRICS_EXPORT to a file path (".prom" for
+Prometheus text, anything else for JSON lines) to write the metrics when the process exits.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from functools import wraps
+
+# Histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "alertrx_span"
+
+_enabled = os.getenv("ALERTRX_METRICS", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_series = {}  # (name, labels) -> _Series
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drops every recorded series."""
+    with _lock:
+        _series.clear()
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total_seconds", "max_seconds", "errors", "rows", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+
+def observe(name: str, seconds: float, rows: int = 0, nbytes: int = 0, error: bool = False, **labels):
+    """Records one finished operation, for durations measured elsewhere (e.g. in a worker process)."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = _Series()
+        series.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series.count += 1
+        series.total_seconds += seconds
+        series.max_seconds = max(series.max_seconds, seconds)
+        series.errors += int(error)
+        series.rows += rows
+        series.bytes += nbytes
+
+
+class _Span:
+    __slots__ = ("name", "labels", "rows", "nbytes", "_start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.rows = 0
+        self.nbytes = 0
+
+    def add_rows(self, rows: int):
+        self.rows += rows
+
+    def add_bytes(self, nbytes: int):
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Control-flow exceptions outside Exception (e.g. Streamlit's st.stop/st.rerun) are not errors.
+        error = exc_type is not None and issubclass(exc_type, Exception)
+        observe(self.name, time.perf_counter() - self._start, self.rows, self.nbytes, error, **self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add_rows(self, rows: int):
+        pass
+
+    def add_bytes(self, nbytes: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **labels):
+    """
+    Context manager timing a block:
+
+        with span("db.query_alerts", backend="sqlite") as s:
+            rows = ...
+            s.add_rows(len(rows))
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def count_rows(result) -> int:
+    """Row count of a typical return value: a DataFrame, list, (DataFrame, cursor) tuple or record dict."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if hasattr(result, "shape"):
+        return int(result.shape[0])
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return int(bool(result))
+    return 0
+
+
+def instrument(name: str, rows=count_rows, **labels):
+    """Decorator running every call of a function in a span; `rows` computes the row count from the result."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(name, **labels) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    s.add_rows(rows(result))
+                return result
+        return wrapper
+    return decorate
+
+
+def _quantile(series: _Series, q: float) -> float:
+    """Upper bound of the histogram bucket holding the q-quantile."""
+    target = q * series.count
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), series.buckets):
+        cumulative += count
+        if cumulative >= target:
+            return bound if bound != float("inf") else series.max_seconds
+    return series.max_seconds
+
+
+def snapshot() -> list:
+    """One summary dict per series: name, labels, count, errors, rows, bytes and latency statistics."""
+    with _lock:
+        items = [(key, series) for key, series in _series.items()]
+        return [{
+            "span": name,
+            "labels": dict(labels),
+            "count": series.count,
+            "errors": series.errors,
+            "rows": series.rows,
+            "bytes": series.bytes,
+            "total_seconds": round(series.total_seconds, 6),
+            "mean_seconds": round(series.total_seconds / series.count, 6) if series.count else 0.0,
+            "p50_seconds": _quantile(series, 0.5),
+            "p95_seconds": _quantile(series, 0.95),
+            "max_seconds": round(series.max_seconds, 6),
+        } for (name, labels), series in sorted(items)]
+
+
+def json_lines() -> str:
+    """The snapshot as JSON lines, each stamped with the export time."""
+    exported_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return "".join(json.dumps({"exported_at": exported_at, **item}) + "\n" for item in snapshot())
+
+
+def _label_text(labels: dict, extra: dict = None) -> str:
+    pairs = {**labels, **(extra or {})}
+    escaped = (f'{k}="{_escape_label(v)}"' for k, v in pairs.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text() -> str:
+    """All series in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted(_series.items())
+        lines = [
+            f"# HELP {METRIC_PREFIX}_duration_seconds Latency of instrumented operations.",
+            f"# TYPE {METRIC_PREFIX}_duration_seconds histogram",
+        ]
+        for (name, labels), series in items:
+            labels = {"span": name, **dict(labels)}
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), series.buckets):
+                cumulative += count
+                lines.append(f"{METRIC_PREFIX}_duration_seconds_bucket{_label_text(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}_duration_seconds_sum{_label_text(labels)} {series.total_seconds}")
+            lines.append(f"{METRIC_PREFIX}_duration_seconds_count{_label_text(labels)} {series.count}")
+        for metric, attribute, help_text in (("errors_total", "errors", "Instrumented operations that raised."),
+                                             ("rows_total", "rows", "Rows handled by instrumented operations."),
+                                             ("bytes_total", "bytes", "Bytes transferred by instrumented operations.")):
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} counter")
+            for (name, labels), series in items:
+                lines.append(f"{METRIC_PREFIX}_{metric}{_label_text({'span': name, **dict(labels)})} {getattr(series, attribute)}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str):
+    """Writes the metrics to a file: Prometheus text for ".prom" paths, otherwise appended JSON lines."""
+    try:
+        if path.endswith(".prom"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(prometheus_text())
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json_lines())
+    except OSError as e:
+        print(f"Error exporting metrics to {path}: {e}")
+
+
+if os.getenv("ALERTRX_METRICS_EXPORT"):
+    atexit.register(export, os.environ["ALERTRX_METRICS_EXPORT"])
@@ -0,0 +1,188 @@
+"""
+Streaming ingest pipeline: scraper -> source parser -> normalizer -> batched database writes.
+
+Every stage is a generator, so at most one batch of alerts (plus the scraper's bounded
+window of in-flight requests) is held in memory whatever the size of the crawl. Pages are
+only fetched as the writer asks for more, which gives natural backpressure when the
+database is slow.
+
+After each batch is written, the crawl state for its pages is recorded and a per-source
+checkpoint file is updated. If a run is interrupted, the next run resumes with the
+alerts that were still pending, rather than walking the alert list again.
+"""
+import os
+import json
+import time
+from itertools import islice
+
+from src.scraper import sources as sources_module
+from src.scraper.crawl_state import CrawlStateStore, page_content_hash, page_validators
+from src.processor.data_normalizer import process_alerts_to_dataframe
+from src.observability.metrics import span
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CHECKPOINT_DIR = os.path.join("data", "ingest_checkpoints")
+
+
+def batched(iterable, size: int):
+    """Yields lists of at most `size` items from an iterable, lazily."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class IngestCheckpoint:
+    """
+    Progress of one source's ingest run, stored as a small JSON file.
+
+    Holds the alert links discovered at the start of the run and the ones already written,
+    so an interrupted run can resume with only the remaining links.
+    """
+
+    def __init__(self, path: str, links: dict, done: list = None, started_at: float = None):
+        self.path = path
+        self.links = links
+        self.done = set(done or ())
+        self.started_at = started_at or time.time()
+
+    @classmethod
+    def path_for(cls, checkpoint_dir: str, source: dict) -> str:
+        safe_name = "".join(c if c.isalnum() else "_" for c in source["name"])
+        return os.path.join(checkpoint_dir, f"{safe_name}.json")
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the checkpoint of an unfinished run, or None."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return cls(path, data["links"], data.get("done"), data.get("started_at"))
+
+    def pending(self) -> dict:
+        return {link: alert_id for link, alert_id in self.links.items() if link not in self.done}
+
+    def mark_done(self, links):
+        self.done.update(links)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"links": self.links, "done": sorted(self.done), "started_at": self.started_at}, f)
+        os.replace(tmp_path, self.path)
+
+    def complete(self):
+        """Removes the checkpoint once the run has finished."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _page_state(page: dict) -> dict:
+    etag, last_modified = page_validators(page)
+    return {"content_hash": page_content_hash(page), "etag": etag, "last_modified": last_modified}
+
+
+def _complete_alert(raw_alert: dict, alert_id: str, url: str, source: dict) -> dict:
+    raw_alert.setdefault("alert_id", alert_id)
+    raw_alert.setdefault("source_url", url)
+    raw_alert.setdefault("source_name", source["name"])
+    return raw_alert
+
+
+def parse_pages(pages, source: dict, parser_pool=None):
+    """
+    Runs the source parser over (alert_id, url, page) tuples, in-process or on a ParserPool.
+
+    Yields (url, alert_id, page_state, raw_alert), where page_state is what has to be
+    recorded in the crawl state store once the alert is stored. The page itself is not
+    kept after parsing.
+    """
+    if parser_pool is None:
+        parser = sources_module.get_parser(source)
+        for alert_id, url, page in pages:
+            try:
+                with span("parser.parse", source=source["name"], pool="inline") as s:
+                    raw_alert = parser(page)
+                    s.add_rows(1)
+            except Exception as e:
+                print(f"Error parsing {url} for source '{source['name']}': {e}")
+                continue
+            yield url, alert_id, _page_state(page), _complete_alert(raw_alert, alert_id, url, source)
+        return
+
+    in_flight = {}
+
+    def pool_items():
+        for alert_id, url, page in pages:
+            in_flight[url] = (alert_id, _page_state(page))
+            yield source["name"], url, page
+
+    for _, url, raw_alert, _ in parser_pool.parse(pool_items()):
+        alert_id, page_state = in_flight.pop(url)
+        if raw_alert is not None:
+            yield url, alert_id, page_state, _complete_alert(raw_alert, alert_id, url, source)
+
+
+def ingest_source(scraper, db_manager, source: dict, state_store: CrawlStateStore, batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_workers: int = 4, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR, known_alert_ids=None,
+                  parser_pool=None, dedup_index=None) -> dict:
+    """
+    Ingests new and changed alerts from one source into the database.
+    Pass a ParserPool to parse pages in worker processes, and a NearDuplicateIndex to mark
+    alerts already published by another source with a canonical_alert_id (the index is
+    updated in memory; save it after the run).
+
+    Returns:
+        dict: Run statistics: 'source', 'resumed', 'discovered', 'written', 'duplicates',
+              'batches', 'failed_chunks' and 'seconds'. The run stops at the first batch that fails
+              to write, leaving the checkpoint in place for the next run.
+    """
+    started = time.perf_counter()
+    checkpoint_path = IngestCheckpoint.path_for(checkpoint_dir, source)
+    checkpoint = IngestCheckpoint.load(checkpoint_path)
+    resumed = checkpoint is not None
+    if checkpoint is None:
+        links = scraper.discover_new_alert_links(source, state_store, known_alert_ids)
+        checkpoint = IngestCheckpoint(checkpoint_path, links)
+        checkpoint.save()
+
+    stats = {"source": source["name"], "resumed": resumed, "discovered": len(checkpoint.links),
+             "written": 0, "duplicates": 0, "batches": 0, "failed_chunks": []}
+    pages = scraper.scrape_alert_pages(checkpoint.pending(), state_store, max_workers=max_workers)
+    for batch in batched(parse_pages(pages, source, parser_pool), batch_size):
+        alerts_df = process_alerts_to_dataframe([raw_alert for _, _, _, raw_alert in batch], dedup_index=dedup_index)
+        report = db_manager.insert_alerts(alerts_df, chunk_size=batch_size)
+        failed = [chunk for chunk in report if not chunk["ok"]]
+        if failed:
+            stats["failed_chunks"].extend(failed)
+            print(f"Ingest of '{source['name']}' stopped: a batch failed to write ({failed[0]['error']}).")
+            break
+        for url, alert_id, page_state, _ in batch:
+            state_store.record(url, page_state["content_hash"], alert_id=alert_id,
+                               etag=page_state["etag"], last_modified=page_state["last_modified"])
+        checkpoint.mark_done(url for url, _, _, _ in batch)
+        stats["written"] += len(batch)
+        if dedup_index is not None:
+            stats["duplicates"] += int(alerts_df['canonical_alert_id'].notna().sum())
+        stats["batches"] += 1
+    else:
+        checkpoint.complete()
+
+    if parser_pool is not None:
+        stats["parse"] = parser_pool.timing_report().get(source["name"])
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def ingest_all(scraper, db_manager, state_store: CrawlStateStore, sources: list = None, **kwargs) -> list:
+    """Runs ingest_source for every configured source (default: MEDICAL_ALERT_SOURCES) and returns their stats."""
+    sources = sources_module.MEDICAL_ALERT_SOURCES if sources is None else sources
+    return [ingest_source(scraper, db_manager, source, state_store, **kwargs) for source in sources]
@@ -0,0 +1,267 @@
+"""
+Background ingest scheduler, run as its own process (`python main.py worker`) so that
+scraping, parsing and database writes never compete with the Streamlit app for CPU.
+
+Every source is refreshed on its own interval (the source's `schedule_minutes`), with random
+jitter so sources configured with the same interval do not all fire together. A failed run
+is retried after an exponential backoff instead of the full interval. At most
+`max_concurrent_jobs` sources are ingested at once, and each run holds a per-source lock
+file, so a source is never ingested by two runs at the same time (not even by a one-off
+`python main.py ingest` started next to the worker).
+
+Each finished run appends one JSON line to the run log (ALERTRX_INGEST_RUN_LOG, default
+data/ingest_runs.jsonl) with its status, timings and ingest stats. On restart the worker
+reads the log to carry on with each source's schedule instead of re-crawling everything.
+"""
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.scraper import sources as sources_module
+from src.observability.metrics import observe
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+# Random share of the interval added to or removed from each scheduled run.
+DEFAULT_JITTER = 0.1
+DEFAULT_BACKOFF_MINUTES = 5
+DEFAULT_MAX_BACKOFF_MINUTES = 6 * 60
+DEFAULT_LOCK_DIR = os.path.join("data", "ingest_locks")
+DEFAULT_RUN_LOG_PATH = os.path.join("data", "ingest_runs.jsonl")
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec="seconds")
+
+
+class SourceLock:
+    """
+    Non-blocking, per-source lock file. The OS releases it if the process dies, so a crashed
+    run never leaves a source locked.
+    """
+
+    def __init__(self, lock_dir: str, source_name: str):
+        safe_name = "".join(c if c.isalnum() else "_" for c in source_name)
+        self.path = os.path.join(lock_dir, f"{safe_name}.lock")
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Takes the lock; returns False if another run holds it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def read_last_runs(run_log_path: str) -> dict:
+    """Returns the last run log record of every source, {source_name: record}."""
+    last_runs = {}
+    try:
+        with open(run_log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                last_runs[record.get("source")] = record
+    except FileNotFoundError:
+        pass
+    return last_runs
+
+
+class IngestScheduler:
+    """
+    Runs `run_job(source) -> stats dict` for each source on its schedule.
+
+    A run fails if run_job raises or its stats list 'failed_chunks'. After n consecutive
+    failures the source is retried in backoff_minutes * 2**(n-1) minutes (capped at
+    max_backoff_minutes, and never later than its regular interval).
+    """
+
+    def __init__(self, run_job, sources: list = None, max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_JOBS,
+                 jitter: float = DEFAULT_JITTER, backoff_minutes: float = DEFAULT_BACKOFF_MINUTES,
+                 max_backoff_minutes: float = DEFAULT_MAX_BACKOFF_MINUTES, lock_dir: str = DEFAULT_LOCK_DIR,
+                 run_log_path: str = None, rng: random.Random = None):
+        self.run_job = run_job
+        self.sources = list(sources_module.MEDICAL_ALERT_SOURCES if sources is None else sources)
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.jitter = jitter
+        self.backoff_minutes = backoff_minutes
+        self.max_backoff_minutes = max_backoff_minutes
+        self.lock_dir = lock_dir
+        self.run_log_path = run_log_path or os.getenv("ALERTRX_INGEST_RUN_LOG", DEFAULT_RUN_LOG_PATH)
+        self.rng = rng or random.Random()
+        self.failures = {source["name"]: 0 for source in self.sources}
+        self.next_run_at = {source["name"]: 0.0 for source in self.sources}
+        self._stop = threading.Event()
+        self._log_lock = threading.Lock()
+
+    def _interval_seconds(self, source: dict) -> float:
+        return source.get("schedule_minutes", sources_module.DEFAULT_SCHEDULE_MINUTES) * 60
+
+    def next_delay(self, source: dict) -> float:
+        """Seconds until the source's next run: its interval, or the backoff after failures, with jitter."""
+        interval = self._interval_seconds(source)
+        failures = self.failures[source["name"]]
+        if failures:
+            interval = min(interval, self.max_backoff_minutes * 60, self.backoff_minutes * 60 * 2 ** (failures - 1))
+        return max(0.0, interval * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    def resume_schedule(self):
+        """Takes each source's next run time and failure count from the run log; sources never run start within seconds."""
+        last_runs = read_last_runs(self.run_log_path)
+        now = time.time()
+        for source in self.sources:
+            record = last_runs.get(source["name"])
+            if record is None:
+                # Spread the first runs a little, so a fresh worker does not start every source at once.
+                self.next_run_at[source["name"]] = now + self.rng.uniform(0, self.jitter * 60)
+                continue
+            self.failures[source["name"]] = record.get("failures", 0)
+            self.next_run_at[source["name"]] = record.get("next_run_epoch", now)
+
+    def run_source(self, source: dict) -> dict:
+        """Runs one source under its lock, updates its schedule and returns the run record."""
+        name = source["name"]
+        started = time.time()
+        record = {"source": name, "started_at": _timestamp(started)}
+        lock = SourceLock(self.lock_dir, name)
+        if not lock.acquire():
+            # Another process is ingesting this source; try again after a short backoff.
+            record.update(status="locked", seconds=0.0)
+            self.next_run_at[name] = started + self.backoff_minutes * 60
+            return self._finish(record, started)
+        try:
+            stats = self.run_job(source)
+            failed = bool(stats.get("failed_chunks"))
+            record.update(status="failed" if failed else "ok", stats=stats)
+            if failed:
+                record["error"] = stats["failed_chunks"][0].get("error")
+        except Exception as e:
+            print(f"Ingest of '{name}' failed: {e}")
+            record.update(status="failed", error=str(e))
+        finally:
+            lock.release()
+        self.failures[name] = self.failures[name] + 1 if record["status"] == "failed" else 0
+        self.next_run_at[name] = time.time() + self.next_delay(source)
+        return self._finish(record, started)
+
+    def _finish(self, record: dict, started: float) -> dict:
+        finished = time.time()
+        name = record["source"]
+        record.update(finished_at=_timestamp(finished), seconds=round(finished - started, 3),
+                      failures=self.failures[name], next_run_at=_timestamp(self.next_run_at[name]),
+                      next_run_epoch=self.next_run_at[name])
+        observe("ingest.run", finished - started, rows=(record.get("stats") or {}).get("written", 0),
+                error=record["status"] == "failed", source=name)
+        self._log(record)
+        print(f"Ingest of '{name}': {record['status']} in {record['seconds']}s, "
+              f"{(record.get('stats') or {}).get('written', 0)} alerts written, next run at {record['next_run_at']}.")
+        return record
+
+    def _log(self, record: dict):
+        try:
+            os.makedirs(os.path.dirname(self.run_log_path) or ".", exist_ok=True)
+            with self._log_lock, open(self.run_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Error writing ingest run log {self.run_log_path}: {e}")
+
+    def run_once(self) -> list:
+        """Runs every source once (at most max_concurrent_jobs at a time) and returns the run records."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
+            return list(executor.map(self.run_source, self.sources))
+
+    def run_forever(self, poll_seconds: float = 30.0):
+        """Runs sources as they become due until stop() is called."""
+        self.resume_schedule()
+        by_name = {source["name"]: source for source in self.sources}
+        running = {}  # future -> source name
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
+            while not self._stop.is_set():
+                now = time.time()
+                due = sorted((at, name) for name, at in self.next_run_at.items()
+                             if at <= now and name not in running.values())
+                for _, name in due[:self.max_concurrent_jobs - len(running)]:
+                    running[executor.submit(self.run_source, by_name[name])] = name
+                timeout = poll_seconds
+                if len(running) < self.max_concurrent_jobs:
+                    waiting = [at for name, at in self.next_run_at.items() if name not in running.values()]
+                    timeout = min([poll_seconds] + [max(0.0, at - now) for at in waiting])
+                if running:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.pop(future)
+                else:
+                    self._stop.wait(timeout)
+            # Runs in progress finish (and release their locks) before the worker exits.
+            wait(running)
+
+    def stop(self):
+        self._stop.set()
+
+
+def build_ingest_job(parser_workers: int = 0, max_workers: int = 4):
+    """
+    Builds run_job(source) for the configured database, Firecrawl scraper and crawl state
+    store. Alerts are checked against the near-duplicate index (loaded from disk, or built
+    from the stored alerts the first time), which is saved after every run.
+    """
+    from src.database.storage import create_db_manager
+    from src.processor.dedup_index import NearDuplicateIndex, DEFAULT_INDEX_PATH
+    from src.pipeline.ingest import ingest_source
+    from src.scraper.crawl_state import CrawlStateStore
+    from src.scraper.firecrawl_scraper import FirecrawlScraper
+    from src.scraper.parser_pool import ParserPool
+    import pandas as pd
+
+    db_manager = create_db_manager()
+    scraper = FirecrawlScraper()
+    state_store = CrawlStateStore()
+    index_path = os.getenv("ALERTRX_DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH)
+    dedup_index = NearDuplicateIndex.load(index_path)
+    if dedup_index is None:
+        pages = list(db_manager.iter_alerts(columns=['alert_id', 'title', 'summary', 'source_name', 'date_published']))
+        dedup_index = NearDuplicateIndex.build_from_alerts(pd.concat(pages) if pages else pd.DataFrame())
+    parser_pool = ParserPool(max_workers=parser_workers) if parser_workers else None
+
+    def run_job(source: dict) -> dict:
+        stats = ingest_source(scraper, db_manager, source, state_store, max_workers=max_workers,
+                              parser_pool=parser_pool, dedup_index=dedup_index)
+        dedup_index.save(index_path)
+        return stats
+
+    return run_job
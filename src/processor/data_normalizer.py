@@ -1,4 +1,9 @@
-import pandas as pd
+from __future__ import annotations
+
+from src.lazy_imports import lazy_import
+from src.observability.metrics import instrument
+
+pd = lazy_import("pandas")
 
 # Define the common schema for medical alerts
 # This schema should be comprehensive enough to capture all relevant information
@@ -40,30 +45,65 @@ def normalize_alert_data(raw_alert_data: dict) -> dict:
     }
     return normalized_data
 
-def process_alerts_to_dataframe(list_of_raw_alerts: list) -> pd.DataFrame:
+# Fields copied from the raw alert, with the default used when a field is missing.
+STRING_FIELD_DEFAULTS = {
+    "alert_id": "",
+    "title": "",
+    "severity": "Medium",
+    "summary": "",
+    "source_url": "",
+    "source_name": "",
+}
+LIST_FIELDS = ("affected_products", "recommendations")
+# Low-cardinality columns stored as pandas categoricals to save memory on large backfills.
+CATEGORICAL_FIELDS = ("severity", "source_name")
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value] if value is not None else []
+
+@instrument("normalizer.process_alerts_to_dataframe")
+def process_alerts_to_dataframe(list_of_raw_alerts: list, dedup_index=None) -> pd.DataFrame:
     """
     Processes a list of raw alert dictionaries and returns a pandas DataFrame.
 
+    Builds each column directly from the raw alerts instead of normalizing one dict per
+    alert: dates are parsed in a single vectorized pass, `severity` and `source_name` are
+    categoricals, and list values are reused rather than copied.
+
     Args:
         list_of_raw_alerts (list): A list of dictionaries, each representing a raw alert.
+        dedup_index (NearDuplicateIndex): If given, each alert is checked against (and added to)
+            the index, and a 'canonical_alert_id' column names the alert it duplicates (None if none).
 
     Returns:
         pd.DataFrame: A DataFrame where each row is a normalized medical alert.
     """
-    normalized_alerts = [normalize_alert_data(alert) for alert in list_of_raw_alerts]
-    df = pd.DataFrame(normalized_alerts)
-
-    # Ensure correct data types
-    for col, dtype in MEDICAL_ALERT_SCHEMA.items():
-        if col in df.columns:
-            if str(dtype).startswith("datetime"):
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-            elif dtype == list:
-                # Ensure list type, handle non-list inputs gracefully
-                df[col] = df[col].apply(lambda x: x if isinstance(x, list) else [x] if x is not None else [])
-            else:
-                df[col] = df[col].astype(dtype, errors='ignore')
-    return df
+    raw_alerts = list_of_raw_alerts if isinstance(list_of_raw_alerts, list) else list(list_of_raw_alerts)
+    if not raw_alerts:
+        return pd.DataFrame()
+
+    columns = {}
+    for col in MEDICAL_ALERT_SCHEMA:
+        if col == "date_published":
+            # format='mixed' parses each value on its own, as per-alert normalization did. Dates
+            # with a UTC offset are converted to UTC, then all dates are stored naive.
+            columns[col] = pd.to_datetime(
+                pd.Series([alert.get(col) for alert in raw_alerts], dtype=object),
+                errors='coerce', format='mixed', utc=True
+            ).dt.tz_localize(None)
+        elif col in LIST_FIELDS:
+            columns[col] = pd.Series([_as_list(alert.get(col, [])) for alert in raw_alerts], dtype=object)
+        elif col == "raw_data":
+            columns[col] = pd.Series(raw_alerts, dtype=object)
+        else:
+            default = STRING_FIELD_DEFAULTS[col]
+            values = [alert.get(col, default) for alert in raw_alerts]
+            values = [v if type(v) is str else str(v) for v in values]
+            columns[col] = pd.Categorical(values) if col in CATEGORICAL_FIELDS else pd.Series(values, dtype=object)
+    alerts_df = pd.DataFrame(columns)
+    if dedup_index is not None:
+        alerts_df['canonical_alert_id'] = dedup_index.assign_canonical_ids(alerts_df)
+    return alerts_df
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,219 @@
+"""
+Near-duplicate detection for alerts that appear on several sources with slightly different
+titles and URLs.
+
+Each alert's title and summary are reduced to character shingles and summarised by a MinHash
+signature. Signatures are split into bands and indexed with locality-sensitive hashing, so
+checking a new alert only compares it with the few alerts that share a band bucket, not
+with the whole archive. Matches are grouped under the ID of the first alert seen in the
+cluster (the canonical ID). Only alerts of different sources are matched: two alerts of one
+source are distinct publications, however alike their text (e.g. the same drug's advice for
+male and for female patients). Alerts with almost no text are always their own canonical alert.
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+import threading
+
+from src.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_INDEX_PATH = os.path.join("data", "dedup_index.npz")
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+SHINGLE_SIZE = 5
+# Alerts with fewer shingles than this (an empty or placeholder title such as "No Title" and no
+# summary) carry too little text to compare: they are never indexed nor matched.
+MIN_SHINGLES = 8
+
+# Plain ints (numpy casts them to the uint64/uint32 of the arrays they meet), so importing
+# this module does not load numpy.
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Character shingles of the text, lowercased with punctuation and repeated spaces collapsed."""
+    normalized = _NON_ALNUM.sub(" ", text.lower()).strip()
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over alert title + summary.
+
+    With the default 16 bands of 8 rows, alerts whose shingle sets have a Jaccard similarity
+    above roughly 0.7 are very likely to become candidates. Candidates are then confirmed
+    against `threshold` using the estimated similarity of their signatures.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 bands: int = DEFAULT_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+        self._buckets = [dict() for _ in range(bands)]
+        self._alert_ids = []
+        self._sources = []  # source_name of each indexed alert, by position
+        self._positions = {}
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)  # grown by doubling
+        self._canonical = {}
+        self._lock = threading.Lock()  # add() and save() may run on concurrent ingest jobs
+
+    def __len__(self):
+        return len(self._alert_ids)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._positions
+
+    def signature(self, title: str, summary: str = "") -> np.ndarray:
+        """MinHash signature (num_perm uint32 values) of an alert's title and summary."""
+        return self._signature(shingles(f"{title or ''} {summary or ''}"))
+
+    def _signature(self, tokens: set) -> np.ndarray:
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64, count=len(tokens))
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query_signature(self, signature: np.ndarray, source_name: str = None) -> list:
+        """
+        Returns [(alert_id, estimated_similarity)] of indexed alerts above the threshold, best
+        first. With a source_name, alerts of that source and alerts whose canonical alert is of
+        that source are left out.
+        """
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        if source_name is not None:
+            candidates = {p for p in candidates
+                          if (source_name or "") not in (self._sources[p], self._source_of(self._canonical[self._alert_ids[p]]))}
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = (self._signatures[positions] == signature).mean(axis=1)
+        matches = [(self._alert_ids[p], float(s)) for p, s in zip(positions, similarities) if s >= self.threshold]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def _insert(self, alert_id: str, canonical_id: str, signature: np.ndarray, source_name: str = ""):
+        position = len(self._alert_ids)
+        if position == len(self._signatures):
+            grown = np.empty((2 * len(self._signatures), self.num_perm), dtype=np.uint32)
+            grown[:position] = self._signatures
+            self._signatures = grown
+        self._signatures[position] = signature
+        self._alert_ids.append(alert_id)
+        self._sources.append(source_name or "")
+        self._positions[alert_id] = position
+        self._canonical[alert_id] = canonical_id
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def _source_of(self, alert_id: str) -> str:
+        return self._sources[self._positions[alert_id]]
+
+    def query(self, title: str, summary: str = "", source_name: str = None) -> list:
+        tokens = shingles(f"{title or ''} {summary or ''}")
+        if len(tokens) < MIN_SHINGLES:
+            return []
+        return self.query_signature(self._signature(tokens), source_name)
+
+    def add(self, alert_id: str, title: str, summary: str = "", signature: np.ndarray = None,
+            source_name: str = "") -> str:
+        """
+        Indexes an alert and returns its canonical ID: the canonical ID of its best match from
+        another source, or its own ID if it has no near-duplicate. Re-adding a known alert is a
+        no-op. An alert with fewer than MIN_SHINGLES shingles is not indexed and keeps its own ID.
+        """
+        if alert_id in self._positions:
+            return self._canonical[alert_id]
+        if signature is None:
+            tokens = shingles(f"{title or ''} {summary or ''}")
+            if len(tokens) < MIN_SHINGLES:
+                return alert_id
+            signature = self._signature(tokens)
+        with self._lock:
+            if alert_id in self._positions:
+                return self._canonical[alert_id]
+            matches = self.query_signature(signature, source_name or "")
+            canonical_id = self._canonical[matches[0][0]] if matches else alert_id
+            self._insert(alert_id, canonical_id, signature, source_name)
+        return canonical_id
+
+    def canonical_id(self, alert_id: str) -> str:
+        return self._canonical.get(alert_id, alert_id)
+
+    def assign_canonical_ids(self, alerts_df: pd.DataFrame) -> pd.Series:
+        """
+        Adds every alert of a DataFrame to the index (in row order) and returns a Series of
+        canonical IDs aligned with it: None for alerts that are their own canonical alert.
+        """
+        summaries = alerts_df['summary'] if 'summary' in alerts_df.columns else [""] * len(alerts_df)
+        sources = alerts_df['source_name'] if 'source_name' in alerts_df.columns else [""] * len(alerts_df)
+        canonical = []
+        for alert_id, title, summary, source_name in zip(alerts_df['alert_id'], alerts_df['title'], summaries, sources):
+            canonical_id = self.add(alert_id, title, summary, source_name=source_name if isinstance(source_name, str) else "")
+            canonical.append(None if canonical_id == alert_id else canonical_id)
+        return pd.Series(canonical, index=alerts_df.index, name='canonical_alert_id', dtype=object)
+
+    def save(self, path: str = DEFAULT_INDEX_PATH):
+        """Saves the index; LSH buckets are rebuilt from the signatures on load."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        with self._lock:
+            np.savez_compressed(
+                tmp_path,
+                alert_ids=np.array(self._alert_ids, dtype=str),
+                canonical_ids=np.array([self._canonical[a] for a in self._alert_ids], dtype=str),
+                sources=np.array(self._sources, dtype=str),
+                signatures=self._signatures[:len(self._alert_ids)],
+                params=np.array([self.threshold, self.num_perm, self.bands]),
+                a=self._a, b=self._b,
+            )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH):
+        """Loads a saved index, or returns None if there is none or it predates source matching."""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path, allow_pickle=False)
+        if "sources" not in data.files:
+            return None
+        threshold, num_perm, bands = data["params"]
+        index = cls(threshold=float(threshold), num_perm=int(num_perm), bands=int(bands))
+        index._a, index._b = data["a"], data["b"]
+        for alert_id, canonical_id, signature, source_name in zip(data["alert_ids"].tolist(), data["canonical_ids"].tolist(),
+                                                                  data["signatures"], data["sources"].tolist()):
+            index._insert(alert_id, canonical_id, signature, source_name)
+        return index
+
+    @classmethod
+    def build_from_alerts(cls, alerts_df: pd.DataFrame, **kwargs):
+        """Builds an index from stored alerts (oldest first, so the earliest alert becomes canonical)."""
+        index = cls(**kwargs)
+        if not alerts_df.empty:
+            if 'date_published' in alerts_df.columns:
+                alerts_df = alerts_df.sort_values('date_published', na_position='last', kind='stable')
+            index.assign_canonical_ids(alerts_df)
+        return index
@@ -0,0 +1,341 @@
+"""
+Matches alerts' affected products against the surgeries' medication exports, to suggest how
+many patients each alert affects per surgery.
+
+Product names and prescription descriptions are normalized to word tokens and drug-name
+synonyms (brand -> generic) are expanded, so "Epilim 200mg gastro-resistant tablets" matches
+an alert about "sodium valproate". All alerts' products are compiled into one word-level
+Aho-Corasick automaton, and each distinct prescription description is scanned once,
+whatever the number of rows or alerts.
+
+Exports are CSV or Parquet files named after the surgery (e.g.
+data/medication_exports/Earls-Court-Surgery.csv), read in chunks so millions of rows never
+sit in memory at once. Each row needs a drug description column and, to count patients
+rather than prescriptions, a patient identifier column.
+"""
+from __future__ import annotations
+
+import os
+import re
+import csv
+from collections import deque, defaultdict
+
+from src.lazy_imports import lazy_import
+from src.database.storage import SURGERIES
+
+pd = lazy_import("pandas")
+
+DEFAULT_EXPORT_DIR = os.path.join("data", "medication_exports")
+DEFAULT_DRUG_COLUMN = "drug"
+DEFAULT_PATIENT_COLUMN = "patient_id"
+DEFAULT_CHUNK_ROWS = 250_000
+EXPORT_EXTENSIONS = (".csv", ".parquet")
+
+# Brand and alternative names mapped to the generic name used in alerts. Extend it with a CSV of
+# "name,generic" rows in ALERTRX_DRUG_SYNONYMS_PATH.
+DEFAULT_SYNONYMS = {
+    "epilim": "sodium valproate",
+    "depakote": "valproate semisodium",
+    "convulex": "valproic acid",
+    "episenta": "sodium valproate",
+    "roaccutane": "isotretinoin",
+    "singulair": "montelukast",
+    "topamax": "topiramate",
+    "propecia": "finasteride",
+    "proscar": "finasteride",
+    "glucophage": "metformin",
+    "eltroxin": "levothyroxine",
+    "coumadin": "warfarin",
+    "eliquis": "apixaban",
+    "xarelto": "rivaroxaban",
+    "ozempic": "semaglutide",
+    "wegovy": "semaglutide",
+    "lyrica": "pregabalin",
+    "neurontin": "gabapentin",
+    "zydol": "tramadol",
+    "provigil": "modafinil",
+    "plaquenil": "hydroxychloroquine",
+    "clozaril": "clozapine",
+    "lamictal": "lamotrigine",
+    "cellcept": "mycophenolate mofetil",
+    "prolia": "denosumab",
+    "xeljanz": "tofacitinib",
+    "ciproxin": "ciprofloxacin",
+    "tavanic": "levofloxacin",
+}
+# Words describing form or packaging, dropped from alert product names ("valproate medicines").
+GENERIC_WORDS = frozenset(
+    "medicine medicines product products tablet tablets capsule capsules oral solution suspension "
+    "injection injections cream creams gel ointment mg mcg ml g modified release gastro resistant "
+    "film coated all containing".split()
+)
+# Salts that alerts and prescriptions name inconsistently; a pattern without them also matches.
+SALT_WORDS = frozenset("sodium potassium calcium magnesium hydrochloride hyclate semisodium mofetil".split())
+# Anions and other salt parts that are no drug name on their own: "calcium carbonate" without its
+# salt would match "lithium carbonate", so such names only match in full.
+ANION_WORDS = frozenset(
+    "carbonate bicarbonate chloride citrate sulfate sulphate acetate phosphate gluconate lactate "
+    "hydroxide oxide bromide iodide nitrate fumarate succinate tartrate maleate".split()
+)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Separators between alternative names within one product, e.g. "Isotretinoin (Roaccutane)".
+_NAME_SEPARATORS = re.compile(r"[(),;/]|\bor\b")
+
+
+def normalize_drug_name(text) -> tuple:
+    """Lowercased word tokens of a drug name or description."""
+    if not isinstance(text, str):
+        return ()
+    return tuple(_WORD_PATTERN.findall(text.lower()))
+
+
+def without_salts(words: tuple) -> tuple:
+    """A name's words without SALT_WORDS, or () if only salts and anions would remain."""
+    remaining = tuple(word for word in words if word not in SALT_WORDS)
+    return remaining if any(word not in ANION_WORDS for word in remaining) else ()
+
+
+def load_synonyms(path: str = None) -> dict:
+    """DEFAULT_SYNONYMS plus the "name,generic" rows of a CSV file, with normalized keys."""
+    synonyms = dict(DEFAULT_SYNONYMS)
+    path = path or os.getenv("ALERTRX_DRUG_SYNONYMS_PATH")
+    if path:
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 2 and row[0].strip() and row[0].strip().lower() != "name":
+                        synonyms[row[0].strip().lower()] = row[1].strip().lower()
+        except OSError as e:
+            print(f"Error reading drug synonyms from {path}: {e}")
+    return {" ".join(normalize_drug_name(name)): " ".join(normalize_drug_name(generic)) for name, generic in synonyms.items()}
+
+
+class WordAutomaton:
+    """Aho-Corasick automaton over word tokens: finds every pattern (a word sequence) in a token sequence."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        self._built = False
+
+    def add(self, words: tuple, value):
+        if not words:
+            return
+        state = 0
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][word] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(value)
+        self._built = False
+
+    def build(self):
+        """Computes failure links breadth-first; called automatically before the first search."""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(word, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+        self._built = True
+
+    def search(self, words) -> set:
+        """Values of all patterns occurring in the word sequence."""
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class ProductMatcher:
+    """
+    Matches prescription descriptions against the affected products of many alerts at once.
+
+    Args:
+        alerts: A DataFrame or iterable of dicts with 'alert_id' and 'affected_products'.
+        synonyms (dict): Normalized name -> generic name; defaults to load_synonyms().
+    """
+
+    def __init__(self, alerts, synonyms: dict = None):
+        self.synonyms = load_synonyms() if synonyms is None else synonyms
+        self._generic_names = defaultdict(set)  # generic (with and without salt) -> brand names
+        for name, generic in self.synonyms.items():
+            self._generic_names[generic].add(name)
+            generic_without_salts = without_salts(tuple(generic.split()))
+            if generic_without_salts:
+                self._generic_names[" ".join(generic_without_salts)].add(name)
+        self._automaton = WordAutomaton()
+        self.alert_ids = []
+        if isinstance(alerts, pd.DataFrame):
+            alerts = alerts.to_dict("records")
+        for alert in alerts:
+            products = alert.get("affected_products") or []
+            if isinstance(products, str):
+                products = [products]
+            patterns = set()
+            for product in products:
+                for name in _NAME_SEPARATORS.split(product):
+                    patterns |= self._product_patterns(name)
+            for pattern in patterns:
+                self._automaton.add(pattern, alert["alert_id"])
+            if patterns:
+                self.alert_ids.append(alert["alert_id"])
+        self._cache = {}
+
+    def _product_patterns(self, product: str) -> set:
+        """Word patterns for one product name: the name itself, without salts, and its synonyms and brands."""
+        words = tuple(word for word in normalize_drug_name(product) if word not in GENERIC_WORDS and not word.isdigit())
+        if not words:
+            return set()
+        names = {words}
+        salt_free = without_salts(words)
+        if salt_free:
+            names.add(salt_free)
+        for name in list(names):
+            joined = " ".join(name)
+            generic = self.synonyms.get(joined, joined)
+            names.add(tuple(generic.split()))
+            names.update(tuple(brand.split()) for brand in self._generic_names.get(generic, ()))
+        return names
+
+    def match(self, description: str) -> tuple:
+        """Alert IDs whose products appear in a prescription description (memoized)."""
+        matched = self._cache.get(description)
+        if matched is None:
+            matched = tuple(sorted(self._automaton.search(normalize_drug_name(description))))
+            self._cache[description] = matched
+        return matched
+
+    def count_patients(self, chunks, drug_column: str = DEFAULT_DRUG_COLUMN,
+                       patient_column: str = DEFAULT_PATIENT_COLUMN) -> dict:
+        """
+        Counts distinct patients (or prescriptions, without a patient column) per alert in
+        chunks of one surgery's export.
+
+        Returns:
+            dict: {alert_id: count} for alerts with at least one match.
+        """
+        patients = defaultdict(set)
+        prescriptions = defaultdict(int)
+        for chunk in chunks:
+            descriptions = chunk[drug_column]
+            matches = descriptions.map({d: self.match(d) for d in descriptions.unique()})
+            hits = matches.str.len() > 0
+            if not hits.any():
+                continue
+            if patient_column in chunk.columns:
+                pairs = (pd.DataFrame({"alert_id": matches[hits], "patient": chunk.loc[hits, patient_column]})
+                         .explode("alert_id").drop_duplicates())
+                for alert_id, group in pairs.groupby("alert_id", sort=False)["patient"]:
+                    patients[alert_id].update(group)
+            else:
+                for alert_id, count in matches[hits].explode().value_counts().items():
+                    prescriptions[alert_id] += int(count)
+        counts = {alert_id: len(ids) for alert_id, ids in patients.items()}
+        for alert_id, count in prescriptions.items():
+            counts[alert_id] = counts.get(alert_id, 0) + count
+        return counts
+
+
+def iter_export_chunks(path: str, columns: list, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """Streams a CSV or Parquet export as DataFrames of at most chunk_rows rows, reading only `columns`."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # only needed for Parquet exports
+        parquet_file = pq.ParquetFile(path)
+        available = [c for c in columns if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=available):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=lambda c: c in columns, dtype=str, chunksize=chunk_rows)
+
+
+def find_surgery_exports(export_dir: str = None) -> dict:
+    """Maps each surgery with an export file in export_dir (named after the surgery) to its path."""
+    export_dir = export_dir or os.getenv("ALERTRX_MEDICATION_EXPORT_DIR", DEFAULT_EXPORT_DIR)
+    if not os.path.isdir(export_dir):
+        return {}
+    exports = {}
+    for filename in sorted(os.listdir(export_dir)):
+        stem, extension = os.path.splitext(filename)
+        if extension in EXPORT_EXTENSIONS and stem in SURGERIES:
+            exports[stem] = os.path.join(export_dir, filename)
+    return exports
+
+
+def suggest_patient_counts(alerts, export_dir: str = None, drug_column: str = DEFAULT_DRUG_COLUMN,
+                           patient_column: str = DEFAULT_PATIENT_COLUMN, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Suggested number of affected patients per alert and surgery, from the surgeries' exports.
+
+    Args:
+        alerts: A DataFrame or iterable of dicts with 'alert_id' and 'affected_products'.
+        export_dir (str): Directory of per-surgery exports (default: ALERTRX_MEDICATION_EXPORT_DIR
+                          or data/medication_exports).
+
+    Returns:
+        dict: {alert_id: {surgery: count}}, listing every surgery that has an export.
+    """
+    matcher = ProductMatcher(alerts)
+    exports = find_surgery_exports(export_dir)
+    suggestions = {alert_id: {surgery: 0 for surgery in exports} for alert_id in matcher.alert_ids}
+    for surgery, path in exports.items():
+        try:
+            counts = matcher.count_patients(iter_export_chunks(path, [drug_column, patient_column], chunk_rows),
+                                            drug_column, patient_column)
+        except Exception as e:
+            print(f"Error reading medication export {path}: {e}")
+            continue
+        for alert_id, count in counts.items():
+            suggestions[alert_id][surgery] = count
+    return suggestions
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    # Synthetic exports: 12 surgeries x 250k prescription rows.
+    rng = random.Random(0)
+    descriptions = [f"{drug} {dose}mg {form}" for drug in
+                    ["Sodium valproate", "Epilim", "Isotretinoin", "Metformin", "Ramipril", "Atorvastatin",
+                     "Amlodipine", "Omeprazole", "Sertraline", "Lamotrigine", "Warfarin", "Apixaban"]
+                    for dose in (5, 10, 20, 40, 100, 200, 500) for form in ("tablets", "capsules", "oral solution")]
+    export_dir = tempfile.mkdtemp()
+    for surgery in SURGERIES:
+        pd.DataFrame({
+            "patient_id": [f"P{rng.randint(1, 20000)}" for _ in range(250_000)],
+            "drug": rng.choices(descriptions, k=250_000),
+        }).to_csv(os.path.join(export_dir, f"{surgery}.csv"), index=False)
+
+    alerts = [
+        {"alert_id": "DSU-1", "affected_products": ["Valproate medicines"]},
+        {"alert_id": "DSU-2", "affected_products": ["Isotretinoin (Roaccutane)"]},
+        {"alert_id": "DSU-3", "affected_products": ["Warfarin", "Apixaban"]},
+    ]
+    start = time.perf_counter()
+    suggestions = suggest_patient_counts(alerts, export_dir)
+    print(f"Matched 3M prescription rows in {time.perf_counter() - start:.2f}s")
+    for alert_id, per_surgery in suggestions.items():
+        print(alert_id, dict(list(per_surgery.items())[:3]))
@@ -0,0 +1,207 @@
+"""
+In-process full-text search over alerts for the dashboard.
+
+An inverted index maps each term of an alert's title, summary, affected products and
+recommendations to the alerts containing it, with a per-field weight. Queries are
+tokenized the same way; every query term also matches indexed terms it is a prefix of
+("valpro" finds "valproate"), and results are ranked with BM25. A small record per alert
+(title, date, severity, source) is kept so results can be listed and looked up by alert_id
+without going back to the database.
+"""
+from __future__ import annotations
+
+import re
+import math
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from src.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+SEARCH_FIELDS = {"title": 3.0, "affected_products": 2.0, "summary": 1.0, "recommendations": 1.0}
+RECORD_FIELDS = ("alert_id", "title", "date_published", "severity", "source_name", "source_url", "canonical_alert_id")
+# Columns to fetch from the database to build the index.
+SEARCH_INDEX_COLUMNS = list(dict.fromkeys([*RECORD_FIELDS, *SEARCH_FIELDS]))
+
+# Prefix matches score a little lower than exact term matches.
+PREFIX_MATCH_WEIGHT = 0.8
+BM25_K1 = 1.2
+BM25_B = 0.75
+STOPWORDS = frozenset("a an and are as at be by for from has in is it of on or that the to with".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> list:
+    """Lowercased alphanumeric tokens of a string or list of strings, without stopwords."""
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(item) for item in text)
+    elif not isinstance(text, str):
+        return []
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class AlertSearchIndex:
+    """
+    Inverted index over alerts with prefix search and BM25 ranking.
+
+    `add_alerts` can be called again with new or updated alerts: an alert that is already
+    indexed has its old postings replaced. Safe to share between Streamlit sessions.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # term -> {alert_id: weighted term frequency}
+        self._doc_terms = {}                # alert_id -> terms, to remove postings on update
+        self._doc_lengths = {}
+        self._total_length = 0.0
+        self._sorted_terms = []
+        self._terms_dirty = False
+        self.records = {}                   # alert_id -> RECORD_FIELDS
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, alert_id):
+        return alert_id in self.records
+
+    def get(self, alert_id: str) -> dict:
+        """The indexed record of an alert, or None."""
+        return self.records.get(alert_id)
+
+    def _remove(self, alert_id: str):
+        for term in self._doc_terms.pop(alert_id, ()):
+            postings = self._postings[term]
+            postings.pop(alert_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+        self._total_length -= self._doc_lengths.pop(alert_id, 0.0)
+        self.records.pop(alert_id, None)
+
+    def add_alert(self, alert: dict):
+        """Indexes (or re-indexes) one alert dict."""
+        alert_id = alert.get("alert_id")
+        if alert_id is None:
+            return
+        with self._lock:
+            self._remove(alert_id)
+            frequencies = defaultdict(float)
+            for field, weight in SEARCH_FIELDS.items():
+                for token in tokenize(alert.get(field)):
+                    frequencies[token] += weight
+            for term, frequency in frequencies.items():
+                if term not in self._postings:
+                    self._terms_dirty = True
+                self._postings[term][alert_id] = frequency
+            length = sum(frequencies.values())
+            self._doc_terms[alert_id] = tuple(frequencies)
+            self._doc_lengths[alert_id] = length
+            self._total_length += length
+            self.records[alert_id] = {field: alert.get(field) for field in RECORD_FIELDS}
+
+    def add_alerts(self, alerts):
+        """Indexes a DataFrame or iterable of alert dicts."""
+        if isinstance(alerts, pd.DataFrame):
+            alerts = alerts.to_dict("records")
+        for alert in alerts:
+            self.add_alert(alert)
+
+    def remove_alert(self, alert_id: str):
+        with self._lock:
+            self._remove(alert_id)
+
+    def _expand(self, token: str) -> list:
+        """Indexed terms matching a query token: (term, weight), the exact term first."""
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        matches = []
+        start = bisect_left(self._sorted_terms, token)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(token):
+                break
+            matches.append((term, 1.0 if term == token else PREFIX_MATCH_WEIGHT))
+        return matches
+
+    def search(self, query: str, limit: int = 50, predicate=None) -> list:
+        """
+        Ranks alerts matching every term of the query (as a whole word or a prefix).
+
+        Args:
+            query (str): Free text, e.g. "valpro pregnancy".
+            limit (int): Maximum number of results.
+            predicate (callable): Optional filter on the indexed record of each hit.
+
+        Returns:
+            list: [(alert_id, score)], best match first.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            doc_count = len(self.records)
+            average_length = self._total_length / doc_count if doc_count else 0.0
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term, match_weight in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for alert_id, frequency in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[alert_id] / average_length)
+                        score = match_weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                        # A token scores through its best-matching term only.
+                        if score > token_scores[alert_id]:
+                            token_scores[alert_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {alert_id: score + token_scores[alert_id] for alert_id, score in scores.items() if alert_id in token_scores}
+                if not scores:
+                    return []
+            hits = scores.items()
+            if predicate is not None:
+                hits = [(alert_id, score) for alert_id, score in hits if predicate(self.records[alert_id])]
+            return sorted(hits, key=lambda hit: (-hit[1], hit[0]))[:limit]
+
+    def search_frame(self, query: str, limit: int = 50, predicate=None) -> pd.DataFrame:
+        """search() results as a DataFrame of the indexed records, with a 'score' column."""
+        hits = self.search(query, limit=limit, predicate=predicate)
+        if not hits:
+            return pd.DataFrame(columns=[*RECORD_FIELDS, "score"])
+        results = pd.DataFrame([self.records[alert_id] for alert_id, _ in hits])
+        results["score"] = [round(score, 3) for _, score in hits]
+        return results
+
+    @classmethod
+    def build(cls, db_manager, page_size: int = 1000):
+        """Builds the index from every stored alert, fetching only the columns it needs."""
+        index = cls()
+        for alerts_df in db_manager.iter_alerts(columns=SEARCH_INDEX_COLUMNS, page_size=page_size):
+            index.add_alerts(alerts_df)
+        return index
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) for _ in range(5000)]
+    index = AlertSearchIndex()
+    start = time.perf_counter()
+    index.add_alerts({
+        "alert_id": f"SYN-{i:06d}",
+        "title": " ".join(rng.sample(words, 6)),
+        "summary": " ".join(rng.choices(words, k=40)),
+        "affected_products": rng.sample(words, 2),
+        "recommendations": [" ".join(rng.choices(words, k=8))],
+    } for i in range(50000))
+    print(f"Indexed {len(index)} alerts in {time.perf_counter() - start:.2f}s")
+    for query in [words[0], words[1][:3], f"{words[2]} {words[3][:4]}"]:
+        start = time.perf_counter()
+        hits = index.search(query, limit=10)
+        print(f"{query!r}: {len(hits)} hits in {(time.perf_counter() - start) * 1000:.1f} ms")
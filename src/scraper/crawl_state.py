@@ -0,0 +1,108 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+# Firecrawl result fields that carry page content. Metadata (scrape IDs, timings) changes on
+# every fetch, so it is left out of the hash.
+CONTENT_KEYS = ("markdown", "content", "html", "rawHtml", "json", "extract", "llm_extraction")
+
+
+def page_content_hash(page: dict) -> str:
+    """Returns a stable SHA-256 of the content portion of a Firecrawl page result."""
+    content = {key: page[key] for key in CONTENT_KEYS if key in page}
+    if not content:
+        content = {key: value for key, value in page.items() if key != "metadata"}
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def page_url(page: dict) -> str:
+    """Returns the source URL of a Firecrawl page result."""
+    metadata = page.get("metadata") or {}
+    return page.get("url") or metadata.get("sourceURL") or metadata.get("url") or ""
+
+
+def page_validators(page: dict) -> tuple:
+    """Returns the (ETag, Last-Modified) pair reported in a page's metadata, if any."""
+    metadata = {str(key).lower(): value for key, value in (page.get("metadata") or {}).items()}
+    return metadata.get("etag"), metadata.get("last-modified") or metadata.get("lastmodified")
+
+
+class CrawlStateStore:
+    """
+    Per-URL crawl state used for incremental crawling.
+
+    For each URL it keeps the content hash, the alert ID it produced, the ETag/Last-Modified
+    validators and when it was last seen, in a small SQLite file next to the app data.
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            db_path = os.getenv("ALERTRX_CRAWL_STATE_PATH", os.path.join("data", "crawl_state.db"))
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    alert_id TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    last_seen TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_state_alert_id ON crawl_state (alert_id)")
+
+    def get(self, url: str) -> dict:
+        """Returns the stored state for a URL, or None if it has never been crawled."""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM crawl_state WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        """True if the URL was crawled before and its content hash has not changed."""
+        state = self.get(url)
+        return state is not None and state["content_hash"] == content_hash
+
+    def known_alert_ids(self) -> set:
+        """Returns every alert ID already produced by a crawl."""
+        with self._lock:
+            rows = self.conn.execute("SELECT alert_id FROM crawl_state WHERE alert_id IS NOT NULL").fetchall()
+        return {row["alert_id"] for row in rows}
+
+    def record(self, url: str, content_hash: str, alert_id: str = None, etag: str = None, last_modified: str = None):
+        """Stores the latest state for a URL, keeping previously known values where new ones are missing."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO crawl_state (url, content_hash, alert_id, etag, last_modified, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    alert_id = COALESCE(excluded.alert_id, crawl_state.alert_id),
+                    etag = COALESCE(excluded.etag, crawl_state.etag),
+                    last_modified = COALESCE(excluded.last_modified, crawl_state.last_modified),
+                    last_seen = excluded.last_seen
+            """, (url, content_hash, alert_id, etag, last_modified, now))
+
+    def record_page(self, url: str, page: dict, alert_id: str = None):
+        """Records a page's content hash and validators; call it once the page's alert is stored."""
+        etag, last_modified = page_validators(page)
+        self.record(url, page_content_hash(page), alert_id=alert_id, etag=etag, last_modified=last_modified)
+
+    def touch(self, url: str):
+        """Updates last_seen for a URL whose content did not change."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE crawl_state SET last_seen = ? WHERE url = ?", (now, url))
+
+    def close(self):
+        self.conn.close()
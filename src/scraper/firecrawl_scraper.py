@@ -1,13 +1,237 @@
 import os
-from firecrawl import FirecrawlApp
+import re
+import time
+import random
+import asyncio
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.scraper.rate_limiter import TokenBucket
+from src.scraper.response_cache import ResponseCache, CacheMissError, to_jsonable
+from src.scraper.crawl_state import page_content_hash, page_url
+from src.scraper.sources import extract_alert_links, make_alert_id
+from src.observability.metrics import span, observe
+
+# Firecrawl quota in requests per minute; override with FIRECRAWL_REQUESTS_PER_MINUTE for your plan.
+DEFAULT_REQUESTS_PER_MINUTE = 60
+# HTTP status codes worth retrying: rate limiting and transient server errors.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Keyword arguments of the client's scrape(): page text plus the links the list parsers follow.
+SCRAPE_OPTIONS = {'formats': ['markdown', 'links']}
+# Upper bound on alert list pages walked per source in one incremental crawl.
+DEFAULT_MAX_LIST_PAGES = 50
+
+
+# Firecrawl's JSON names of the client model fields whose name is not plain camelCase.
+_WIRE_NAMES = {'source_url': 'sourceURL'}
+
+
+def _wire_name(name):
+    if name in _WIRE_NAMES:
+        return _WIRE_NAMES[name]
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def _wire_format(value):
+    """
+    Converts a Firecrawl client result (pydantic models with snake_case fields) back into the
+    JSON shape of the Firecrawl API ('markdown', 'rawHtml', 'metadata.sourceURL', ...), which is
+    what the source parsers and the crawl state read. Plain dicts are returned unchanged.
+    """
+    if hasattr(value, 'model_dump'):
+        fields = type(value).model_fields
+        return {(_wire_name(name) if name in fields else name): _wire_format(item)
+                for name, item in value if item is not None}
+    if isinstance(value, list):
+        return [_wire_format(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _wire_format(item) for key, item in value.items()}
+    return value
+
+
+def _response_bytes(result) -> int:
+    """Approximate size of a Firecrawl response: the length of its text content fields."""
+    pages = result if isinstance(result, list) else [result]
+    return sum(len(page.get(field) or '') for page in pages if isinstance(page, dict)
+               for field in ('markdown', 'html', 'rawHtml', 'content') if isinstance(page.get(field), str))
+
+
+def _bounded_map(func, items, max_workers, max_pending=None):
+    """
+    Runs func(*item) on a thread pool and yields (item, result) in completion order.
+
+    At most `max_pending` calls are queued or running at any time (default: twice the
+    number of workers), and new calls are only submitted as results are consumed. A slow
+    consumer therefore applies backpressure instead of letting results pile up in memory.
+    """
+    max_pending = max_pending or max_workers * 2
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        for item in items:
+            pending[executor.submit(func, *item)] = item
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield item, future.result()
+                next_item = next(items, None)
+                if next_item is not None:
+                    pending[executor.submit(func, *next_item)] = next_item
+    finally:
+        # If the caller stops early, don't start the remaining requests.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _status_code_from_error(error):
+    """Best-effort extraction of the HTTP status code from an exception raised by the Firecrawl client."""
+    for attr in ("status_code", "status"):
+        code = getattr(error, attr, None)
+        if isinstance(code, int):
+            return code
+    response = getattr(error, "response", None)
+    code = getattr(response, "status_code", None)
+    if isinstance(code, int):
+        return code
+    match = re.search(r"[Ss]tatus code:? (\d{3})", str(error))
+    return int(match.group(1)) if match else None
+
+
+def _retry_after_seconds(error):
+    """Returns the Retry-After header value (in seconds) if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
 
 class FirecrawlScraper:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, api_url=None, requests_per_minute=None, max_retries=3, backoff_base=1.0, rate_limiter=None,
+                 cache=None, replay=None, app=None):
+        if replay is None:
+            replay = os.getenv("ALERTRX_REPLAY", "").lower() in ("1", "true", "yes")
+        # Replay mode serves every request from the response cache and never touches the network.
+        self.replay = replay
+        if cache is None and (replay or os.getenv("ALERTRX_CACHE_DIR")):
+            cache = ResponseCache()
+        self.cache = cache
+
         if api_key is None:
             api_key = os.getenv("FIRECRAWL_API_KEY")
-        if not api_key:
-            raise ValueError("Firecrawl API key not provided. Set FIRECRAWL_API_KEY environment variable or pass it to the constructor.")
-        self.app = FirecrawlApp(api_key=api_key)
+        if replay:
+            self.app = None
+        elif app is not None:
+            self.app = app  # a ready-made client, e.g. the in-memory fake used by the benchmarks
+        else:
+            if not api_key:
+                raise ValueError("Firecrawl API key not provided. Set FIRECRAWL_API_KEY environment variable or pass it to the constructor.")
+            if api_url is None:
+                api_url = os.getenv("FIRECRAWL_API_URL")  # e.g. a local stub server for benchmarks
+            from firecrawl import FirecrawlApp  # imported here: the SDK is slow to import and unused in replay mode
+            self.app = FirecrawlApp(api_key=api_key, api_url=api_url) if api_url else FirecrawlApp(api_key=api_key)
+
+        if rate_limiter is None:
+            if requests_per_minute is None:
+                requests_per_minute = float(os.getenv("FIRECRAWL_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+            rate_limiter = TokenBucket.per_minute(requests_per_minute)
+        # Shared by every worker of scrape_many / scrape_many_async so concurrency never exceeds the quota.
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def _backoff_delay(self, attempt, error):
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after
+        # Exponential backoff with full jitter so parallel workers don't retry in lockstep.
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def _should_retry(self, attempt, error):
+        return attempt < self.max_retries and _status_code_from_error(error) in RETRYABLE_STATUS_CODES
+
+    def _call_with_retry(self, func, *args):
+        """Calls a Firecrawl client method under the rate limiter, retrying on 429/5xx with backoff."""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                return func(*args)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self._backoff_delay(attempt, e))
+                attempt += 1
+
+    async def _call_with_retry_async(self, func, *args):
+        """Async counterpart of _call_with_retry; the blocking client call runs in a worker thread."""
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            try:
+                return await asyncio.to_thread(func, *args)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+                attempt += 1
+
+    def _scrape(self, url, options):
+        return _wire_format(self.app.scrape(url, **(options or {})))
+
+    def _crawl(self, url, options):
+        job = self.app.crawl(url, **(options or {}))  # waits for the crawl job to finish
+        return _wire_format(job.data)
+
+    def _cache_lookup(self, kind, url, options):
+        """
+        Returns (key, cached_response); raises CacheMissError on a miss in replay mode.
+        Hits are timed as "scraper.cache_hit" spans, so "scraper.fetch" only times Firecrawl requests.
+        """
+        if self.cache is None:
+            return None, None
+        key = ResponseCache.make_key(kind, url, options)
+        start = time.perf_counter()
+        cached = self.cache.get(key, allow_expired=self.replay)
+        if cached is None and self.replay:
+            raise CacheMissError(f"No cached {kind} response for {url} (replay mode).")
+        if cached is not None:
+            observe("scraper.cache_hit", time.perf_counter() - start, rows=1, nbytes=_response_bytes(cached), kind=kind)
+        return key, cached
+
+    def _fetch(self, kind, url, options, call):
+        """Serves a request from the response cache, or makes it with retries and caches the result."""
+        key, cached = self._cache_lookup(kind, url, options)
+        if cached is not None:
+            return cached
+        with span("scraper.fetch", kind=kind) as s:
+            result = self._call_with_retry(call, url, options)
+            # Plain JSON, exactly as a cache hit would replay it, so both take the same code paths.
+            result = to_jsonable(result)
+            s.add_rows(int(result is not None))
+            s.add_bytes(_response_bytes(result))
+        if key is not None and result is not None:
+            self.cache.set(key, result, url=url)
+        return result
+
+    async def _fetch_async(self, kind, url, options, call):
+        key, cached = self._cache_lookup(kind, url, options)
+        if cached is not None:
+            return cached
+        with span("scraper.fetch", kind=kind) as s:
+            result = await self._call_with_retry_async(call, url, options)
+            result = to_jsonable(result)
+            s.add_rows(int(result is not None))
+            s.add_bytes(_response_bytes(result))
+        if key is not None and result is not None:
+            self.cache.set(key, result, url=url)
+        return result
 
     def scrape_page(self, url):
         """
@@ -16,27 +240,145 @@ class FirecrawlScraper:
         try:
             # You can customize the Firecrawl scrape options here
             # For example, to extract markdown:
-            # result = self.app.scrape_url(url, {'pageOptions': {'onlyMainContent': True}})
+            # result = self.app.scrape(url, formats=['markdown'], only_main_content=True)
             # Or to extract structured data:
-            result = self.app.scrape_url(url, {'pageOptions': {'extractJson': True}})
+            result = self._fetch('scrape', url, SCRAPE_OPTIONS, self._scrape)
             return result
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return None
 
-    def crawl_site(self, url):
+    async def scrape_page_async(self, url):
+        """
+        Async version of scrape_page, sharing the same rate limiter and retry policy.
+        """
+        try:
+            return await self._fetch_async('scrape', url, SCRAPE_OPTIONS, self._scrape)
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+
+    def scrape_many(self, urls, max_workers=4):
+        """
+        Scrapes many URLs concurrently on a thread pool.
+
+        Yields (url, result) tuples in completion order, so callers can start processing
+        pages while slower ones are still in flight. Failed pages yield a result of None.
+        Only a bounded number of requests run ahead of the caller.
+        """
+        for (url,), result in _bounded_map(self.scrape_page, ((url,) for url in urls), max_workers):
+            yield url, result
+
+    async def scrape_many_async(self, urls, concurrency=4):
+        """
+        Asyncio version of scrape_many: an async generator yielding (url, result) as each page finishes.
+        At most `concurrency` requests are in flight at once.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                return url, await self.scrape_page_async(url)
+
+        tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def crawl_site(self, url, state_store=None):
         """
         Crawls an entire site using Firecrawl and returns structured JSON for each page.
+
+        If a CrawlStateStore is given, only pages whose content changed since the last crawl
+        are returned, so unchanged pages never reach parsing and normalization. Their state
+        is not recorded here: call state_store.record_page() for each page once it is stored,
+        so a page that fails downstream is returned again by the next crawl.
         """
         try:
             # You can customize the Firecrawl crawl options here
             # For example, to limit depth or include/exclude patterns:
-            # result = self.app.crawl_url(url, {'crawlerOptions': {'depth': 1}})
-            result = self.app.crawl_url(url)
-            return result
+            # result = self.app.crawl(url, max_discovery_depth=1)
+            result = self._fetch('crawl', url, None, self._crawl)
         except Exception as e:
             print(f"Error crawling {url}: {e}")
             return None
+        if state_store is None or result is None:
+            return result
+        return [page for page in result if self._is_changed(state_store, page_url(page), page)]
+
+    @staticmethod
+    def _is_changed(state_store, url, page):
+        """True if a page's content is new or changed; an unchanged page only has its last_seen updated."""
+        if url and state_store.is_unchanged(url, page_content_hash(page)):
+            state_store.touch(url)
+            return False
+        return True
+
+    def iter_alert_links(self, source, max_list_pages=DEFAULT_MAX_LIST_PAGES):
+        """
+        Lazily walks a source's alert list (following pagination when the source defines
+        `list_page_param`) and yields alert page URLs, newest first. List pages are only
+        fetched as the caller consumes links, so stopping early saves the remaining requests.
+        """
+        list_url = urljoin(source["base_url"], source.get("alert_list_path", ""))
+        page_param = source.get("list_page_param")
+        for page_number in range(1, max_list_pages + 1):
+            if page_number > 1 and not page_param:
+                return
+            url = list_url if page_number == 1 else f"{list_url}?{page_param}={page_number}"
+            listing = self.scrape_page(url)
+            links = extract_alert_links(listing, source) if listing else []
+            if not links:
+                return
+            yield from links
+
+    def discover_new_alert_links(self, source, state_store, known_alert_ids=None, max_list_pages=DEFAULT_MAX_LIST_PAGES) -> dict:
+        """
+        Walks a source's alert list and returns {url: alert_id} for the alerts listed before
+        the first already-known alert ID (from the crawl state store or `known_alert_ids`,
+        e.g. IDs already in the database).
+        """
+        known = set(known_alert_ids or ()) | state_store.known_alert_ids()
+        new_links = {}
+        for link in self.iter_alert_links(source, max_list_pages=max_list_pages):
+            alert_id = make_alert_id(source, link)
+            if alert_id in known:
+                break
+            new_links.setdefault(link, alert_id)
+        return new_links
+
+    def scrape_alert_pages(self, links, state_store, max_workers=4):
+        """
+        Scrapes alert pages concurrently, skipping pages whose content hash is unchanged.
+
+        Crawl state is not recorded here: the caller records each page with
+        state_store.record_page() once its alert is stored, so a page that fails to parse or
+        store is scraped again on the next run.
+
+        Args:
+            links (dict): {url: alert_id}, as returned by discover_new_alert_links.
+
+        Yields:
+            (alert_id, url, page) tuples for new or changed alerts.
+        """
+        for (link,), page in _bounded_map(self.scrape_page, ((link,) for link in links), max_workers):
+            if page and self._is_changed(state_store, link, page):
+                yield links[link], link, page
+
+    def crawl_source_incremental(self, source, state_store, known_alert_ids=None, max_workers=4, max_list_pages=DEFAULT_MAX_LIST_PAGES):
+        """
+        Incrementally crawls one source from its alert list.
+
+        Walking the list stops at the first alert ID that is already known, then only the new
+        alert pages are scraped (see scrape_alert_pages). Yields (alert_id, url, page) tuples
+        for new or changed alerts; record each with state_store.record_page(url, page, alert_id)
+        once it is stored.
+        """
+        new_links = self.discover_new_alert_links(source, state_store, known_alert_ids, max_list_pages)
+        yield from self.scrape_alert_pages(new_links, state_store, max_workers=max_workers)
 
 if __name__ == "__main__":
     # Example usage (requires FIRECRAWL_API_KEY environment variable set)
@@ -52,4 +394,13 @@ if __name__ == "__main__":
     # if crawled_data:
     #     for item in crawled_data:
     #         print(item)
+
+    # print("\nScraping several pages concurrently:")
+    # for url, page in scraper.scrape_many([example_url, example_url + "/latest"], max_workers=4):
+    #     print(url, bool(page))
+
+    # Offline replay: serve previously cached responses without an API key or network access.
+    # (run once with ALERTRX_CACHE_DIR set to populate the cache)
+    # replay_scraper = FirecrawlScraper(replay=True)
+    # print(replay_scraper.scrape_page(example_url))
     pass
@@ -0,0 +1,159 @@
+import os
+import time
+import pickle
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from src.scraper.sources import get_source, get_parser
+from src.observability.metrics import observe
+
+
+def _parse_in_worker(source, page):
+    """Runs in a worker process: parses one page with the parser of a (pickled) source declaration."""
+    start = time.perf_counter()
+    raw_alert = get_parser(source)(page)
+    return raw_alert, time.perf_counter() - start
+
+
+def _picklable(source) -> bool:
+    """True if a source declaration, parser included, can be sent to a worker process."""
+    try:
+        pickle.dumps(source)
+        return True
+    except Exception:
+        return False
+
+
+class ParserPool:
+    """
+    Parses Firecrawl pages of one or more sources in a process pool.
+
+    Parsing large markdown/HTML pages is CPU-bound, so it runs outside the interpreter that
+    drives scraping and database writes. Results come back in completion order, and each
+    source may only occupy `max_in_flight_per_source` workers at a time, so one slow
+    source cannot hold up the others. Per-source timings are collected in `timings`.
+
+    Sources are looked up in this process's registry and sent to the workers with the page,
+    so sources registered at runtime work too. A source whose parser_function cannot be
+    pickled (a lambda, a closure, a function defined inside another function) is parsed
+    inline in this process instead, without the parallelism.
+    """
+
+    def __init__(self, max_workers: int = None, max_in_flight_per_source: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight_per_source = max_in_flight_per_source or max(1, self.max_workers // 2)
+        self.max_pending = self.max_workers * 2
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.timings = defaultdict(lambda: {"pages": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0})
+        self._sources = {}  # source name -> (source, True if it can be parsed in a worker)
+
+    def _lookup(self, source_name):
+        if source_name not in self._sources:
+            source = get_source(source_name)
+            self._sources[source_name] = (source, _picklable(source))
+        return self._sources[source_name]
+
+    def _record(self, source_name, seconds, error=False, pool="process"):
+        stats = self.timings[source_name]
+        stats["pages"] += 1
+        stats["errors"] += int(error)
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        observe("parser.parse", seconds, rows=int(not error), error=error, source=source_name, pool=pool)
+
+    def parse(self, items):
+        """
+        Parses (source_name, key, page) items and yields (source_name, key, raw_alert, seconds)
+        as each page finishes. `key` is passed through untouched (e.g. the page URL);
+        raw_alert is None if the parser raised. At most twice the number of workers are
+        queued at once, so the input iterable is consumed lazily.
+        """
+        items = iter(items)
+        backlog = defaultdict(deque)  # pages waiting because their source is at its in-flight limit
+        in_flight = {}
+        per_source = defaultdict(int)
+        parsed_inline = deque()  # results of sources that cannot be sent to a worker
+        exhausted = False
+
+        def parse_inline(source_name, key, page, source):
+            start = time.perf_counter()
+            try:
+                raw_alert = get_parser(source)(page) if source is not None else None
+                error = source is None
+            except Exception as e:
+                print(f"Error parsing {key} for source '{source_name}': {e}")
+                raw_alert, error = None, True
+            seconds = time.perf_counter() - start
+            self._record(source_name, seconds, error=error, pool="inline")
+            parsed_inline.append((source_name, key, raw_alert, seconds))
+
+        def submit(source_name, key, page):
+            try:
+                source, picklable = self._lookup(source_name)
+            except KeyError as e:
+                print(f"Error parsing {key}: {e}")
+                parse_inline(source_name, key, page, None)
+                return
+            if not picklable:
+                parse_inline(source_name, key, page, source)
+                return
+            future = self._executor.submit(_parse_in_worker, source, page)
+            in_flight[future] = (source_name, key, time.perf_counter())
+            per_source[source_name] += 1
+
+        def fill():
+            nonlocal exhausted
+            for source_name in list(backlog):
+                queue = backlog[source_name]
+                while queue and per_source[source_name] < self.max_in_flight_per_source and len(in_flight) < self.max_pending:
+                    submit(source_name, *queue.popleft())
+                if not queue:
+                    del backlog[source_name]
+            while (not exhausted and len(in_flight) + len(parsed_inline) < self.max_pending
+                   and sum(map(len, backlog.values())) < self.max_pending):
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                source_name, key, page = item
+                if per_source[source_name] < self.max_in_flight_per_source:
+                    submit(source_name, key, page)
+                else:
+                    backlog[source_name].append((key, page))
+
+        fill()
+        while in_flight or parsed_inline:
+            while parsed_inline:
+                yield parsed_inline.popleft()
+            if not in_flight:
+                fill()
+                continue
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                source_name, key, submitted = in_flight.pop(future)
+                per_source[source_name] -= 1
+                try:
+                    raw_alert, seconds = future.result()
+                    self._record(source_name, seconds)
+                except Exception as e:
+                    print(f"Error parsing {key} for source '{source_name}': {e}")
+                    raw_alert, seconds = None, time.perf_counter() - submitted
+                    self._record(source_name, seconds, error=True)
+                yield source_name, key, raw_alert, seconds
+            fill()
+
+    def timing_report(self) -> dict:
+        """Per-source parse statistics: pages, errors, total/mean/max seconds."""
+        return {
+            name: {**stats, "mean_seconds": stats["seconds"] / stats["pages"] if stats["pages"] else 0.0}
+            for name, stats in self.timings.items()
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep Firecrawl calls within the account quota.
+
+    A single bucket is shared by every worker (threads or asyncio tasks) that talks
+    to the Firecrawl API, so raising the concurrency never raises the request rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens (burst size). Defaults to one second's worth.
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be greater than zero.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = None) -> "TokenBucket":
+        """Builds a bucket from a requests-per-minute quota, as Firecrawl plans are expressed."""
+        return cls(rate=requests_per_minute / 60.0, capacity=burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens if they are available.
+
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise the number of seconds to wait before retrying.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocks the calling thread until the requested tokens are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """Waits on the event loop until the requested tokens are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join("data", "firecrawl_cache")
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a response is not in the cache and the network may not be used."""
+
+
+def _json_default(value):
+    # Firecrawl clients return pydantic models rather than plain dicts.
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def to_jsonable(value):
+    """Returns a response as plain JSON data, exactly as the cache stores and replays it."""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+class ResponseCache:
+    """
+    On-disk cache for raw Firecrawl scrape/crawl responses, keyed by request.
+
+    Entries are keyed by a SHA-256 of the request (kind, url, options) and stored as JSON files
+    under `cache_dir`, sharded by the first two hex characters of the key. The directory is
+    scanned once at startup; after that the entry sizes and their least-recently-used order are
+    kept in memory, so eviction once the cache grows past `max_bytes` never rescans the disk.
+    Reads also refresh the file's modification time, which restores the LRU order on the next
+    startup. Entries older than `ttl_seconds` are treated as misses, except in replay mode.
+    `clock` returns the current time in seconds (default time.time); tests pass a fake one.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl_seconds: float = None, max_bytes: int = None, clock=time.time):
+        self.cache_dir = cache_dir or os.getenv("ALERTRX_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if ttl_seconds is None and os.getenv("ALERTRX_CACHE_TTL_SECONDS"):
+            ttl_seconds = float(os.getenv("ALERTRX_CACHE_TTL_SECONDS"))
+        if max_bytes is None and os.getenv("ALERTRX_CACHE_MAX_MB"):
+            max_bytes = int(float(os.getenv("ALERTRX_CACHE_MAX_MB")) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = OrderedDict()  # key -> size in bytes, least recently used first
+        for path, _ in sorted(self._entries(), key=lambda entry: entry[1]):
+            self._index[os.path.basename(path)[:-len(".json")]] = os.path.getsize(path)
+        self._size = sum(self._index.values())
+
+    @staticmethod
+    def make_key(kind: str, url: str, options=None) -> str:
+        """Builds the cache key for a request: the same URL with different scrape options is a different entry."""
+        encoded = json.dumps([kind, url, options], sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entries(self):
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.endswith(".json"):
+                    path = os.path.join(shard_dir, name)
+                    yield path, os.path.getmtime(path)
+
+    def get(self, key: str, allow_expired: bool = False):
+        """Returns the cached response for a key, or None on a miss or an expired entry."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not allow_expired and self.ttl_seconds is not None and self.clock() - entry["stored_at"] > self.ttl_seconds:
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(path)  # mark as recently used for the next startup
+        except FileNotFoundError:
+            pass
+        return entry["value"]
+
+    def set(self, key: str, value, url: str = None):
+        """Stores a response, then evicts least recently used entries if the cache is over its size budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"url": url, "stored_at": self.clock(), "value": value}, default=_json_default).encode("utf-8")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            os.replace(tmp_path, path)  # atomic, so concurrent readers never see a partial file
+            self._size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            if self.max_bytes is not None and self._size > self.max_bytes:
+                self._evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        while self.max_bytes is not None and self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Deletes every cached response."""
+        with self._lock:
+            for path, _ in list(self._entries()):
+                os.remove(path)
+            self._index.clear()
+            self._size = 0
@@ -1,54 +1,191 @@
-# This file will define the medical alert sources and their specific parsing logic.
-
-# Example structure for a source:
-# medical_alert_sources = [
-#     {
-#         "name": "GOV.UK Drug Safety Update",
-#         "base_url": "https://www.gov.uk/drug-safety-update",
-#         "alert_list_path": "/drug-safety-update", # Path to the page listing alerts
-#         "parser_function": "parse_gov_uk_drug_safety_update" # Function to parse individual alert pages
-#     },
-#     {
-#         "name": "Another Medical Alert Source",
-#         "base_url": "https://example.com/alerts",
-#         "alert_list_path": "/alerts/list",
-#         "parser_function": "parse_another_source"
-#     }
-# ]
+# This file defines the medical alert sources and their specific parsing logic.
+import re
+from urllib.parse import urljoin, urlparse
+
+# Sources are declared with register_source() and collected in MEDICAL_ALERT_SOURCES.
+# Each source is a dict:
+# {
+#     "name": "GOV.UK Drug Safety Update",
+#     "base_url": "https://www.gov.uk/drug-safety-update",
+#     "alert_list_path": "/drug-safety-update", # Path to the page listing alerts
+#     "fields": {...}, # Extraction rules for alert pages (see extract_field), or instead:
+#     "parser_function": "parse_gov_uk_drug_safety_update", # A function (or its name in this module) to parse alert pages
+#     "schedule_minutes": 1440, # How often the ingest worker refreshes the source
+#     "list_page_param": "page", # Optional query parameter used to paginate the alert list
+#     "alert_path_prefix": "/drug-safety-update", # Optional path under which alert pages live (defaults to alert_list_path)
+#     "alert_id_prefix": "GOVUK-DSU" # Optional prefix for alert IDs derived from alert URLs
+# }
+
+DEFAULT_SCHEDULE_MINUTES = 24 * 60
+MARKDOWN_HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+MARKDOWN_LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*\S)")
+
+def _lookup(data, dotted_key):
+    """Follows a dotted path ("metadata.title") through nested dicts."""
+    for part in dotted_key.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+def _markdown_section_items(text, heading):
+    """Returns the list items under the first markdown heading containing `heading` (case-insensitive)."""
+    items = []
+    in_section = False
+    for line in text.splitlines():
+        heading_match = MARKDOWN_HEADING_PATTERN.match(line)
+        if heading_match:
+            if in_section:
+                break
+            in_section = heading.lower() in heading_match.group(1).lower()
+            continue
+        if in_section:
+            item_match = MARKDOWN_LIST_ITEM_PATTERN.match(line)
+            if item_match:
+                items.append(item_match.group(1))
+    return items
+
+def extract_field(firecrawl_json_data, rule):
+    """
+    Extracts one field from a Firecrawl page using a declarative rule. A rule is a dict with:
+        "const": a fixed value;
+        "keys": dotted paths tried in order (e.g. ["metadata.title", "title"]);
+        "regex": a pattern searched in the page text ("from": text key, default markdown/content),
+                 returning group 1 (or all matches of group 1 if "as_list" is set);
+        "section": a markdown heading whose list items are returned as a list;
+        "default": the value used when nothing matched.
+    """
+    if "const" in rule:
+        return rule["const"]
+    for key in rule.get("keys", ()):
+        value = _lookup(firecrawl_json_data, key)
+        if value not in (None, "", []):
+            return value
+    if "regex" in rule or "section" in rule:
+        text_key = rule.get("from")
+        text = (firecrawl_json_data.get(text_key) if text_key
+                else firecrawl_json_data.get('markdown') or firecrawl_json_data.get('content')) or ''
+        if "section" in rule:
+            items = _markdown_section_items(text, rule["section"])
+            if items:
+                return items
+        if "regex" in rule:
+            if rule.get("as_list"):
+                matches = re.findall(rule["regex"], text)
+                if matches:
+                    return matches
+            else:
+                match = re.search(rule["regex"], text)
+                if match:
+                    return match.group(1) if match.groups() else match.group(0)
+    return rule.get("default")
+
+def parse_with_rules(firecrawl_json_data, source):
+    """Parses an alert page using the extraction rules declared in a source's "fields"."""
+    alert = {field: extract_field(firecrawl_json_data, rule) for field, rule in source["fields"].items()}
+    alert = {field: value for field, value in alert.items() if value is not None}
+    alert["source_name"] = source["name"]
+    return alert
+
+GOV_UK_DRUG_SAFETY_UPDATE = {
+    "name": "GOV.UK Drug Safety Update",
+    "base_url": "https://www.gov.uk/drug-safety-update",
+    "alert_list_path": "/drug-safety-update",
+    "list_page_param": "page",
+    "alert_id_prefix": "GOVUK-DSU",
+    "schedule_minutes": DEFAULT_SCHEDULE_MINUTES,
+    "fields": {
+        "title": {"keys": ["title", "metadata.title", "metadata.ogTitle"], "default": "No Title"},
+        "content": {"keys": ["content", "markdown"], "default": "No Content"},
+        "source_url": {"keys": ["url", "metadata.sourceURL"], "default": ""},
+        "date_published": {"keys": ["metadata.publishedTime", "metadata.article:published_time"],
+                           "regex": r"Published\s*:?\s*(\d{1,2} \w+ \d{4})"},
+        "summary": {"keys": ["metadata.description", "metadata.ogDescription", "description"]},
+        "recommendations": {"section": "Advice for healthcare professionals"},
+    },
+}
 
 def parse_gov_uk_drug_safety_update(firecrawl_json_data):
     """
-    Parses the JSON data extracted by Firecrawl for GOV.UK Drug Safety Update pages.
-    This is a placeholder function. Actual implementation will depend on the structure
-    of the JSON returned by Firecrawl for these pages.
-    """
-    # Example: Extract title and content
-    title = firecrawl_json_data.get('title', 'No Title')
-    content = firecrawl_json_data.get('content', 'No Content')
-    url = firecrawl_json_data.get('url', '')
-    # You would add more sophisticated parsing here based on the actual JSON structure
-    # For instance, extracting specific sections, dates, affected products, etc.
-    return {
-        "title": title,
-        "content": content,
-        "source_url": url,
-        "source_name": "GOV.UK Drug Safety Update",
-        # Add other fields as per the common schema
-    }
-
-# def parse_another_source(firecrawl_json_data):
-#     """
-#     Placeholder for parsing another medical alert source.
-#     """
-#     pass
-
-# You would populate this list with the actual sources and their corresponding parser functions.
-MEDICAL_ALERT_SOURCES = [
-    # {
-    #     "name": "GOV.UK Drug Safety Update",
-    #     "base_url": "https://www.gov.uk/drug-safety-update",
-    #     "alert_list_path": "/drug-safety-update",
-    #     "parser_function": parse_gov_uk_drug_safety_update
-    # },
-    # Add other sources here
-]
+    Parses the JSON data extracted by Firecrawl for GOV.UK Drug Safety Update pages,
+    using the extraction rules declared for the source.
+    """
+    return parse_with_rules(firecrawl_json_data, GOV_UK_DRUG_SAFETY_UPDATE)
+
+MARKDOWN_LINK_PATTERN = re.compile(r"\]\((https?://[^)\s]+|/[^)\s]*)\)")
+
+def make_alert_id(source, url):
+    """
+    Derives a stable alert ID from an alert page URL: the source prefix plus the last path segment.
+    Used to recognise alerts that have already been ingested without fetching them again.
+    """
+    prefix = source.get("alert_id_prefix") or re.sub(r"[^A-Z0-9]+", "-", source["name"].upper()).strip("-")
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    return f"{prefix}-{slug}"
+
+def extract_alert_links(firecrawl_json_data, source):
+    """
+    Returns the alert page URLs linked from a source's alert list page, in page order
+    (newest first on the sources we scrape), without duplicates.
+    """
+    metadata = firecrawl_json_data.get('metadata') or {}
+    links = firecrawl_json_data.get('links') or firecrawl_json_data.get('linksOnPage') or metadata.get('linksOnPage')
+    if not links:
+        text = firecrawl_json_data.get('markdown') or firecrawl_json_data.get('content') or ''
+        links = MARKDOWN_LINK_PATTERN.findall(text)
+
+    base_url = source["base_url"]
+    alert_path = source.get("alert_path_prefix", source.get("alert_list_path", "")).rstrip("/")
+    host = urlparse(base_url).netloc
+    seen = set()
+    alert_links = []
+    for link in links:
+        absolute = urljoin(base_url, link).split("#", 1)[0]
+        parsed = urlparse(absolute)
+        # Alert pages live under the list path (or alert_path_prefix); the list page itself and pagination links don't count.
+        if parsed.netloc != host or not parsed.path.startswith(alert_path + "/") or parsed.query:
+            continue
+        if absolute not in seen:
+            seen.add(absolute)
+            alert_links.append(absolute)
+    return alert_links
+
+# Registered sources, in registration order.
+MEDICAL_ALERT_SOURCES = []
+
+def register_source(source):
+    """Validates a source declaration and adds it to MEDICAL_ALERT_SOURCES."""
+    missing = [key for key in ("name", "base_url", "alert_list_path") if key not in source]
+    if missing:
+        raise ValueError(f"Source is missing required keys: {missing}")
+    if "fields" not in source and "parser_function" not in source:
+        raise ValueError(f"Source '{source['name']}' needs either 'fields' or a 'parser_function'.")
+    if any(existing["name"] == source["name"] for existing in MEDICAL_ALERT_SOURCES):
+        raise ValueError(f"Source '{source['name']}' is already registered.")
+    source.setdefault("schedule_minutes", DEFAULT_SCHEDULE_MINUTES)
+    MEDICAL_ALERT_SOURCES.append(source)
+    return source
+
+def get_source(name):
+    """Returns the registered source with the given name."""
+    for source in MEDICAL_ALERT_SOURCES:
+        if source["name"] == name:
+            return source
+    raise KeyError(f"Unknown source '{name}'.")
+
+def get_parser(source):
+    """Returns a callable parsing one Firecrawl page of the source into a raw alert dict."""
+    parser = source.get("parser_function")
+    if parser is None:
+        return lambda firecrawl_json_data: parse_with_rules(firecrawl_json_data, source)
+    return globals()[parser] if isinstance(parser, str) else parser
+
+register_source(GOV_UK_DRUG_SAFETY_UPDATE)
+# Add other sources here, e.g.:
+# register_source({
+#     "name": "Another Medical Alert Source",
+#     "base_url": "https://example.com/alerts",
+#     "alert_list_path": "/alerts/list",
+#     "alert_path_prefix": "/alerts",
+#     "fields": {"title": {"keys": ["metadata.title"]}},
+# })
@@ -7,89 +7,314 @@ import os
 # Add the parent directory to the Python path to allow imports from src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from src.database.db_manager import DBManager
+from src.database.storage import (StorageBackend, create_db_manager, action_status, ALERT_SUMMARY_COLUMNS,
+                                  DEFAULT_PAGE_SIZE, SURGERIES)
+from src.database.action_outbox import ActionOutbox
+from src.database.sync import AlertSnapshot, DEFAULT_SYNC_INTERVAL_SECONDS
+from src.streamlit_app.cache import TTLCache, CachedDBManager, DEFAULT_TTL_SECONDS
+from src.processor.search_index import AlertSearchIndex
+from src.processor.product_matcher import find_surgery_exports, suggest_patient_counts
+from src.observability import metrics
 # from src.scraper.firecrawl_scraper import FirecrawlScraper # Will be used later
 # from src.processor.data_normalizer import process_alerts_to_dataframe # Will be used later
 
-# List of surgeries provided by the user
-SURGERIES = [
-    "Scarsdale-Medical-Centre", "Earls-Court-Surgery", "Stanhope-Mews-Surgery",
-    "The-Chelsea-Practice", "Health-Partners-at-Violet-Melchett",
-    "Emperors-Gate-Health-Centre", "Knightsbridge-Medical-Centre",
-    "Earls-Court-Medical-Centre", "The-Abingdon-Medical-Practice",
-    "The-Good-Practice", "Royal-Hospital-Chelsea", "Kensington-Park-Medical-Centre"
-]
+SEVERITIES = ["High", "Medium", "Low"]
+
+@st.cache_resource
+def get_db_manager() -> StorageBackend:
+    """One storage backend (and Supabase client) per server process, shared by every session and rerun."""
+    return create_db_manager()
+
+@st.cache_resource
+def get_alert_cache() -> TTLCache:
+    """Process-wide cache of alert lists and action frames, shared by every session."""
+    return TTLCache(ttl_seconds=float(os.getenv("ALERTRX_APP_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+
+@st.cache_resource
+def get_action_outbox() -> ActionOutbox:
+    """
+    Durable queue of submitted pharmacist actions, written to the database by a background
+    thread. Writes go through the shared cache so it drops stale action data.
+    """
+    outbox = ActionOutbox(CachedDBManager(get_db_manager(), get_alert_cache()))
+    outbox.start()
+    return outbox
+
+@st.cache_resource
+def get_alert_snapshot() -> AlertSnapshot:
+    """
+    In-process copy of the alerts, loaded once per server process and then kept
+    current by delta sync (see sync_changes).
+    """
+    snapshot = AlertSnapshot(get_db_manager())
+    snapshot.refresh(force=True)
+    return snapshot
+
+@st.cache_resource
+def get_search_index() -> AlertSearchIndex:
+    """
+    Full-text index of every alert, built once per server process from the alert snapshot.
+    Alerts upserted through the app are indexed as they are written, and alerts written by the
+    scraper as delta sync picks them up.
+    """
+    index = AlertSearchIndex()
+    index.add_alerts(get_alert_snapshot().alerts)
+    return index
+
+@st.cache_data(ttl=float(os.getenv("ALERTRX_PATIENT_COUNTS_TTL_SECONDS", 3600)), show_spinner="Matching medication exports...")
+def suggested_patient_counts() -> dict:
+    """
+    Patients affected per alert and surgery, matched from the surgeries' medication exports
+    ({alert_id: {surgery: count}}). Computed for all alerts at once and cached; {} without exports.
+    """
+    if not find_surgery_exports():
+        return {}
+    alerts_df = get_alert_snapshot().alerts
+    return suggest_patient_counts(alerts_df[['alert_id', 'affected_products']].to_dict('records'))
+
+def sync_changes(db_manager: CachedDBManager):
+    """
+    Pulls the rows written since the last sync into the snapshot and drops the cached data they
+    make stale. Sessions share the snapshot, so the database is asked at most once per
+    ALERTRX_SYNC_INTERVAL_SECONDS however many sessions are open.
+    """
+    db_manager.apply_changes(get_alert_snapshot().refresh())
+
+@st.fragment(run_every=float(os.getenv("ALERTRX_SYNC_INTERVAL_SECONDS", DEFAULT_SYNC_INTERVAL_SECONDS)))
+def new_alerts_sidebar(db_manager: CachedDBManager):
+    """Polls for high-severity alerts published or updated since the session last marked them as seen."""
+    sync_changes(db_manager)
+    snapshot = get_alert_snapshot()
+    seen_at = st.session_state.setdefault("alerts_seen_at", snapshot.watermarks.get('alerts', pd.Timestamp.now(tz="UTC")))
+    new_alerts = snapshot.alerts_updated_since(seen_at, severity="High")
+    if new_alerts.empty:
+        return
+    st.warning(f"{len(new_alerts)} new or updated high-severity alert(s)")
+    for title in new_alerts['title'].head(5):
+        st.caption(title)
+    if st.button("Mark as seen", key="alerts_seen"):
+        st.session_state["alerts_seen_at"] = snapshot.watermarks.get('alerts', seen_at)
+        st.rerun()
+
+def cache_stats_sidebar(cache: TTLCache):
+    stats = cache.stats()
+    st.sidebar.caption(
+        f"Cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} entries"
+    )
+
+def outbox_sidebar(outbox: ActionOutbox):
+    stats = outbox.stats()
+    if not stats['pending']:
+        return
+    st.sidebar.caption(f"{stats['pending']} submitted action(s) waiting to be saved to the database.")
+    if stats['failing']:
+        st.sidebar.warning(f"Saving actions is being retried ({stats['failing']} failed attempt(s), "
+                           f"oldest queued {stats['oldest_seconds']:.0f}s ago). They are kept until saved.")
+
+def metrics_sidebar():
+    """Span latencies recorded in this server process; shown only when ALERTRX_METRICS is on."""
+    if not metrics.is_enabled():
+        return
+    with st.sidebar.expander("Performance metrics"):
+        snapshot = metrics.snapshot()
+        if not snapshot:
+            st.caption("No spans recorded yet.")
+            return
+        spans_df = pd.DataFrame(snapshot)
+        spans_df['labels'] = spans_df['labels'].map(lambda labels: ", ".join(f"{k}={v}" for k, v in labels.items()))
+        st.dataframe(spans_df[['span', 'labels', 'count', 'errors', 'rows', 'mean_seconds', 'p95_seconds', 'max_seconds']],
+                     hide_index=True)
+        st.download_button("Prometheus text", metrics.prometheus_text(), file_name="alertrx_metrics.prom")
+        st.download_button("JSON lines", metrics.json_lines(), file_name="alertrx_metrics.jsonl")
+        if st.button("Reset metrics"):
+            metrics.reset()
 
 def main():
     st.set_page_config(layout="wide", page_title="AlertRx - Medical Alert Management")
     st.title("💊 AlertRx: Medical Alert Management System")
 
-    db_manager = DBManager()
+    cache = get_alert_cache()
+    search_index = get_search_index()
+    db_manager = CachedDBManager(get_db_manager(), cache, search_index=search_index)
+    sync_changes(db_manager)
     # Supabase tables must be created manually or via migrations.
     # Refer to src/database/db_manager.py's create_tables_guide() for schema.
 
     st.sidebar.header("Navigation")
     page = st.sidebar.radio("Go to", ["View Alerts", "Enter Actions"])
 
-    if page == "View Alerts":
-        view_alerts_page(db_manager)
-    elif page == "Enter Actions":
-        enter_actions_page(db_manager)
+    with metrics.span("page.render", page=page):
+        if page == "View Alerts":
+            view_alerts_page(db_manager, search_index)
+        elif page == "Enter Actions":
+            enter_actions_page(db_manager)
+
+    with st.sidebar:
+        new_alerts_sidebar(db_manager)
+    cache_stats_sidebar(cache)
+    outbox_sidebar(get_action_outbox())
+    metrics_sidebar()
 
     # Supabase client does not require explicit closing in this context.
 
-def view_alerts_page(db_manager: DBManager):
+def alert_filters(key: str, db_manager: StorageBackend) -> dict:
+    """Renders the severity/source/date/duplicate filters and returns them as query_alerts keyword arguments."""
+    cols = st.columns(3)
+    with cols[0]:
+        severity = st.multiselect("Severity", SEVERITIES, key=f"{key}_severity")
+    with cols[1]:
+        source_name = st.multiselect("Source", db_manager.get_alert_sources(), key=f"{key}_source")
+    with cols[2]:
+        date_range = st.date_input("Published between", value=(), key=f"{key}_dates")
+    show_duplicates = st.checkbox("Show near-duplicate alerts from other sources", key=f"{key}_duplicates")
+    filters = {"severity": severity, "source_name": source_name, "hide_duplicates": not show_duplicates}
+    if len(date_range) > 0:
+        filters["date_from"] = date_range[0]
+    if len(date_range) > 1:
+        filters["date_to"] = date_range[1]
+    return filters
+
+def search_predicate(filters: dict):
+    """The alert_filters as a predicate on search index records."""
+    severities, sources = set(filters.get("severity") or ()), set(filters.get("source_name") or ())
+    date_from = pd.Timestamp(filters["date_from"]) if filters.get("date_from") else None
+    date_to = pd.Timestamp(filters["date_to"]) + pd.Timedelta(days=1) if filters.get("date_to") else None
+
+    def matches(record: dict) -> bool:
+        if severities and record["severity"] not in severities:
+            return False
+        if sources and record["source_name"] not in sources:
+            return False
+        if filters.get("hide_duplicates") and record.get("canonical_alert_id"):
+            return False
+        published = record["date_published"]
+        if date_from is not None and not (pd.notna(published) and published >= date_from):
+            return False
+        if date_to is not None and not (pd.notna(published) and published < date_to):
+            return False
+        return True
+    return matches
+
+def paged_alerts(key: str, db_manager: StorageBackend, columns: list, filters: dict) -> pd.DataFrame:
+    """
+    Fetches the current page of alerts for a page of the app, using keyset pagination.
+    The cursors of the pages visited so far are kept in session state so "Previous" works.
+    """
+    state_key = f"{key}_cursors"
+    filters_key = f"{key}_filters"
+    if st.session_state.get(filters_key) != filters:
+        # Filters changed: start again from the first page.
+        st.session_state[filters_key] = filters
+        st.session_state[state_key] = [None]
+    cursors = st.session_state.setdefault(state_key, [None])
+
+    alerts_df, next_cursor = db_manager.query_alerts(columns=columns, after=cursors[-1], page_size=DEFAULT_PAGE_SIZE, **filters)
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("← Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {len(cursors)}")
+    with next_col:
+        if st.button("Next →", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    return alerts_df
+
+def view_alerts_page(db_manager: StorageBackend, search_index: AlertSearchIndex):
     st.header("Current Medical Alerts")
 
-    alerts_df = db_manager.get_all_alerts()
+    search_query = st.text_input("Search alerts", key="view_search",
+                                 placeholder="Drug, product or keyword, e.g. valpro pregnancy").strip()
+    filters = alert_filters("view", db_manager)
+    if search_query:
+        alerts_df = search_index.search_frame(search_query, limit=DEFAULT_PAGE_SIZE, predicate=search_predicate(filters))
+        st.caption(f"{len(alerts_df)} best matches for '{search_query}'")
+    else:
+        alerts_df = paged_alerts("view", db_manager, ALERT_SUMMARY_COLUMNS, filters)
 
     if alerts_df.empty:
-        st.info("No medical alerts found in the database. Please run the scraper to fetch alerts.")
+        if search_query:
+            st.info("No alerts match your search.")
+        elif any(value for name, value in filters.items() if name != "hide_duplicates"):
+            st.info("No alerts match the selected filters.")
+        else:
+            st.info("No medical alerts found in the database. Please run the scraper to fetch alerts.")
         return
 
+    # Action status of every listed alert comes from one batched summary query.
+    status_df = action_status(db_manager.get_action_summaries(alerts_df['alert_id'].tolist()), alerts_df['alert_id'])
+    alerts_df = alerts_df.merge(status_df, on='alert_id', how='left')
+    outstanding = int((alerts_df['status'] == "Outstanding").sum())
+    st.caption(f"{outstanding} outstanding, {len(alerts_df) - outstanding} complete in this list")
+
     # Display alerts in a table
-    st.dataframe(alerts_df[['title', 'date_published', 'severity', 'source_name', 'source_url']], use_container_width=True)
+    st.dataframe(alerts_df[['status', 'title', 'date_published', 'severity', 'source_name', 'patients', 'last_action_at', 'source_url']],
+                 use_container_width=True)
 
     st.subheader("Alert Details")
-    selected_alert_title = st.selectbox("Select an alert to view details:", alerts_df['title'].tolist())
+    titles = dict(zip(alerts_df['alert_id'], alerts_df['title']))
+    selected_alert_id = st.selectbox("Select an alert to view details:", list(titles), format_func=titles.get)
 
-    if selected_alert_title:
-        selected_alert = alerts_df[alerts_df['title'] == selected_alert_title].iloc[0].to_dict()
+    if selected_alert_id:
+        # Full detail (summary, products, recommendations) is only fetched for the selected alert.
+        selected_alert, actions_df = db_manager.get_alert_with_actions(selected_alert_id)
+        if not selected_alert:
+            st.warning("This alert could not be loaded.")
+            return
         st.write(f"**Title:** {selected_alert['title']}")
         st.write(f"**Date Published:** {selected_alert['date_published'].strftime('%Y-%m-%d') if pd.notna(selected_alert['date_published']) else 'N/A'}")
         st.write(f"**Severity:** {selected_alert['severity']}")
         st.write(f"**Source:** [{selected_alert['source_name']}]({selected_alert['source_url']})")
+        if selected_alert.get('canonical_alert_id'):
+            st.info(f"Near-duplicate of alert {selected_alert['canonical_alert_id']}, published by another source.")
         st.write(f"**Summary:** {selected_alert['summary']}")
         st.write(f"**Affected Products:** {', '.join(selected_alert['affected_products'])}")
         st.write(f"**Recommendations:** {', '.join(selected_alert['recommendations'])}")
+        # The raw scraped payload is only fetched (and decompressed) when asked for.
+        if st.checkbox("Show raw source data", key=f"raw_data_{selected_alert_id}"):
+            st.json(db_manager.get_raw_data(selected_alert_id), expanded=False)
 
         st.subheader("Actions Taken for this Alert")
-        alert_data, actions_df = db_manager.get_alert_with_actions(selected_alert['alert_id'])
+        queued = get_action_outbox().pending(selected_alert_id)
+        if queued:
+            st.caption(f"{len(queued)} more action(s) submitted for this alert are still being saved.")
         if actions_df.empty:
             st.info("No actions recorded for this alert yet.")
         else:
             st.dataframe(actions_df[['timestamp', 'action_taken'] + SURGERIES], use_container_width=True)
 
 
-def enter_actions_page(db_manager: DBManager):
+def enter_actions_page(db_manager: StorageBackend):
     st.header("Enter Actions for an Alert")
 
-    alerts_df = db_manager.get_all_alerts()
+    filters = alert_filters("actions", db_manager)
+    alerts_df = paged_alerts("actions", db_manager, ['alert_id', 'title'], filters)
     if alerts_df.empty:
         st.warning("No alerts available to enter actions for. Please fetch alerts first.")
         return
 
-    selected_alert_title = st.selectbox("Select an alert to record actions:", alerts_df['title'].tolist())
+    titles = dict(zip(alerts_df['alert_id'], alerts_df['title']))
+    selected_alert_id = st.selectbox("Select an alert to record actions:", list(titles), format_func=titles.get)
 
-    if selected_alert_title:
-        selected_alert = alerts_df[alerts_df['title'] == selected_alert_title].iloc[0].to_dict()
+    if selected_alert_id:
+        selected_alert = db_manager.get_alert(selected_alert_id, columns=['alert_id', 'title', 'summary'])
+        if not selected_alert:
+            st.warning("This alert could not be loaded.")
+            return
         st.write(f"**Selected Alert:** {selected_alert['title']}")
         st.write(f"**Summary:** {selected_alert['summary']}")
+        suggested_counts = suggested_patient_counts().get(selected_alert_id, {})
 
         with st.form("pharmacist_action_form"):
             action_taken = st.text_area("Actions Taken:", help="Describe the actions taken in response to this alert.")
 
             st.subheader("Patients Affected per Surgery")
+            if suggested_counts:
+                st.caption("Counts are pre-filled from the surgeries' medication exports. Check them before submitting.")
             surgery_patient_counts = {}
             cols = st.columns(3) # Display in 3 columns for better layout
             for i, surgery in enumerate(SURGERIES):
@@ -97,9 +322,9 @@ def enter_actions_page(db_manager: DBManager):
                     surgery_patient_counts[surgery] = st.number_input(
                         f"Patients in {surgery}:",
                         min_value=0,
-                        value=0,
+                        value=int(suggested_counts.get(surgery, 0)),
                         step=1,
-                        key=f"patients_{surgery}"
+                        key=f"patients_{selected_alert_id}_{surgery}"
                     )
 
             submitted = st.form_submit_button("Submit Actions")
@@ -113,7 +338,8 @@ def enter_actions_page(db_manager: DBManager):
                         "action_taken": action_taken,
                         **surgery_patient_counts # Unpack surgery counts
                     }
-                    db_manager.insert_pharmacist_action(action_data)
+                    # Queued on local disk and written to the database in the background.
+                    get_action_outbox().submit(action_data)
                     st.success("Actions recorded successfully!")
                     st.rerun() # Rerun to clear form and update display
 
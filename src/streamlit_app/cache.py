@@ -0,0 +1,208 @@
+import time
+import threading
+from collections import OrderedDict
+
+from src.database.storage import read_error_count
+
+# How long cached alert lists and action frames stay fresh, in seconds.
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def _freeze(value):
+    """Turns filter arguments (lists, dicts) into a hashable cache key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache shared by every Streamlit session.
+
+    Entries live in namespaces ("alert_pages", "actions", ...) so writes can invalidate
+    exactly the keys they affect. Entries expire after `ttl_seconds`, and the least
+    recently used entries are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}  # namespace -> number of invalidations, to spot those during a load
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, namespace: str, key, loader):
+        """
+        Returns the cached value for (namespace, key), calling `loader()` and caching its result
+        on a miss. A result is not cached if it is None or if a database read failed while it
+        was loaded (the backends then return an empty result), so a transient error is retried
+        on the next call instead of being served for the whole TTL. Nor is it cached if the
+        namespace was invalidated while it was loaded, as it may predate the write.
+        """
+        cache_key = (namespace, _freeze(key))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.setdefault(namespace, 0)
+        errors = read_error_count()
+        value = loader()
+        if value is None or read_error_count() != errors:
+            return value
+        with self._lock:
+            if self._generations.get(namespace) != generation:
+                return value
+            self._entries[cache_key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, namespace: str, key=None):
+        """Drops one key of a namespace, or the whole namespace if no key is given."""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            if key is not None:
+                self._entries.pop((namespace, _freeze(key)), None)
+                return
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations = {namespace: generation + 1 for namespace, generation in self._generations.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class CachedDBManager:
+    """
+    Read-through / write-through cache around a DBManager.
+
+    Reads used by the dashboard are served from a shared TTLCache. Writes go straight to the
+    database and then invalidate only the cached keys they affect: a pharmacist action clears
+    that alert's action frame and the batched action reads, an alert upsert clears alert
+    lists and that alert's detail.
+    Any other attribute is delegated to the wrapped manager.
+
+    If a search index is attached, upserted alerts are (re-)indexed as they are written.
+
+    Cached DataFrames are shared between sessions and must not be modified in place.
+    """
+
+    def __init__(self, db_manager, cache: TTLCache, search_index=None):
+        self.db_manager = db_manager
+        self.cache = cache
+        self.search_index = search_index
+
+    def __getattr__(self, name):
+        return getattr(self.db_manager, name)
+
+    # Reads
+
+    def query_alerts(self, **kwargs):
+        return self.cache.get_or_load("alert_pages", kwargs, lambda: self.db_manager.query_alerts(**kwargs))
+
+    def get_all_alerts(self):
+        return self.cache.get_or_load("alert_pages", "all", self.db_manager.get_all_alerts)
+
+    def get_alert_sources(self):
+        return self.cache.get_or_load("alert_sources", None, self.db_manager.get_alert_sources)
+
+    def get_alert(self, alert_id: str, columns: list = None):
+        return self.cache.get_or_load("alert", (alert_id, columns), lambda: self.db_manager.get_alert(alert_id, columns=columns))
+
+    def get_alert_with_actions(self, alert_id: str):
+        return self.cache.get_or_load("alert_with_actions", alert_id, lambda: self.db_manager.get_alert_with_actions(alert_id))
+
+    def get_actions_for_alerts(self, alert_ids: list):
+        return self.cache.get_or_load("actions", alert_ids, lambda: self.db_manager.get_actions_for_alerts(alert_ids))
+
+    def get_action_summaries(self, alert_ids: list = None):
+        return self.cache.get_or_load("action_summaries", alert_ids, lambda: self.db_manager.get_action_summaries(alert_ids))
+
+    # Writes
+
+    def _invalidate_alerts(self, alert_ids):
+        self.cache.invalidate("alert_pages")
+        self.cache.invalidate("alert_sources")
+        self.cache.invalidate("alert")  # keyed by (alert_id, columns), so drop the namespace
+        for alert_id in alert_ids:
+            self.cache.invalidate("alert_with_actions", alert_id)
+
+    def insert_alert(self, alert_data: dict):
+        result = self.db_manager.insert_alert(alert_data)
+        self._invalidate_alerts([alert_data.get('alert_id')])
+        if result is not None and self.search_index is not None:
+            self.search_index.add_alert(alert_data)
+        return result
+
+    def insert_alerts(self, alerts, **kwargs):
+        if self.search_index is not None and not hasattr(alerts, 'columns'):
+            alerts = list(alerts)  # read again below to update the search index
+        report = self.db_manager.insert_alerts(alerts, **kwargs)
+        if self.search_index is not None:
+            failed = {alert_id for chunk in report if not chunk["ok"] for alert_id in chunk.get("alert_ids", ())}
+            records = alerts.to_dict('records') if hasattr(alerts, 'columns') else alerts
+            self.search_index.add_alerts(alert for alert in records if alert.get('alert_id') not in failed)
+        if hasattr(alerts, 'columns'):
+            alert_ids = alerts['alert_id'].tolist() if 'alert_id' in alerts.columns else []
+        else:
+            alert_ids = None
+        if alert_ids is None:
+            # A consumed iterable can't be re-read; drop every cached alert detail instead.
+            self.cache.invalidate("alert_with_actions")
+            alert_ids = []
+        self._invalidate_alerts(alert_ids)
+        return report
+
+    def _invalidate_actions(self, alert_ids):
+        for alert_id in alert_ids:
+            self.cache.invalidate("alert_with_actions", alert_id)
+        # Batch reads are keyed by lists of alert IDs, so drop those namespaces.
+        self.cache.invalidate("actions")
+        self.cache.invalidate("action_summaries")
+
+    def insert_pharmacist_action(self, action_data: dict):
+        result = self.db_manager.insert_pharmacist_action(action_data)
+        self._invalidate_actions([action_data.get('alert_id')])
+        return result
+
+    def insert_pharmacist_actions(self, actions: list):
+        result = self.db_manager.insert_pharmacist_actions(actions)
+        self._invalidate_actions({action.get('alert_id') for action in actions})
+        return result
+
+    # Delta sync
+
+    def apply_changes(self, changes: dict):
+        """
+        Drops the cached data of rows changed by other writers (the scraper, other app
+        processes), as reported by AlertSnapshot.refresh, and re-indexes the changed alerts.
+        """
+        alerts_df = changes.get('alerts')
+        if alerts_df is not None and not alerts_df.empty:
+            self._invalidate_alerts(alerts_df['alert_id'].tolist())
+            if self.search_index is not None:
+                self.search_index.add_alerts(alerts_df)
+        actions_df = changes.get('pharmacist_actions')
+        if actions_df is not None and not actions_df.empty:
+            self._invalidate_actions(actions_df['alert_id'].unique().tolist())
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# The in-memory Supabase and Firecrawl fakes live with the benchmarks.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from fakes import FakeSupabaseClient
+from src.database.db_manager import DBManager
+from src.database.sqlite_manager import SQLiteDBManager
+
+
+@pytest.fixture
+def supabase_db():
+    """DBManager over the in-memory Supabase fake."""
+    return DBManager(client=FakeSupabaseClient())
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    return SQLiteDBManager(str(tmp_path / "alertrx.db"))
+
+
+@pytest.fixture(params=["supabase", "sqlite"])
+def db_manager(request, tmp_path):
+    """Each storage backend in turn."""
+    if request.param == "supabase":
+        return DBManager(client=FakeSupabaseClient())
+    return SQLiteDBManager(str(tmp_path / "alertrx.db"))
+
+
+def make_alert(alert_id: str, **fields) -> dict:
+    """A normalized alert as process_alerts_to_dataframe produces it."""
+    alert = {
+        "alert_id": alert_id,
+        "title": f"Alert {alert_id}",
+        "date_published": "2024-05-01T09:00:00",
+        "severity": "High",
+        "summary": f"Summary of {alert_id}",
+        "affected_products": ["Product A"],
+        "recommendations": ["Check stock"],
+        "source_url": f"https://example.com/{alert_id}",
+        "source_name": "MHRA Drug Alerts",
+        "raw_data": {"id": alert_id},
+        "canonical_alert_id": None,
+    }
+    alert.update(fields)
+    return alert
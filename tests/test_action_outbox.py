@@ -0,0 +1,88 @@
+import pytest
+
+from src.database.action_outbox import ActionOutbox
+from tests.conftest import make_alert
+
+
+class LostResponseBackend:
+    """Stores every batch, but reports the first `lost` calls as failed, like a response lost on the way back."""
+
+    def __init__(self, db_manager, lost: int):
+        self.db_manager = db_manager
+        self.lost = lost
+        self.calls = 0
+
+    def insert_pharmacist_actions(self, actions: list):
+        self.calls += 1
+        result = self.db_manager.insert_pharmacist_actions(actions)
+        if self.calls <= self.lost:
+            return None
+        return result
+
+
+class DownBackend:
+    def __init__(self):
+        self.calls = 0
+
+    def insert_pharmacist_actions(self, actions: list):
+        self.calls += 1
+        return None
+
+
+@pytest.fixture
+def alerts_db(sqlite_db):
+    sqlite_db.insert_alerts([make_alert(f"A{i}") for i in range(8)])
+    return sqlite_db
+
+
+def stored_submission_ids(db_manager) -> list:
+    actions = db_manager.get_actions_for_alerts([f"A{i}" for i in range(8)] + ["missing"])
+    return sorted(actions['submission_id']) if not actions.empty else []
+
+
+def test_a_rejected_action_does_not_hold_back_the_batch(alerts_db):
+    outbox = ActionOutbox(alerts_db, path=":memory:", batch_size=8)
+    # The first action refers to an unknown alert, so the backend rejects any batch holding it.
+    outbox.submit({"alert_id": "missing", "action_taken": "Reviewed", "submission_id": "bad"})
+    for i in range(7):
+        outbox.submit({"alert_id": f"A{i}", "action_taken": "Reviewed", "submission_id": f"s{i}"})
+
+    assert outbox.flush() == 7
+    assert stored_submission_ids(alerts_db) == [f"s{i}" for i in range(7)]
+    assert [action["submission_id"] for action in outbox.pending()] == ["bad"]
+    assert outbox.stats()["failing"] == 1
+
+
+def test_retry_after_a_lost_response_stores_each_action_once(alerts_db):
+    backend = LostResponseBackend(alerts_db, lost=1)
+    outbox = ActionOutbox(backend, path=":memory:", batch_size=4, max_backoff=0)
+    for i in range(4):
+        outbox.submit({"alert_id": f"A{i}", "action_taken": "Reviewed", "submission_id": f"s{i}"})
+    outbox.submit({"alert_id": "A0", "action_taken": "Reviewed", "submission_id": "s0"})  # re-submitted
+
+    outbox.flush()
+
+    assert stored_submission_ids(alerts_db) == ["s0", "s1", "s2", "s3"]
+    assert outbox.pending() == []
+    assert alerts_db.get_action_summaries(["A0"])['action_count'].tolist() == [1]
+
+
+def test_actions_stay_queued_while_the_backend_is_down(tmp_path, alerts_db):
+    path = str(tmp_path / "outbox.db")
+    backend = DownBackend()
+    outbox = ActionOutbox(backend, path=path, batch_size=4)
+    for i in range(4):
+        outbox.submit({"alert_id": f"A{i}", "action_taken": "Reviewed", "submission_id": f"s{i}"})
+
+    assert outbox.flush() == 0
+    assert backend.calls == 7  # the batch, both halves, and each action on its own
+    assert outbox.stats()["failing"] == 4
+    outbox.conn.close()
+
+    # The queue survives a restart and is sent once the backend is back.
+    reopened = ActionOutbox(alerts_db, path=path)
+    with reopened.conn:
+        reopened.conn.execute("UPDATE action_outbox SET next_attempt_at = 0")
+    assert reopened.flush() == 4
+    assert stored_submission_ids(alerts_db) == ["s0", "s1", "s2", "s3"]
+    assert reopened.stats()["pending"] == 0
@@ -0,0 +1,68 @@
+from src.database.sqlite_manager import SQLiteDBManager
+from src.database.storage import SURGERIES, action_status
+from tests.conftest import make_alert
+
+SURGERY_A, SURGERY_B = SURGERIES[0], SURGERIES[1]
+
+
+def make_action(alert_id: str, timestamp: str, submission_id: str = None, **patients) -> dict:
+    return {"alert_id": alert_id, "action_taken": "Reviewed", "timestamp": timestamp,
+            "submission_id": submission_id, **{s: patients.get(s, 0) for s in SURGERIES}}
+
+
+def record_actions(db_manager):
+    db_manager.insert_alerts([make_alert("A1"), make_alert("A2"), make_alert("A3")])
+    db_manager.insert_pharmacist_action(make_action("A1", "2024-05-02T10:00:00", "s1", **{SURGERY_A: 3}))
+    db_manager.insert_pharmacist_action(make_action("A1", "2024-05-03T10:00:00", "s2", **{SURGERY_B: 2}))
+    batch = [make_action("A2", "2024-05-04T10:00:00", "s3", **{SURGERY_A: 1, SURGERY_B: 4}),
+             make_action("A1", "2024-05-01T10:00:00", "s4", **{SURGERY_A: 5})]
+    db_manager.insert_pharmacist_actions(batch)
+    db_manager.insert_pharmacist_actions(batch)  # a retried submission adds nothing
+
+
+def summaries_from_actions(db_manager, alert_ids) -> dict:
+    """What the summary of each alert should be, computed from its actions."""
+    actions = db_manager.get_actions_for_alerts(alert_ids)
+    expected = {}
+    for alert_id, group in actions.groupby('alert_id'):
+        expected[alert_id] = {"action_count": len(group), "last_action_at": group['timestamp'].max(),
+                              **{s: int(group[s].fillna(0).sum()) for s in SURGERIES}}
+    return expected
+
+
+def summaries_by_alert(summaries) -> dict:
+    return {row['alert_id']: {"action_count": int(row['action_count']), "last_action_at": row['last_action_at'],
+                              **{s: int(row[s] or 0) for s in SURGERIES}}
+            for row in summaries.to_dict('records')}
+
+
+def test_summaries_match_the_recorded_actions(db_manager):
+    record_actions(db_manager)
+    summaries = db_manager.get_action_summaries(["A1", "A2", "A3"])
+
+    assert summaries_by_alert(summaries) == summaries_from_actions(db_manager, ["A1", "A2", "A3"])
+    assert summaries_by_alert(summaries)["A1"]["action_count"] == 3
+    assert summaries_by_alert(summaries)["A1"][SURGERY_A] == 8
+
+
+def test_action_status_of_alerts_with_and_without_actions(db_manager):
+    record_actions(db_manager)
+
+    status = action_status(db_manager.get_action_summaries(), ["A1", "A2", "A3"]).set_index('alert_id')
+
+    assert status['status'].to_dict() == {"A1": "Complete", "A2": "Complete", "A3": "Outstanding"}
+    assert status['patients'].to_dict() == {"A1": 10, "A2": 5, "A3": 0}
+    assert status['action_count'].to_dict() == {"A1": 3, "A2": 1, "A3": 0}
+
+
+def test_sqlite_summary_is_rebuilt_when_empty(tmp_path):
+    db_path = str(tmp_path / "alertrx.db")
+    db_manager = SQLiteDBManager(db_path)
+    record_actions(db_manager)
+    expected = summaries_from_actions(db_manager, ["A1", "A2"])
+    with db_manager._connection() as conn:
+        conn.execute("DELETE FROM alert_action_summary")
+
+    reopened = SQLiteDBManager(db_path)
+
+    assert summaries_by_alert(reopened.get_action_summaries()) == expected
@@ -0,0 +1,91 @@
+from src.database.blob_store import content_hash, decompress_payload, split_raw_data
+from src.database.codec import dumps
+from src.database.migrations import migrate_raw_data_to_blobs
+
+from tests.conftest import make_alert
+
+PAYLOAD = {"markdown": "# Valproate\nNew safety measures.", "metadata": {"sourceURL": "https://example.com/v"}}
+
+
+def store_inline_raw_data(db_manager, alert_id: str, payload: dict):
+    """Puts a payload back in the alert row itself, as rows written before the blob store held it."""
+    if hasattr(db_manager, 'client'):
+        db_manager.client.table('alerts').upsert(
+            {"alert_id": alert_id, "raw_data": dumps(payload), "raw_data_hash": None}, on_conflict='alert_id').execute()
+    else:
+        with db_manager._connection() as conn:
+            conn.execute("UPDATE alerts SET raw_data = ?, raw_data_hash = NULL WHERE alert_id = ?",
+                         (dumps(payload), alert_id))
+
+
+def stored_rows(db_manager, table: str) -> list:
+    if hasattr(db_manager, 'client'):
+        return db_manager.client.table(table).select('*').execute().data
+    return db_manager._query(f"SELECT * FROM {table}")
+
+
+def test_split_raw_data_stores_each_payload_once():
+    rows = [{"alert_id": "A1", "raw_data": dumps(PAYLOAD)},
+            {"alert_id": "A2", "raw_data": PAYLOAD},  # JSONB mode sends the dict itself
+            {"alert_id": "A3", "raw_data": "{}"},
+            {"alert_id": "A4"}]
+
+    blobs = split_raw_data(rows)
+
+    key = content_hash(dumps(PAYLOAD))
+    assert list(blobs) == [key]
+    assert decompress_payload(blobs[key]["data"]) == PAYLOAD
+    assert blobs[key]["size"] == len(dumps(PAYLOAD).encode("utf-8"))
+    assert [row.get("raw_data_hash") for row in rows] == [key, key, None, None]
+    assert [row.get("raw_data") for row in rows] == [None, None, None, None]
+    assert "raw_data" not in rows[3]
+
+
+def test_identical_payloads_share_one_blob(db_manager):
+    db_manager.insert_alerts([make_alert("A1", raw_data=PAYLOAD), make_alert("A2", raw_data=PAYLOAD),
+                              make_alert("A3", raw_data={"id": "A3"})])
+
+    assert len(stored_rows(db_manager, 'alert_blobs')) == 2
+    assert all(row["raw_data"] is None for row in stored_rows(db_manager, 'alerts'))
+    assert db_manager.get_raw_data("A1") == PAYLOAD
+    assert db_manager.get_raw_data("A2") == PAYLOAD
+    assert db_manager.get_raw_data("A3") == {"id": "A3"}
+
+
+def test_migrate_raw_data_to_blobs(db_manager):
+    db_manager.insert_alerts([make_alert(f"A{i}", raw_data={"id": f"A{i}"}) for i in range(5)])
+    for alert_id in ("A0", "A1", "A2"):
+        store_inline_raw_data(db_manager, alert_id, PAYLOAD)
+
+    stats = migrate_raw_data_to_blobs(db_manager, page_size=2)
+
+    assert stats == {"scanned": 5, "migrated": 3, "blobs": 1, "failed": []}
+    rows = {row["alert_id"]: row for row in stored_rows(db_manager, 'alerts')}
+    assert all(row["raw_data"] is None for row in rows.values())
+    assert {rows[alert_id]["raw_data_hash"] for alert_id in ("A0", "A1", "A2")} == {content_hash(dumps(PAYLOAD))}
+    assert [db_manager.get_raw_data(f"A{i}") for i in range(5)] == [PAYLOAD] * 3 + [{"id": "A3"}, {"id": "A4"}]
+    assert migrate_raw_data_to_blobs(db_manager)["migrated"] == 0
+
+
+def test_migrated_rows_keep_the_date_format_of_inserted_rows(db_manager):
+    date = "2024-05-01T09:00:00+00:00"
+    db_manager.insert_alerts([make_alert("A1", date_published=date), make_alert("A2", date_published=date)])
+    store_inline_raw_data(db_manager, "A1", PAYLOAD)
+
+    migrate_raw_data_to_blobs(db_manager)
+
+    rows = {row["alert_id"]: row for row in stored_rows(db_manager, 'alerts')}
+    assert rows["A1"]["raw_data_hash"] is not None
+    assert rows["A1"]["date_published"] == rows["A2"]["date_published"] == date
+
+
+def test_migrate_raw_data_to_blobs_dry_run_writes_nothing(db_manager):
+    db_manager.insert_alerts([make_alert("A1")])
+    store_inline_raw_data(db_manager, "A1", PAYLOAD)
+    blobs_before = len(stored_rows(db_manager, 'alert_blobs'))
+
+    stats = migrate_raw_data_to_blobs(db_manager, dry_run=True)
+
+    assert (stats["migrated"], stats["blobs"]) == (1, 1)
+    assert len(stored_rows(db_manager, 'alert_blobs')) == blobs_before
+    assert stored_rows(db_manager, 'alerts')[0]["raw_data_hash"] is None
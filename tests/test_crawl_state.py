@@ -0,0 +1,74 @@
+import pytest
+
+from fakes import FakeFirecrawlApp
+from src.scraper.crawl_state import CrawlStateStore, page_content_hash
+from src.scraper.firecrawl_scraper import FirecrawlScraper
+from src.scraper.sources import GOV_UK_DRUG_SAFETY_UPDATE as SOURCE, make_alert_id
+
+TOTAL_ALERTS = 45  # three list pages of 20
+
+
+@pytest.fixture
+def app():
+    return FakeFirecrawlApp(TOTAL_ALERTS, SOURCE["base_url"])
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "crawl_state.db")
+
+
+def full_crawl(app, state_path) -> dict:
+    """Crawls every alert of the source and records each page, as ingest does once the alerts are stored."""
+    scraper = FirecrawlScraper(app=app, requests_per_minute=60_000)
+    state_store = CrawlStateStore(state_path)
+    crawled = {}
+    for alert_id, url, page in scraper.crawl_source_incremental(SOURCE, state_store, max_workers=1):
+        state_store.record_page(url, page, alert_id=alert_id)
+        crawled[url] = alert_id
+    state_store.close()
+    return crawled
+
+
+def test_incremental_crawl_stops_at_the_first_known_alert(app, state_path):
+    assert len(full_crawl(app, state_path)) == TOTAL_ALERTS
+    # 3 list pages with links, the empty 4th that ends the walk, and every alert page.
+    assert app.requests == 4 + TOTAL_ALERTS
+
+    app.total_alerts += 3  # three new alerts at the top of the list
+    app.requests = 0
+    scraper = FirecrawlScraper(app=app, requests_per_minute=60_000)
+    state_store = CrawlStateStore(state_path)  # reopened: the state persisted across runs
+
+    new = list(scraper.crawl_source_incremental(SOURCE, state_store, max_workers=1))
+
+    assert sorted(alert_id for alert_id, _, _ in new) == sorted(
+        make_alert_id(SOURCE, f"{SOURCE['base_url']}/synthetic-alert-{i:07d}") for i in range(45, 48))
+    assert app.requests == 1 + 3  # the first list page, then the new alert pages only
+
+
+def test_known_alert_ids_from_the_database_also_stop_the_walk(app, state_path):
+    scraper = FirecrawlScraper(app=app, requests_per_minute=60_000)
+    newest_url = f"{SOURCE['base_url']}/synthetic-alert-{TOTAL_ALERTS - 1:07d}"
+
+    links = scraper.discover_new_alert_links(SOURCE, CrawlStateStore(state_path),
+                                             known_alert_ids={make_alert_id(SOURCE, newest_url)})
+
+    assert links == {}
+    assert app.requests == 1
+
+
+def test_unchanged_pages_are_skipped_by_content_hash(app, state_path):
+    crawled = full_crawl(app, state_path)
+    scraper = FirecrawlScraper(app=app, requests_per_minute=60_000)
+    state_store = CrawlStateStore(state_path)
+    changed_url = next(iter(crawled))
+    state_store.record(changed_url, "hash of an older version", alert_id=crawled[changed_url])
+
+    pages = list(scraper.scrape_alert_pages(crawled, state_store, max_workers=1))
+
+    assert [url for _, url, _ in pages] == [changed_url]
+    assert state_store.is_unchanged(changed_url, "hash of an older version")  # recorded only once stored
+    state_store.record_page(changed_url, pages[0][2], alert_id=crawled[changed_url])
+    assert state_store.get(changed_url)["content_hash"] == page_content_hash(pages[0][2])
+    assert list(scraper.scrape_alert_pages(crawled, state_store, max_workers=1)) == []
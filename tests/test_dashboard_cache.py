@@ -0,0 +1,64 @@
+from src.streamlit_app.cache import TTLCache, CachedDBManager
+
+from tests.conftest import make_alert
+
+
+class FlakyClient:
+    """Wraps a Supabase client and fails the next `failures` requests."""
+
+    def __init__(self, client, failures: int = 0):
+        self.client = client
+        self.failures = failures
+
+    def table(self, name):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("temporarily unavailable")
+        return self.client.table(name)
+
+
+def test_failed_reads_are_not_cached(supabase_db):
+    supabase_db.insert_alerts([make_alert("A1")])
+    supabase_db.client = FlakyClient(supabase_db.client, failures=1)
+    cached = CachedDBManager(supabase_db, TTLCache(ttl_seconds=60))
+
+    assert cached.get_alert("A1") == {}  # the error result is returned once...
+    assert cached.get_alert("A1")["title"] == "Alert A1"  # ...but not served from the cache
+    assert cached.cache.stats()["misses"] == 2
+
+
+def test_successful_and_empty_reads_are_cached(supabase_db):
+    cached = CachedDBManager(supabase_db, TTLCache(ttl_seconds=60))
+
+    assert cached.get_actions_for_alerts(["A1"]).empty
+    assert cached.get_actions_for_alerts(["A1"]).empty
+    assert cached.cache.stats()["hits"] == 1
+
+
+def test_none_is_not_cached():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    cache.get_or_load("alert", "A1", loader)
+    cache.get_or_load("alert", "A1", loader)
+    assert len(calls) == 2
+
+
+def test_result_loaded_across_an_invalidation_is_not_cached():
+    cache = TTLCache()
+    versions = iter(["before the write", "after the write"])
+
+    def loader():
+        value = next(versions)
+        cache.invalidate("actions", "A1")  # a write lands while the read is in flight
+        return value
+
+    assert cache.get_or_load("actions", "A1", loader) == "before the write"
+    assert cache.stats()["entries"] == 0
+    assert cache.get_or_load("actions", "A1", lambda: next(versions)) == "after the write"
+    assert cache.get_or_load("actions", "A1", loader) == "after the write"
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,89 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.processor.data_normalizer import MEDICAL_ALERT_SCHEMA, normalize_alert_data, process_alerts_to_dataframe
+
+
+def row_wise_dataframe(list_of_raw_alerts: list) -> pd.DataFrame:
+    """The original builder: one normalize_alert_data dict per alert, then per-column dtype fixes."""
+    df = pd.DataFrame([normalize_alert_data(alert) for alert in list_of_raw_alerts])
+    for col, dtype in MEDICAL_ALERT_SCHEMA.items():
+        if col in df.columns:
+            if str(dtype).startswith("datetime"):
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            elif dtype == list:
+                df[col] = df[col].apply(lambda x: x if isinstance(x, list) else [x] if x is not None else [])
+            elif dtype is str:
+                # The original also called astype(dict) on raw_data, a no-op that newer pandas rejects.
+                df[col] = df[col].astype(dtype, errors='ignore')
+    return df
+
+
+def raw_alert(alert_id, **fields):
+    alert = {"alert_id": alert_id, "title": f"Alert {alert_id}", "date_published": "2024-05-01",
+             "severity": "High", "summary": "Summary", "affected_products": ["Drug A 10mg"],
+             "recommendations": ["Review patients"], "source_url": f"https://example.com/{alert_id}",
+             "source_name": "MHRA Drug Alerts"}
+    alert.update(fields)
+    return alert
+
+
+def assert_same_frame(raw_alerts):
+    expected = row_wise_dataframe(raw_alerts)
+    actual = process_alerts_to_dataframe(raw_alerts)
+    # The column-wise builder stores severity and source_name as categoricals; values must match.
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False, check_dtype=False)
+    assert actual['date_published'].dtype == 'datetime64[ns]'
+
+
+def test_matches_row_wise_builder():
+    assert_same_frame([raw_alert("A1"), raw_alert("A2", severity="Low", source_name="NICE Safety Notices")])
+
+
+def test_matches_row_wise_builder_with_missing_values():
+    raw_alerts = [
+        raw_alert("A1"),
+        {"alert_id": "A2"},  # every other field missing
+        raw_alert("A3", date_published=None, affected_products=None, recommendations="Single recommendation"),
+        raw_alert("A4", date_published="not a date", summary=None),
+    ]
+    assert_same_frame(raw_alerts)
+
+
+def test_matches_row_wise_builder_with_mixed_date_formats():
+    raw_alerts = [
+        raw_alert("A1", date_published="2024-05-01"),
+        raw_alert("A2", date_published="1 May 2024"),
+        raw_alert("A3", date_published="2024-05-01T10:30:00"),
+        raw_alert("A4", date_published="2024-05-01 10:30:00.123456"),
+        raw_alert("A5", date_published=pd.Timestamp("2024-05-02")),
+        raw_alert("A6", date_published=None),
+    ]
+    assert_same_frame(raw_alerts)
+
+
+def test_mixed_timezones_parse_to_naive_utc_without_warnings():
+    raw_alerts = [
+        raw_alert("A1", date_published="2024-05-01T10:00:00+01:00"),
+        raw_alert("A2", date_published="2024-05-01T10:00:00Z"),
+        raw_alert("A3", date_published="2024-05-01"),
+    ]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        alerts_df = process_alerts_to_dataframe(raw_alerts)
+
+    assert alerts_df['date_published'].dtype == 'datetime64[ns]'
+    assert alerts_df['date_published'].tolist() == [
+        pd.Timestamp("2024-05-01 09:00:00"), pd.Timestamp("2024-05-01 10:00:00"), pd.Timestamp("2024-05-01")]
+
+
+def test_empty_input_gives_empty_frame():
+    assert process_alerts_to_dataframe([]).empty
+
+
+@pytest.mark.parametrize("value, expected", [(["a", "b"], ["a", "b"]), ("a", ["a"]), (None, [])])
+def test_list_fields_are_always_lists(value, expected):
+    alerts_df = process_alerts_to_dataframe([raw_alert("A1", affected_products=value)])
+    assert alerts_df['affected_products'].iloc[0] == expected
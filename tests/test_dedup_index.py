@@ -0,0 +1,73 @@
+import pandas as pd
+
+from src.processor.dedup_index import NearDuplicateIndex
+
+TITLE = "Valproate: new safety measures for male patients"
+SUMMARY = "Healthcare professionals should review treatment with valproate in men planning a family."
+MHRA, NICE, GOV_UK = "MHRA Drug Alerts", "NICE Safety Notices", "GOV.UK Drug Safety Update"
+
+
+def test_near_duplicates_from_another_source_share_the_first_alert_id():
+    index = NearDuplicateIndex()
+
+    assert index.add("A", TITLE, SUMMARY, source_name=MHRA) == "A"
+    assert index.add("B", TITLE + ".", SUMMARY.replace("should", "must"), source_name=NICE) == "A"
+    assert index.add("C", "Isotretinoin: reminder of pregnancy prevention", "Prescribers must check.",
+                     source_name=NICE) == "C"
+
+
+def test_near_identical_alerts_of_one_source_are_distinct():
+    alerts_df = pd.DataFrame({"alert_id": ["A", "B", "C"],
+                              "title": [TITLE, TITLE.replace("male", "female"), TITLE + "."],
+                              "summary": [SUMMARY, SUMMARY.replace("men", "women"), SUMMARY],
+                              "source_name": [MHRA, MHRA, NICE]})
+
+    canonical = NearDuplicateIndex().assign_canonical_ids(alerts_df)
+
+    assert canonical.tolist() == [None, None, "A"]
+
+
+def test_a_duplicate_never_joins_a_cluster_of_its_own_source():
+    index = NearDuplicateIndex()
+    index.add("A", TITLE, SUMMARY, source_name=MHRA)
+    index.add("B", TITLE, SUMMARY, source_name=NICE)
+
+    # B is of another source, but its cluster is A's: an MHRA alert must not join it.
+    assert index.add("C", TITLE, SUMMARY, source_name=MHRA) == "C"
+    assert index.add("D", TITLE, SUMMARY, source_name=GOV_UK) == "A"
+
+
+def test_alerts_without_text_are_never_duplicates():
+    index = NearDuplicateIndex()
+
+    assert index.add("A", "", "", source_name=MHRA) == "A"
+    assert index.add("B", "", "", source_name=NICE) == "B"
+    assert index.add("C", "No Title", "", source_name=MHRA) == "C"
+    assert index.add("D", "No Title", None, source_name=NICE) == "D"
+    assert len(index) == 0
+    assert index.query("No Title") == []
+
+
+def test_assign_canonical_ids_with_placeholder_titles():
+    alerts_df = pd.DataFrame({"alert_id": ["A", "B", "C", "D"],
+                              "title": ["No Title", "No Title", TITLE, TITLE],
+                              "summary": ["", "", SUMMARY, SUMMARY],
+                              "source_name": [MHRA, NICE, MHRA, NICE]})
+
+    canonical = NearDuplicateIndex().assign_canonical_ids(alerts_df)
+
+    assert canonical.tolist() == [None, None, None, "C"]
+
+
+def test_save_and_load_keep_canonical_ids_and_sources(tmp_path):
+    index = NearDuplicateIndex()
+    index.add("A", TITLE, SUMMARY, source_name=MHRA)
+    index.add("B", TITLE, SUMMARY, source_name=NICE)
+    path = str(tmp_path / "dedup.npz")
+    index.save(path)
+
+    loaded = NearDuplicateIndex.load(path)
+
+    assert loaded.canonical_id("B") == "A"
+    assert loaded.add("C", TITLE, SUMMARY, source_name=GOV_UK) == "A"
+    assert loaded.add("D", TITLE, SUMMARY, source_name=MHRA) == "D"
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from src.database.export import export_tables, load_export
+from src.database.storage import SURGERIES
+from tests.conftest import make_alert
+
+
+def action(alert_id: str, submission_id: str) -> dict:
+    return {"alert_id": alert_id, "action_taken": "Reviewed", "submission_id": submission_id,
+            "timestamp": "2024-05-02T10:00:00+00:00", SURGERIES[0]: 2}
+
+
+def partitions(export_dir, table: str) -> list:
+    table_dir = os.path.join(export_dir, table)
+    return sorted(os.path.relpath(os.path.join(root, name), table_dir)
+                  for root, _, names in os.walk(table_dir) for name in names)
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_incremental_export_rewrites_only_changed_partitions(db_manager, tmp_path, export_format):
+    export_dir = str(tmp_path / "export")
+    db_manager.insert_alerts([make_alert("A1"), make_alert("A2", source_name="NICE Safety Notices"),
+                              make_alert("A3", date_published="2024-06-03T09:00:00")])
+    db_manager.insert_pharmacist_actions([action("A1", "s1"), action("A2", "s2")])
+
+    stats = export_tables(db_manager, export_dir, export_format)
+
+    assert stats == {"alerts": {"rows": 3, "partitions": 3}, "pharmacist_actions": {"rows": 2, "partitions": 2}}
+    assert export_tables(db_manager, export_dir, export_format) == {
+        "alerts": {"rows": 0, "partitions": 0}, "pharmacist_actions": {"rows": 0, "partitions": 0}}
+
+    # Moving A3 to May rewrites its old and new partitions only.
+    db_manager.insert_alerts([make_alert("A3", title="Moved", date_published="2024-05-20T09:00:00")])
+    stats = export_tables(db_manager, export_dir, export_format)
+
+    assert stats["alerts"] == {"rows": 1, "partitions": 2}
+    assert not any(path.startswith("month=2024-06") for path in partitions(export_dir, 'alerts'))
+    alerts = load_export('alerts', export_dir).set_index('alert_id')
+    assert alerts.loc["A3", 'title'] == "Moved"
+    assert alerts.loc["A1", 'affected_products'] == ["Product A"]
+    assert sorted(load_export('alerts', export_dir, months=["2024-05"], sources=["MHRA Drug Alerts"])['alert_id']) == [
+        "A1", "A3"]
+
+
+def test_actions_move_when_their_alert_changes_source(db_manager, tmp_path):
+    export_dir = str(tmp_path / "export")
+    db_manager.insert_alerts([make_alert("A1")])
+    db_manager.insert_pharmacist_actions([action("A1", "s1"), action("A1", "s2")])
+    export_tables(db_manager, export_dir)
+
+    db_manager.insert_alerts([make_alert("A1", source_name="NICE Safety Notices")])
+    stats = export_tables(db_manager, export_dir)
+
+    assert stats["pharmacist_actions"] == {"rows": 2, "partitions": 2}
+    assert partitions(export_dir, 'pharmacist_actions') == [
+        os.path.join("month=2024-05", "source=NICE%20Safety%20Notices", "part-0.parquet")]
+    actions = load_export('pharmacist_actions', export_dir)
+    assert actions['source_name'].tolist() == ["NICE Safety Notices"] * 2
+    assert actions[SURGERIES[0]].tolist() == [2, 2]
+
+
+def test_actions_exported_before_their_alert_move_to_its_source(supabase_db, tmp_path):
+    export_dir = str(tmp_path / "export")
+    supabase_db.insert_pharmacist_actions([action("A1", "s1")])
+    export_tables(supabase_db, export_dir)
+    assert load_export('pharmacist_actions', export_dir, sources=["unknown"])['submission_id'].tolist() == ["s1"]
+
+    supabase_db.insert_alerts([make_alert("A1")])
+    export_tables(supabase_db, export_dir)
+
+    assert partitions(export_dir, 'pharmacist_actions') == [
+        os.path.join("month=2024-05", "source=MHRA%20Drug%20Alerts", "part-0.parquet")]
+    assert load_export('pharmacist_actions', export_dir)['source_name'].tolist() == ["MHRA Drug Alerts"]
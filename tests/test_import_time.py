@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from main import DEFAULT_IMPORT_BUDGET_MS, ENTRY_POINT_MODULES, import_time_report
+
+HEAVY_PACKAGES = ["pandas", "numpy", "supabase", "firecrawl"]
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Wall-clock checks depend on the machine and its load: run them with ALERTRX_TIMING_TESTS=1.
+timing = pytest.mark.skipif(not os.getenv("ALERTRX_TIMING_TESTS"), reason="set ALERTRX_TIMING_TESTS=1 to run timing checks")
+
+
+def test_cli_modules_do_not_import_heavy_packages():
+    modules = ENTRY_POINT_MODULES["cli"]
+    code = (f"import sys, json; import {', '.join(modules)}; "
+            f"print(json.dumps([name for name in {HEAVY_PACKAGES!r} if name in sys.modules]))")
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT_DIR, check=True)
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+@timing
+def test_cli_modules_import_within_budget():
+    total_ms, slowest = import_time_report(ENTRY_POINT_MODULES["cli"])
+
+    assert total_ms <= DEFAULT_IMPORT_BUDGET_MS, slowest
+
+
+def test_lazy_module_loads_on_first_use():
+    code = ("import sys; from src.lazy_imports import lazy_import; pd = lazy_import('pandas'); "
+            "assert 'pandas' not in sys.modules; frame = pd.DataFrame({'a': [1]}); "
+            "assert sys.modules['pandas'].DataFrame is pd.DataFrame; print(len(frame))")
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT_DIR)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "1"
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from fakes import FakeFirecrawlApp
+from src.pipeline.ingest import IngestCheckpoint, ingest_source
+from src.scraper.crawl_state import CrawlStateStore
+from src.scraper.firecrawl_scraper import FirecrawlScraper
+from src.scraper.sources import GOV_UK_DRUG_SAFETY_UPDATE as SOURCE
+
+TOTAL_ALERTS = 45
+
+
+class FailingBatchBackend:
+    """Delegates to a backend, but the `fail_on`-th insert_alerts call fails like a dropped connection."""
+
+    def __init__(self, db_manager, fail_on: int):
+        self.db_manager = db_manager
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def insert_alerts(self, alerts, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            return [{"chunk": 0, "ok": False, "rows": 0, "error": "connection reset"}]
+        return self.db_manager.insert_alerts(alerts, **kwargs)
+
+
+@pytest.fixture
+def app():
+    return FakeFirecrawlApp(TOTAL_ALERTS, SOURCE["base_url"])
+
+
+def make_scraper(app) -> FirecrawlScraper:
+    return FirecrawlScraper(app=app, requests_per_minute=60_000)
+
+
+def stored_alert_ids(db_manager) -> list:
+    return sorted(db_manager.get_all_alerts()['alert_id'])
+
+
+def test_failed_batch_resumes_from_the_checkpoint(app, sqlite_db, tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    state_store = CrawlStateStore(str(tmp_path / "crawl_state.db"))
+    backend = FailingBatchBackend(sqlite_db, fail_on=3)
+
+    first = ingest_source(make_scraper(app), backend, SOURCE, state_store, batch_size=10, max_workers=1,
+                          checkpoint_dir=checkpoint_dir)
+
+    assert (first["resumed"], first["discovered"], first["written"], first["batches"]) == (False, TOTAL_ALERTS, 20, 2)
+    assert first["failed_chunks"][0]["error"] == "connection reset"
+    checkpoint = IngestCheckpoint.load(IngestCheckpoint.path_for(checkpoint_dir, SOURCE))
+    assert len(checkpoint.done) == 20
+    written_first = stored_alert_ids(sqlite_db)
+    assert len(written_first) == 20
+    requests_first = app.requests
+
+    second = ingest_source(make_scraper(app), backend, SOURCE, state_store, batch_size=10, max_workers=1,
+                           checkpoint_dir=checkpoint_dir)
+
+    assert (second["resumed"], second["written"], second["failed_chunks"]) == (True, TOTAL_ALERTS - 20, [])
+    # Only the pending alert pages are fetched: the list is not walked again and written pages are not re-scraped.
+    assert app.requests - requests_first == TOTAL_ALERTS - 20
+    stored = stored_alert_ids(sqlite_db)
+    assert len(stored) == TOTAL_ALERTS
+    assert set(written_first) < set(stored)
+    assert sorted(set(checkpoint.links.values())) == stored
+    assert not os.path.exists(checkpoint.path)
+    assert len(state_store.known_alert_ids()) == TOTAL_ALERTS
+
+
+def test_completed_run_leaves_no_checkpoint(app, supabase_db, tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    state_store = CrawlStateStore(str(tmp_path / "crawl_state.db"))
+
+    stats = ingest_source(make_scraper(app), supabase_db, SOURCE, state_store, batch_size=16,
+                          checkpoint_dir=checkpoint_dir)
+
+    assert (stats["resumed"], stats["written"], stats["batches"]) == (False, TOTAL_ALERTS, 3)
+    assert os.listdir(checkpoint_dir) == []
+    assert len(stored_alert_ids(supabase_db)) == TOTAL_ALERTS
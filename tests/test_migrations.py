@@ -0,0 +1,52 @@
+from src.database.codec import loads
+from src.database.migrations import migrate_json_encoding
+
+from tests.conftest import make_alert
+
+
+def _store_legacy_row(db_manager, alert_id):
+    """Writes a row the way the old str() encoding did, bypassing the codec."""
+    row = make_alert(alert_id, affected_products=str(["x", "y"]), recommendations=str(["Stop use"]),
+                     raw_data=str({"id": alert_id}))
+    db_manager.client.table('alerts').upsert(row, on_conflict='alert_id').execute()
+
+
+def _stored_row(db_manager, alert_id):
+    return db_manager.client.table('alerts').select('*').eq('alert_id', alert_id).execute().data[0]
+
+
+def test_json_encoding_round_trips_legacy_rows(supabase_db):
+    _store_legacy_row(supabase_db, "A1")
+    supabase_db.insert_alerts([make_alert("A2")])
+
+    stats = migrate_json_encoding(supabase_db)
+
+    assert stats["scanned"] == 2
+    assert stats["migrated"] == 1
+    assert stats["failed"] == []
+    stored = _stored_row(supabase_db, "A1")
+    assert loads(stored["affected_products"]) == ["x", "y"]
+    assert loads(stored["recommendations"]) == ["Stop use"]
+    alert = supabase_db.get_alert("A1")
+    assert alert["affected_products"] == ["x", "y"]
+    assert supabase_db.get_raw_data("A1") == {"id": "A1"}
+
+
+def test_json_encoding_leaves_json_rows_alone_and_can_be_rerun(supabase_db):
+    _store_legacy_row(supabase_db, "A1")
+    migrate_json_encoding(supabase_db)
+    first = _stored_row(supabase_db, "A1")
+
+    stats = migrate_json_encoding(supabase_db)
+
+    assert stats["migrated"] == 0
+    assert _stored_row(supabase_db, "A1") == first
+
+
+def test_json_encoding_dry_run_writes_nothing(supabase_db):
+    _store_legacy_row(supabase_db, "A1")
+
+    stats = migrate_json_encoding(supabase_db, dry_run=True)
+
+    assert stats["migrated"] == 1
+    assert _stored_row(supabase_db, "A1")["affected_products"] == str(["x", "y"])
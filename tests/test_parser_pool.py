@@ -0,0 +1,64 @@
+import pytest
+
+from src.scraper import sources
+from src.scraper.parser_pool import ParserPool
+
+PAGE = {"markdown": "# Page", "metadata": {"title": "Runtime alert", "sourceURL": "https://example.com/a/1"}}
+
+
+def _runtime_source(name, **fields):
+    return {"name": name, "base_url": "https://example.com", "alert_list_path": "/a", **fields}
+
+
+@pytest.fixture
+def registered():
+    """Registers sources for one test and removes them afterwards."""
+    added = []
+
+    def register(source):
+        added.append(sources.register_source(source))
+        return source
+    yield register
+    for source in added:
+        sources.MEDICAL_ALERT_SOURCES.remove(source)
+
+
+def _parse(items):
+    with ParserPool(max_workers=2) as pool:
+        return {key: raw_alert for _, key, raw_alert, _ in pool.parse(items)}, pool.timing_report()
+
+
+def test_source_registered_after_the_workers_started_parses_in_workers(registered):
+    with ParserPool(max_workers=2) as pool:
+        list(pool.parse([(sources.GOV_UK_DRUG_SAFETY_UPDATE["name"], i, PAGE) for i in range(4)]))
+        registered(_runtime_source("Runtime Rules", fields={"title": {"keys": ["metadata.title"]}}))
+
+        results = {key: raw_alert for _, key, raw_alert, _ in pool.parse([("Runtime Rules", i, PAGE) for i in range(4)])}
+
+        assert [results[i]["title"] for i in range(4)] == ["Runtime alert"] * 4
+        assert pool.timing_report()["Runtime Rules"]["errors"] == 0
+
+
+def test_lambda_and_closure_parsers_fall_back_to_inline(registered):
+    suffix = "!"
+
+    def closure_parser(page):
+        return {"title": page["metadata"]["title"] + suffix}
+
+    registered(_runtime_source("Lambda Source", parser_function=lambda page: {"title": page["metadata"]["title"]}))
+    registered(_runtime_source("Closure Source", parser_function=closure_parser))
+
+    results, report = _parse([("Lambda Source", "a", PAGE), ("Closure Source", "b", PAGE),
+                              (sources.GOV_UK_DRUG_SAFETY_UPDATE["name"], "c", PAGE)])
+
+    assert results["a"] == {"title": "Runtime alert"}
+    assert results["b"] == {"title": "Runtime alert!"}
+    assert results["c"]["title"] == "Runtime alert"
+    assert all(stats["errors"] == 0 for stats in report.values())
+
+
+def test_unknown_source_yields_none():
+    results, report = _parse([("No Such Source", "a", PAGE)])
+
+    assert results == {"a": None}
+    assert report["No Such Source"]["errors"] == 1
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from src.processor.product_matcher import ProductMatcher
+
+ALERTS = [
+    {"alert_id": "valproate", "affected_products": ["Sodium valproate"]},
+    {"alert_id": "calcium", "affected_products": ["Calcium carbonate tablets"]},
+    {"alert_id": "saline", "affected_products": ["Potassium chloride"]},
+]
+
+
+def test_salt_free_names_match():
+    matcher = ProductMatcher(ALERTS, synonyms={"epilim": "sodium valproate"})
+
+    assert matcher.match("Valproate 200mg tablets") == ("valproate",)
+    assert matcher.match("Epilim 200mg gastro-resistant tablets") == ("valproate",)
+
+
+def test_anion_alone_does_not_match():
+    matcher = ProductMatcher(ALERTS, synonyms={})
+
+    assert matcher.match("Lithium carbonate 400mg modified-release tablets") == ()
+    assert matcher.match("Sodium chloride 0.9% infusion") == ()
+    assert matcher.match("Calcium carbonate 1.25g chewable tablets") == ("calcium",)
+    assert matcher.match("Potassium chloride 600mg tablets") == ("saline",)
+
+
+def test_count_patients_counts_distinct_patients():
+    matcher = ProductMatcher(ALERTS, synonyms={})
+    chunk = pd.DataFrame({"drug": ["Sodium valproate 200mg", "Valproate 500mg", "Lithium carbonate 400mg"],
+                          "patient_id": ["p1", "p1", "p2"]})
+
+    assert matcher.count_patients([chunk]) == {"valproate": 1}
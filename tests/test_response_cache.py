@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from fakes import FakeFirecrawlApp
+from src.scraper.firecrawl_scraper import SCRAPE_OPTIONS, FirecrawlScraper
+from src.scraper.response_cache import CacheMissError, ResponseCache
+
+LIST_URL = "https://example.com/alerts"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, clock=clock)
+    cache.set("key", {"markdown": "page"})
+
+    clock.now += 59
+    assert cache.get("key") == {"markdown": "page"}
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.get("key", allow_expired=True) == {"markdown": "page"}
+
+
+def test_least_recently_used_entries_are_evicted_at_the_size_cap(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.set("a", "x" * 100)
+    entry_size = os.path.getsize(cache._path("a"))
+    cache.max_bytes = int(entry_size * 2.5)
+    cache.set("b", "y" * 100)
+
+    assert cache.get("a") == "x" * 100  # a is now more recently used than b
+    cache.set("c", "z" * 100)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(cache._path("b"))
+    assert cache.get("a") == "x" * 100
+    assert cache.get("c") == "z" * 100
+    # A restarted cache rebuilds its size from the files left on disk.
+    assert ResponseCache(str(tmp_path))._size == 2 * entry_size
+
+
+def test_replay_mode_raises_on_a_miss_and_serves_expired_entries(tmp_path):
+    clock = FakeClock()
+    app = FakeFirecrawlApp(total_alerts=5, list_url=LIST_URL)
+    live = FirecrawlScraper(app=app, cache=ResponseCache(str(tmp_path), clock=clock), requests_per_minute=60_000)
+    page = live.scrape_page(LIST_URL)
+    clock.now += 10 * 24 * 3600
+
+    replay = FirecrawlScraper(replay=True, cache=ResponseCache(str(tmp_path), ttl_seconds=3600, clock=clock))
+
+    assert replay.app is None
+    assert replay.scrape_page(LIST_URL) == page
+    with pytest.raises(CacheMissError):
+        replay._fetch('scrape', f"{LIST_URL}?page=2", SCRAPE_OPTIONS, replay._scrape)
+    assert replay.scrape_page(f"{LIST_URL}?page=2") is None  # scrape_page reports the miss and returns None
+    assert app.requests == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from fakes import FakeFirecrawlApp
+from src.observability import metrics
+from src.scraper.firecrawl_scraper import FirecrawlScraper
+from src.scraper.response_cache import ResponseCache
+
+LIST_URL = "https://example.com/alerts"
+
+
+@pytest.fixture
+def recorded_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def spans_by_name() -> dict:
+    return {item["span"]: item for item in metrics.snapshot()}
+
+
+def test_cache_hits_are_not_recorded_as_fetches(tmp_path, recorded_metrics):
+    app = FakeFirecrawlApp(total_alerts=10, list_url=LIST_URL)
+    scraper = FirecrawlScraper(app=app, cache=ResponseCache(str(tmp_path)), requests_per_minute=60_000)
+
+    first = scraper.scrape_page(LIST_URL)
+    second = scraper.scrape_page(LIST_URL)
+
+    assert second == first
+    assert app.requests == 1
+    spans = spans_by_name()
+    assert spans["scraper.fetch"]["count"] == 1
+    assert spans["scraper.fetch"]["labels"] == {"kind": "scrape"}
+    assert spans["scraper.cache_hit"]["count"] == 1
+    assert spans["scraper.cache_hit"]["bytes"] > 0
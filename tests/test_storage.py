@@ -0,0 +1,29 @@
+from tests.conftest import make_alert
+
+
+def test_alert_sources_are_distinct_and_sorted(db_manager):
+    db_manager.insert_alerts([make_alert("A1", source_name="NICE Safety Notices"),
+                              make_alert("A2", source_name="MHRA Drug Alerts"),
+                              make_alert("A3", source_name="MHRA Drug Alerts"),
+                              make_alert("A4", source_name=None)])
+
+    assert db_manager.get_alert_sources() == ["MHRA Drug Alerts", "NICE Safety Notices"]
+
+
+def test_alert_sources_read_the_view_not_the_alerts(supabase_db):
+    supabase_db.insert_alerts([make_alert(f"A{i}") for i in range(50)])
+    requested = []
+    table = supabase_db.client.table
+    supabase_db.client.table = lambda name: requested.append(name) or table(name)
+
+    assert supabase_db.get_alert_sources() == ["MHRA Drug Alerts"]
+    assert requested == ["alert_sources"]
+
+
+def test_upsert_clears_the_duplicate_mark(db_manager):
+    db_manager.insert_alerts([make_alert("A1"), make_alert("A2", canonical_alert_id="A1")])
+
+    db_manager.insert_alerts([make_alert("A2", summary="Text that has diverged", canonical_alert_id=None)])
+
+    assert db_manager.get_alert("A2")["canonical_alert_id"] is None
+    assert db_manager.get_raw_data("A2") == {"id": "A2"}
@@ -0,0 +1,116 @@
+import pandas as pd
+
+from src.database.sync import AlertSnapshot
+from tests.conftest import make_alert
+
+T0 = pd.Timestamp("2024-05-01T09:00:00", tz="UTC")
+
+
+def stamp(seconds: float) -> pd.Timestamp:
+    return T0 + pd.to_timedelta(seconds, unit="s")
+
+
+class ChangesBackend:
+    """Serves get_changes from rows with explicit updated_at stamps, one page per request."""
+
+    def __init__(self):
+        self.rows = {'alerts': {}, 'pharmacist_actions': {}}
+        self.requests = []
+
+    def write_alert(self, alert_id: str, title: str, seconds: float):
+        self.rows['alerts'][alert_id] = {"alert_id": alert_id, "title": title, "severity": "High",
+                                         "date_published": T0, "updated_at": stamp(seconds)}
+
+    def write_action(self, action_id: int, alert_id: str, seconds: float):
+        self.rows['pharmacist_actions'][action_id] = {"action_id": action_id, "alert_id": alert_id,
+                                                      "updated_at": stamp(seconds)}
+
+    def get_latest_update(self, table: str):
+        self.requests.append((table, 'latest'))
+        return max((row['updated_at'] for row in self.rows[table].values()), default=None)
+
+    def iter_changes(self, table: str, since=None, columns: list = None):
+        self.requests.append((table, since))
+        rows = [row for row in self.rows[table].values() if since is None or row['updated_at'] >= since]
+        if rows:
+            yield pd.DataFrame(rows)
+
+
+def test_overlapping_pages_report_each_version_once():
+    backend = ChangesBackend()
+    backend.write_alert("A1", "First", 0)
+    backend.write_alert("A2", "Second", 5)
+    snapshot = AlertSnapshot(backend, alert_columns=['alert_id', 'title', 'severity', 'date_published'],
+                             min_refresh_seconds=0, overlap_seconds=10)
+
+    assert snapshot.refresh()['alerts']['alert_id'].tolist() == ["A1", "A2"]
+
+    # The second request starts 10 s before the watermark, so it fetches A1 and A2 again.
+    backend.write_alert("A1", "First, updated", 28)
+    backend.write_alert("A3", "Third", 30)
+    changes = snapshot.refresh()
+
+    assert backend.requests[-2] == ('alerts', stamp(-5))
+    assert sorted(changes['alerts']['alert_id']) == ["A1", "A3"]
+    assert snapshot.alerts.set_index('alert_id')['title'].to_dict() == {
+        "A1": "First, updated", "A2": "Second", "A3": "Third"}
+    assert snapshot.watermarks['alerts'] == stamp(30)
+    # A2 is older than the next request's start and can't be fetched again: its version is forgotten.
+    assert set(snapshot._versions['alerts']) == {"A1", "A3"}
+
+    version = snapshot.version
+    assert snapshot.refresh()['alerts'].empty
+    assert snapshot.version == version
+
+
+def test_refresh_picks_up_writes_to_a_backend(db_manager):
+    db_manager.insert_alerts([make_alert("A1"), make_alert("A2")])
+    snapshot = AlertSnapshot(db_manager, min_refresh_seconds=0)
+    snapshot.refresh()
+
+    db_manager.insert_alerts([make_alert("A2", title="Updated"), make_alert("A3")])
+    changes = snapshot.refresh()
+
+    assert sorted(changes['alerts']['alert_id']) == ["A2", "A3"]
+    assert snapshot.alerts.set_index('alert_id').loc["A2", 'title'] == "Updated"
+    assert not hasattr(snapshot, 'actions')
+
+
+def test_first_refresh_seeds_the_actions_watermark_without_fetching_them():
+    backend = ChangesBackend()
+    backend.write_alert("A1", "First", 0)
+    for action_id in range(1, 4):
+        backend.write_action(action_id, "A1", action_id)
+    snapshot = AlertSnapshot(backend, alert_columns=['alert_id', 'title'], min_refresh_seconds=0, overlap_seconds=0)
+
+    assert snapshot.refresh()['pharmacist_actions'].empty
+    assert backend.requests == [('alerts', None), ('pharmacist_actions', 'latest')]
+    assert snapshot.watermarks['pharmacist_actions'] == stamp(3)
+
+    backend.write_action(4, "A1", 10)
+    changes = snapshot.refresh()
+
+    assert backend.requests[-1] == ('pharmacist_actions', stamp(3))
+    # The watermark is inclusive: the seeding action is reported once more, which only invalidates it again.
+    assert changes['pharmacist_actions']['action_id'].tolist() == [3, 4]
+
+
+def test_actions_written_after_an_empty_first_refresh_are_all_fetched():
+    backend = ChangesBackend()
+    snapshot = AlertSnapshot(backend, min_refresh_seconds=0)
+    snapshot.refresh()
+
+    backend.write_action(1, "A1", 0)
+    backend.write_action(2, "A1", 5)
+
+    assert snapshot.refresh()['pharmacist_actions']['action_id'].tolist() == [1, 2]
+    assert backend.requests[-1] == ('pharmacist_actions', None)
+
+
+def test_latest_update(db_manager):
+    assert db_manager.get_latest_update('pharmacist_actions') is None
+    db_manager.insert_alerts([make_alert("A1"), make_alert("A2")])
+
+    latest = db_manager.get_latest_update('alerts')
+
+    assert latest == db_manager.get_changes('alerts')[0]['updated_at'].max()